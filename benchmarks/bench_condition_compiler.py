@@ -0,0 +1,231 @@
+"""
+边条件编译器 micro-benchmark
+
+对比原 DynamicGraphBuilder._apply_json_logic / eval_rule 解释执行
+与 condition_compiler 预编译闭包的单次求值耗时，并校验两者结果一致。
+
+运行: python -m benchmarks.bench_condition_compiler
+"""
+import re
+import timeit
+from typing import Any, Callable, Dict
+
+from hatchify.common.domain.entity.graph_spec import ConditionRule
+from hatchify.core.graph.condition_compiler import compile_json_logic, compile_rules
+
+
+def legacy_apply_json_logic(expr: Any, data: Dict[str, Any]) -> Any:
+    """原 DynamicGraphBuilder._apply_json_logic 实现（基准）"""
+
+    def get_var(path: Any, default: Any = None) -> Any:
+        if path is None:
+            return data
+        if not isinstance(path, str):
+            return data.get(path, default)
+        cur = data
+        for key in path.split("."):
+            if isinstance(cur, dict) and key in cur:
+                cur = cur[key]
+            else:
+                return default
+        return cur
+
+    def resolve(val: Any) -> Any:
+        if isinstance(val, dict):
+            return eval_expr(val)
+        if isinstance(val, list):
+            return [resolve(v) for v in val]
+        return val
+
+    def eval_expr(obj: Any) -> Any:
+        if not isinstance(obj, dict) or len(obj) != 1:
+            return obj
+        op, args = next(iter(obj.items()))
+        if not isinstance(args, list):
+            args = [args]
+
+        if op in {"var"}:
+            path = args[0] if args else None
+            default = args[1] if len(args) > 1 else None
+            return get_var(path, default)
+
+        if op in {"==", "eq"}:
+            return resolve(args[0]) == resolve(args[1])
+        if op in {"!=", "neq"}:
+            return resolve(args[0]) != resolve(args[1])
+        if op in {">", "gt"}:
+            return resolve(args[0]) > resolve(args[1])
+        if op in {">=", "gte"}:
+            return resolve(args[0]) >= resolve(args[1])
+        if op in {"<", "lt"}:
+            return resolve(args[0]) < resolve(args[1])
+        if op in {"<=", "lte"}:
+            return resolve(args[0]) <= resolve(args[1])
+        if op in {"!", "not"}:
+            return not bool(resolve(args[0]))
+        if op == "and":
+            return all(bool(resolve(arg)) for arg in args)
+        if op == "or":
+            return any(bool(resolve(arg)) for arg in args)
+        if op == "in":
+            a, b = resolve(args[0]), resolve(args[1])
+            try:
+                return a in b
+            except Exception:
+                return False
+        if op == "if":
+            pairs = list(zip(args[0::2], args[1::2]))
+            for cond, val in pairs[:-1]:
+                if bool(resolve(cond)):
+                    return resolve(val)
+            if len(args) % 2 == 1:
+                return resolve(args[-1])
+            cond, val = pairs[-1]
+            return resolve(val) if bool(resolve(cond)) else None
+        if op == "regex":
+            pattern = resolve(args[0])
+            target = resolve(args[1])
+            return (
+                    isinstance(pattern, str)
+                    and isinstance(target, str)
+                    and re.search(pattern, target) is not None
+            )
+        return False
+
+    return eval_expr(expr)
+
+
+def legacy_rules(rules, logic: str) -> Callable[[Dict[str, Any]], bool]:
+    """原 _create_rules_condition 中 eval_rule 的实现（基准）"""
+
+    def eval_rule(rule: ConditionRule, output: Dict[str, Any]) -> bool:
+        left = output.get(rule.field)
+        right = rule.value
+        op = (rule.op or "").lower()
+
+        handlers: Dict[str, Callable[[Any, Any], bool]] = {
+            "==": lambda l, r: l == r,
+            "eq": lambda l, r: l == r,
+            "!=": lambda l, r: l != r,
+            "neq": lambda l, r: l != r,
+            ">": lambda l, r: l is not None and r is not None and l > r,
+            "gt": lambda l, r: l is not None and r is not None and l > r,
+            ">=": lambda l, r: l is not None and r is not None and l >= r,
+            "gte": lambda l, r: l is not None and r is not None and l >= r,
+            "<": lambda l, r: l is not None and r is not None and l < r,
+            "lt": lambda l, r: l is not None and r is not None and l < r,
+            "<=": lambda l, r: l is not None and r is not None and l <= r,
+            "lte": lambda l, r: l is not None and r is not None and l <= r,
+            "in": lambda l, r: r is not None and l in r,
+            "not_in": lambda l, r: r is None or l not in r,
+            "contains": lambda l, r: l is not None and r in l,
+            "not_contains": lambda l, r: l is None or r not in l,
+            "startswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.startswith(r),
+            "endswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.endswith(r),
+            "regex": lambda l, r: isinstance(l, str) and isinstance(r, str) and re.search(r, l) is not None,
+            "regex_not": lambda l, r: isinstance(l, str) and isinstance(r, str) and re.search(r, l) is None,
+            "between": lambda l, r: (
+                    l is not None
+                    and isinstance(r, (list, tuple))
+                    and len(r) == 2
+                    and r[0] <= l <= r[1]
+            ),
+            "is_true": lambda l, _: bool(l) is True,
+            "is_false": lambda l, _: bool(l) is False,
+            "exists": lambda l, _: l is not None,
+            "not_exists": lambda l, _: l is None,
+        }
+
+        try:
+            handler = handlers.get(op)
+            if not handler:
+                return False
+            return handler(left, right)
+        except Exception:
+            return False
+
+    def evaluate(output: Dict[str, Any]) -> bool:
+        results = [eval_rule(rule, output) for rule in rules]
+        return any(results) if logic == "or" else all(results)
+
+    return evaluate
+
+
+JSON_LOGIC_CASES = {
+    "simple_eq": {"==": [{"var": "next_node"}, "writer"]},
+    "nested_and_or": {
+        "and": [
+            {">=": [{"var": "review.score"}, 80]},
+            {"or": [
+                {"in": [{"var": "review.level"}, ["gold", "silver"]]},
+                {"regex": ["^approved_", {"var": "review.tag"}]},
+            ]},
+            {"!": {"var": "review.flagged"}},
+        ]
+    },
+    "if_chain": {
+        "if": [
+            {"<": [{"var": "review.score"}, 60]}, "reject",
+            {"<": [{"var": "review.score"}, 90]}, "revise",
+            "accept",
+        ]
+    },
+}
+
+RULE_CASES = {
+    "and_3": (
+        [
+            ConditionRule(field="score", op="gte", value=80),
+            ConditionRule(field="level", op="in", value=["gold", "silver"]),
+            ConditionRule(field="tag", op="regex", value=r"^approved_\d+$"),
+        ],
+        "and",
+    ),
+    "or_2": (
+        [
+            ConditionRule(field="tag", op="startswith", value="rejected"),
+            ConditionRule(field="score", op="between", value=[60, 100]),
+        ],
+        "or",
+    ),
+}
+
+OUTPUT = {
+    "next_node": "writer",
+    "review": {"score": 85, "level": "gold", "tag": "approved_42", "flagged": False},
+    "score": 85,
+    "level": "gold",
+    "tag": "approved_42",
+}
+
+
+# 原解释器在 if 参数为奇数个时跳过最后一个条件，编译版本按 JSONLogic 语义修正，结果不同
+LEGACY_DIVERGENT = {"if_chain"}
+
+
+def _bench(fn: Callable[[], Any], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int = 20000) -> None:
+    print(f"{'case':<24}{'legacy (us)':>14}{'compiled (us)':>16}{'speedup':>10}")
+
+    for name, expr in JSON_LOGIC_CASES.items():
+        compiled = compile_json_logic(expr)
+        if name not in LEGACY_DIVERGENT:
+            assert compiled(OUTPUT) == legacy_apply_json_logic(expr, OUTPUT), name
+        legacy_us = _bench(lambda: legacy_apply_json_logic(expr, OUTPUT), number)
+        compiled_us = _bench(lambda: compiled(OUTPUT), number)
+        print(f"{'json_logic/' + name:<24}{legacy_us:>14.2f}{compiled_us:>16.2f}{legacy_us / compiled_us:>9.1f}x")
+
+    for name, (rules, logic) in RULE_CASES.items():
+        compiled = compile_rules(rules, logic)
+        legacy = legacy_rules(rules, logic)
+        assert compiled(OUTPUT) == legacy(OUTPUT), name
+        legacy_us = _bench(lambda: legacy(OUTPUT), number)
+        compiled_us = _bench(lambda: compiled(OUTPUT), number)
+        print(f"{'rules/' + name:<24}{legacy_us:>14.2f}{compiled_us:>16.2f}{legacy_us / compiled_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Graph 构建 benchmark
+
+对 5 / 20 / 50 个节点的 GraphSpec 分别测量：
+- cold: compile_template + instantiate（清空 Agent 预热池）
+- warm: 复用模板与预热池，仅 instantiate
+
+LLM Model 使用不发起请求的占位实现，只测量本地构建开销；
+需要在已配置 resources/models.toml 的环境中运行。
+
+运行: python -m benchmarks.bench_graph_build
+"""
+import statistics
+import time
+from typing import Any, AsyncGenerator, List
+
+from strands.models import Model
+
+import hatchify.core.graph.dynamic_graph_builder as dynamic_graph_builder
+from hatchify.common.domain.entity.agent_node_spec import AgentNode
+from hatchify.common.domain.entity.function_node_spec import FunctionNode
+from hatchify.common.domain.entity.graph_spec import GraphSpec, Edge
+from hatchify.core.graph.dynamic_graph_builder import DynamicGraphBuilder
+from hatchify.core.manager.agent_pool_manager import agent_pool
+from hatchify.core.manager.function_manager import function_router
+from hatchify.core.manager.tool_manager import tool_factory
+
+
+class _OfflineModel(Model):
+    """只用于构建的占位 Model，不会被调用"""
+
+    def update_config(self, **model_config: Any) -> None:
+        pass
+
+    def get_config(self) -> Any:
+        return {}
+
+    async def structured_output(self, *args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+        yield {}
+
+    async def stream(self, *args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+        yield {}
+
+
+def make_spec(node_count: int) -> GraphSpec:
+    """生成 agent -> echo_function -> agent ... 交替的链式 Graph"""
+    agents: List[AgentNode] = []
+    functions: List[FunctionNode] = []
+    names: List[str] = []
+    for index in range(node_count):
+        if index % 2 == 0:
+            name = f"agent_{index}"
+            agents.append(AgentNode(
+                name=name,
+                model="benchmark-model",
+                instruction=f"You are step {index}.",
+                structured_output_schema={
+                    "type": "object",
+                    "properties": {"text": {"type": "string"}},
+                    "required": ["text"],
+                },
+            ))
+        else:
+            name = f"function_{index}"
+            functions.append(FunctionNode(name=name, function_ref="echo_function"))
+        names.append(name)
+
+    return GraphSpec(
+        name=f"bench_{node_count}",
+        agents=agents,
+        functions=functions,
+        nodes=names,
+        edges=[Edge(from_node=a, to_node=b) for a, b in zip(names, names[1:])],
+        entry_point=names[0],
+    )
+
+
+def _timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(repeat: int = 10) -> None:
+    offline_model = _OfflineModel()
+    dynamic_graph_builder.create_llm_by_agent_card = lambda agent_card: offline_model
+
+    builder = DynamicGraphBuilder(
+        tool_router=tool_factory,
+        function_router=function_router,
+    )
+
+    print(f"{'nodes':>6}{'cold (ms)':>12}{'warm (ms)':>12}")
+    for node_count in (5, 20, 50):
+        spec = make_spec(node_count)
+
+        def cold():
+            agent_pool.clear()
+            builder.instantiate(builder.compile_template(spec))
+
+        template = builder.compile_template(spec)
+
+        def warm():
+            graph = builder.instantiate(template)
+            graph.release()
+
+        cold_ms = _timed(cold, repeat)
+        warm()  # 预热 Agent 池
+        warm_ms = _timed(warm, repeat)
+        print(f"{node_count:>6}{cold_ms:>12.2f}{warm_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
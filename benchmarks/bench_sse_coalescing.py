@@ -0,0 +1,80 @@
+"""
+SSE 帧合并写出 benchmark
+
+模拟 web-builder 的 delta token 流，分别以直写（每帧一次写）和 SSECoalescer 合并写出
+推送到本地 socket，统计：
+- writes: 写 socket 次数（对应 ASGI send / send 系统调用次数）
+- events/s: 端到端吞吐（消费端读完全部字节）
+- avg batch: 每次写出平均包含的帧数
+
+场景：
+- burst: 生产端不等待，尽可能快地产生事件
+- paced: 生产端每 20 个 token 让出 1ms，接近 LLM 流式输出的节奏
+
+运行: python -m benchmarks.bench_sse_coalescing
+"""
+import asyncio
+import json
+import socket
+import time
+import uuid
+from typing import AsyncIterator, Optional
+
+from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.core.stream_handler.sse_coalescer import SSECoalescer
+
+
+def make_frame(index: int) -> bytes:
+    return StreamEvent.build_frame(uuid.uuid4().hex, "delta", json.dumps({"content": f"tok{index} "}))
+
+
+async def produce(count: int, pace_every: Optional[int]) -> AsyncIterator[bytes]:
+    for index in range(count):
+        yield make_frame(index)
+        if pace_every and index % pace_every == 0:
+            await asyncio.sleep(0.001)
+        else:
+            await asyncio.sleep(0)
+    yield StreamEvent.build_frame(uuid.uuid4().hex, "done", json.dumps({"task_id": "bench", "reason": "completed"}))
+
+
+async def run(count: int, pace_every: Optional[int], coalesce: bool):
+    server_sock, client_sock = socket.socketpair()
+    reader, reader_side_writer = await asyncio.open_connection(sock=server_sock)
+    _, writer = await asyncio.open_connection(sock=client_sock)
+
+    frames = produce(count, pace_every)
+    chunks = SSECoalescer().coalesce(frames) if coalesce else frames
+
+    async def drain_reader():
+        total = 0
+        while chunk := await reader.read(65536):
+            total += len(chunk)
+        return total
+
+    reader_task = asyncio.create_task(drain_reader())
+    start = time.perf_counter()
+    writes = 0
+    async for chunk in chunks:
+        writer.write(chunk)
+        await writer.drain()
+        writes += 1
+    writer.close()
+    await writer.wait_closed()
+    await reader_task
+    elapsed = time.perf_counter() - start
+    reader_side_writer.close()
+    return writes, (count + 1) / elapsed
+
+
+async def main(count: int = 20000) -> None:
+    print(f"{'scenario':>10}{'mode':>10}{'writes':>10}{'events/s':>12}{'avg batch':>11}")
+    for scenario, pace_every in (("burst", None), ("paced", 20)):
+        for coalesce in (False, True):
+            writes, rate = await run(count, pace_every, coalesce)
+            mode = "coalesce" if coalesce else "direct"
+            print(f"{scenario:>10}{mode:>10}{writes:>10}{rate:>12.0f}{(count + 1) / writes:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,6 +14,8 @@ from hatchify.common.domain.requests.execution import PageExecutionRequest
 from hatchify.common.domain.responses.execution_response import ExecutionResponse
 from hatchify.common.domain.responses.pagination import PaginationInfo
 from hatchify.common.domain.result.result import Result
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.manager.stream_manager import StreamManager
 
 executions_router = APIRouter(prefix="/executions")
 
@@ -58,4 +60,23 @@ async def page(
     except Exception as e:
         msg = f"{type(e).__name__}: {str(e)}"
         logger.error(msg)
-        return Result.error(code=500, message=msg)
\ No newline at end of file
+        return Result.error(code=500, message=msg)
+
+@executions_router.post("/{id}/cancel", response_model=Result[bool])
+async def cancel(
+        _id: str = Path(default=..., alias="id"),
+):
+    """取消进行中（或排队中）的执行，执行结束后通过 SSE 推送 cancel 事件"""
+    try:
+        handler = await StreamManager.get(_id)
+        if handler is None and not await execution_registry.is_remote(_id):
+            return Result.error(code=404, message="Execution Not Found or already released")
+        if handler is not None and handler.is_finished():
+            return Result.error(code=409, message="Execution already finished")
+        if not await StreamManager.cancel(_id):
+            return Result.error(code=409, message="Execution already finished or being cancelled")
+        return Result.ok(data=True)
+    except Exception as e:
+        msg = f"{type(e).__name__}: {str(e)}"
+        logger.error(msg)
+        return Result.error(code=500, message=msg)
@@ -15,6 +15,7 @@ from hatchify.business.services.execution_service import ExecutionService
 from hatchify.business.services.graph_service import GraphService
 from hatchify.business.utils.pagination_utils import CustomParams
 from hatchify.business.utils.sse_helper import create_sse_response
+from hatchify.common.domain.entity.graph_analysis import GraphAnalysis
 from hatchify.common.domain.enums.execution_type import ExecutionType
 from hatchify.common.domain.requests.graph import (
     PageGraphRequest,
@@ -27,6 +28,7 @@ from hatchify.common.domain.responses.graph_version_response import GraphVersion
 from hatchify.common.domain.responses.pagination import PaginationInfo
 from hatchify.common.domain.responses.web_hook import ExecutionResponse
 from hatchify.common.domain.result.result import Result
+from hatchify.core.manager.admission_manager import admission_controller
 from hatchify.core.manager.function_manager import function_router
 from hatchify.core.manager.model_card_manager import model_card_manager
 from hatchify.core.manager.stream_manager import StreamManager
@@ -146,6 +148,29 @@ async def patch_graph_spec(
         return Result.error(code=500, message=msg)
 
 
+@graphs_router.get("/{id}/analysis", response_model=Result[GraphAnalysis])
+async def analyze_graph(
+        _id: str = Path(default=..., alias="id"),
+        use_history: bool = Query(default=True, description="是否结合节点历史耗时预测执行耗时"),
+        session: AsyncSession = Depends(get_db),
+        service: GraphService = Depends(ServiceManager.get_service_dependency(GraphService)),
+):
+    """
+    静态分析 Graph 当前 spec
+    - 拓扑层级、最大扇出、环（Router 回路）、关键路径、理论并行度
+    - 标记可以并行却被串行执行的 Agent 链
+    """
+    try:
+        analysis = await service.analyze_graph(session, _id, use_history=use_history)
+        if analysis is None:
+            return Result.error(code=404, message="Source Not Found")
+        return Result.ok(data=analysis)
+    except Exception as e:
+        msg = f"{type(e).__name__}: {str(e)}"
+        logger.error(msg)
+        return Result.error(code=500, message=msg)
+
+
 @graphs_router.post("/{id}/snapshot", response_model=Result[GraphVersionResponse])
 async def create_snapshot(
         _id: str = Path(default=..., alias="id"),
@@ -204,6 +229,7 @@ async def submit_stream_conversation(
     - 如果提供 graph_id：使用该 Graph 的 current_session_id，对话历史会累积
     - 如果不提供 graph_id：自动创建新的 Graph 和 Session
     """
+    ticket = await admission_controller.acquire(request.graph_id, ExecutionType.GRAPH_BUILDER)
     try:
         if request.graph_id:
             graph_id = request.graph_id
@@ -246,6 +272,8 @@ async def submit_stream_conversation(
         )
         await StreamManager.create(execution_obj.id, generator)
         await generator.submit_task(session_id=current_session_id, request=request)
+        # 执行任务结束时归还准入名额
+        ticket.bind(generator.stream_task)
 
         return Result.ok(data=ExecutionResponse(
             session_id=current_session_id,
@@ -253,6 +281,7 @@ async def submit_stream_conversation(
             graph_id=graph_id
         ))
     except Exception as e:
+        ticket.release()
         msg = f"{type(e).__name__}: {e}"
         logger.error(msg)
         return Result.error(message=msg)
@@ -281,5 +310,6 @@ async def stream_conversation(
         execution_id=execution_id,
         last_event_id=last_event_id,
         latest_event_id=latest_event_id,
-        replay=replay
+        replay=replay,
+        endpoint="graph",
     )
@@ -0,0 +1,17 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+from hatchify.common.domain.result.result import Result
+from hatchify.common.extensions.ext_metrics import metrics
+
+metrics_router = APIRouter(prefix="/metrics")
+
+
+@metrics_router.get("")
+async def get_metrics() -> Result[Dict[str, Any]]:
+    try:
+        return Result.ok(data=metrics.snapshot())
+    except Exception as e:
+        msg = f"{type(e).__name__}: {e}"
+        return Result.error(message=msg)
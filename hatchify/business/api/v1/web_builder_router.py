@@ -22,6 +22,7 @@ from hatchify.common.settings.settings import get_hatchify_settings
 from hatchify.core.factory.agent_factory import create_agent_by_agent_card
 from hatchify.core.factory.session_manager_factory import create_session_manager
 from hatchify.core.graph.hooks.security_file_hook import SecurityFileHook
+from hatchify.core.manager.admission_manager import admission_controller
 from hatchify.core.manager.stream_manager import StreamManager
 from hatchify.core.prompts.prompts import WEB_BUILDER_SYSTEM_PROMPT
 from hatchify.core.stream_handler.deploy import DeployGenerator
@@ -77,6 +78,7 @@ async def web_builder_conversation(
 
     注意：使用 graph_id 作为 session_id，确保同一个 graph 的所有对话都在同一个会话中
     """
+    ticket = await admission_controller.acquire(request.graph_id, ExecutionType.WEB_BUILDER)
     try:
         # 1. 获取当前 Graph spec
         graph_spec = await service.get_graph_spec(session, request.graph_id)
@@ -137,6 +139,8 @@ async def web_builder_conversation(
         )
         await StreamManager.create(execution_obj.id, generator)
         await generator.submit_task(request=request)
+        # 执行任务结束时归还准入名额
+        ticket.bind(generator.stream_task)
 
         # 9. 返回 execution_id（session_id 使用 graph_id）
         return Result.ok(
@@ -148,6 +152,7 @@ async def web_builder_conversation(
         )
 
     except Exception as e:
+        ticket.release()
         msg = f"{type(e).__name__}: {e}"
         logger.error(msg)
         return Result.error(message=msg)
@@ -176,7 +181,8 @@ async def stream_conversation(
         execution_id=execution_id,
         last_event_id=last_event_id,
         latest_event_id=latest_event_id,
-        replay=replay
+        replay=replay,
+        endpoint="web_builder",
     )
 
 
@@ -200,6 +206,7 @@ async def deploy_web_app(
     4. 动态挂载静态文件到 /preview/{graph_id}/
     5. 返回 execution_id 用于获取流式日志
     """
+    ticket = await admission_controller.acquire(request.graph_id, ExecutionType.DEPLOY)
     try:
         # 1. 检查 graph 是否存在
         graph_spec = await service.get_graph_spec(session, request.graph_id)
@@ -235,6 +242,8 @@ async def deploy_web_app(
         # 5. 提交部署任务（智能判断是否需要构建）
         await StreamManager.create(execution_obj.id, generator)
         await generator.submit_task()
+        # 执行任务结束时归还准入名额
+        ticket.bind(generator.stream_task)
 
         # 6. 返回 execution_id
         return Result.ok(data=ExecutionResponse(
@@ -244,8 +253,10 @@ async def deploy_web_app(
         ))
 
     except HTTPException:
+        ticket.release()
         raise
     except Exception as e:
+        ticket.release()
         msg = f"{type(e).__name__}: {e}"
         logger.error(msg)
         return Result.error(message=msg)
@@ -274,7 +285,8 @@ async def stream_deploy(
         execution_id=execution_id,
         last_event_id=last_event_id,
         latest_event_id=latest_event_id,
-        replay=replay
+        replay=replay,
+        endpoint="deploy",
     )
 
 
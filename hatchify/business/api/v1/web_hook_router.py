@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import json
+import time
 import uuid
-from typing import Any, Optional, List, Dict
+from functools import partial
+from typing import Any, Optional, List, Dict, AsyncIterator, Awaitable, Callable, Set, Tuple
 
 from fastapi import APIRouter, Request, HTTPException, UploadFile, Header, Query, Depends
 from loguru import logger
@@ -15,19 +20,30 @@ from hatchify.business.services.graph_service import GraphService
 from hatchify.business.utils.sse_helper import create_sse_response
 from hatchify.common.domain.entity.graph_execute_data import FileData, GraphExecuteData
 from hatchify.common.domain.entity.graph_spec import GraphSpec
+from hatchify.common.domain.enums.execution_priority import ExecutionPriority
+from hatchify.common.domain.enums.execution_status import ExecutionStatus
 from hatchify.common.domain.enums.execution_type import ExecutionType
-from hatchify.common.domain.responses.web_hook import WebHookInfoResponse, ExecutionResponse
+from hatchify.common.domain.responses.web_hook import WebHookInfoResponse, ExecutionResponse, \
+    BatchInvokeItemResponse
 from hatchify.common.domain.result.result import Result
+from hatchify.common.extensions.ext_metrics import metrics
 from hatchify.common.extensions.ext_storage import storage_client
 from hatchify.common.settings.settings import get_hatchify_settings
 from hatchify.core.factory.session_manager_factory import create_session_manager
 from hatchify.core.graph.dynamic_graph_builder import DynamicGraphBuilder
+from hatchify.core.graph.graph_template import GraphTemplate
 from hatchify.core.graph.hooks.graph_state_hook import GraphStateHook
+from hatchify.core.manager.admission_manager import admission_controller, AdmissionRejected
 from hatchify.core.manager.function_manager import function_router
+from hatchify.core.manager.graph_template_manager import GraphTemplateManager
+from hatchify.core.manager.idempotency_manager import idempotency_manager, result_cache, compute_request_hash, \
+    IdempotencyConflict
+from hatchify.core.manager.scheduler_manager import execution_scheduler, ScheduledJob
 from hatchify.core.manager.stream_manager import StreamManager
 from hatchify.core.manager.tool_manager import tool_factory
 from hatchify.core.stream_handler.event_listener.execution_tracker_listener import ExecutionTrackerListener
 from hatchify.core.stream_handler.graph_executor import GraphExecutor
+from hatchify.core.utils.schema_utils import compute_spec_hash
 from hatchify.core.utils.webhook_utils import infer_webhook_spec_from_schema
 
 settings = get_hatchify_settings()
@@ -46,12 +62,14 @@ async def prepare_data(graph_id: str, graph_spec: GraphSpec, request: Request):
             if field_name in form:
                 uploaded_file: UploadFile = form[field_name]
                 key = f"{graph_id}/hatchify__{uploaded_file.filename}"
-                await storage_client.save(key=key, data=await uploaded_file.read(), mimetype=uploaded_file.content_type)
+                data = await uploaded_file.read()
+                await storage_client.save(key=key, data=data, mimetype=uploaded_file.content_type)
                 files[field_name] = [FileData(
                     key=key,
                     mime=uploaded_file.content_type or "application/octet-stream",
                     name=uploaded_file.filename,
-                    source=settings.storage.platform
+                    source=settings.storage.platform,
+                    content_hash=hashlib.sha256(data).hexdigest(),
                 )]
         for field_name in webhook_spec.data_fields:
             if field_name in form:
@@ -90,74 +108,285 @@ async def get_webhook_info(
         return Result.error(message=msg)
 
 
+def create_builder(graph_id: str, session_id: Optional[str]) -> DynamicGraphBuilder:
+    """session_id 为 None 时不挂载 SessionManager，执行之间不共享会话状态"""
+    return DynamicGraphBuilder(
+        tool_router=tool_factory,
+        function_router=function_router,
+        hooks=[GraphStateHook()],
+        session_manager=create_session_manager(graph_id=graph_id, session_id=session_id) if session_id else None
+    )
+
+
+async def invoke_graph(
+        graph_id: str,
+        graph_spec: GraphSpec,
+        builder: DynamicGraphBuilder,
+        template: GraphTemplate,
+        execute_data: GraphExecuteData,
+) -> Dict[str, Any]:
+    """基于已编译的模板执行一次 Graph，返回 output_schema 中要求的节点输出"""
+    graph = builder.instantiate(template)
+    executor = GraphExecutor(
+        graph_id=graph_id,
+        graph=graph,
+        graph_spec=graph_spec,
+        listeners=[ExecutionTrackerListener()]
+    )
+
+    graph_result = await executor.invoke_async(execute_data)
+
+    output_required = graph_spec.output_schema.get("required", [])
+    result_dict = {}
+    for node, node_result in graph_result.results.items():
+        if node in output_required:
+            result_dict[node] = node_result.result.structured_output.model_dump()
+    return result_dict
+
+
 @web_hook_router.post("/invoke/{graph_id}", response_model=Result[Dict[str, Any]])
 async def invoke(
         graph_id: str,
         request: Request,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
         session: AsyncSession = Depends(get_db),
         service: GraphService = Depends(ServiceManager.get_service_dependency(GraphService)),
 ):
-    result_dict = {}
+    """
+    同步调用 Webhook
+
+    携带 Idempotency-Key 时，相同 Key 的重试请求共享首次调用的结果；
+    启用结果缓存时，相同 spec 与输入的调用直接返回缓存结果
+    """
     graph_spec = await service.get_graph_spec(session, graph_id)
     if not graph_spec:
         return Result.error(code=404, message=f"Graph '{graph_id}' not found")
 
-    output_required = graph_spec.output_schema.get("required", [])
     execute_data = await prepare_data(graph_id, graph_spec, request)
+    request_hash = compute_request_hash(compute_spec_hash(graph_spec), execute_data)
 
-    builder = DynamicGraphBuilder(
-        tool_router=tool_factory,
-        function_router=function_router,
-        hooks=[GraphStateHook()],
-        session_manager=create_session_manager(graph_id=graph_id, session_id=graph_id)
-    )
+    async def run() -> Dict[str, Any]:
+        cached = await result_cache.get(graph_id, request_hash)
+        if cached is not None:
+            return cached
 
-    graph = builder.build_graph(graph_spec)
+        ticket = await admission_controller.acquire(graph_id, ExecutionType.WEBHOOK)
+        try:
+            builder = create_builder(graph_id, session_id=graph_id)
+            template = await GraphTemplateManager.get_or_compile(graph_id, graph_spec, builder)
+            result_dict = await invoke_graph(graph_id, graph_spec, builder, template, execute_data)
+        finally:
+            ticket.release()
 
-    executor = GraphExecutor(
-        graph_id=graph_id,
-        graph=graph,
-        graph_spec=graph_spec,
-        listeners=[ExecutionTrackerListener()]
-    )
+        await result_cache.put(graph_id, request_hash, result_dict)
+        return result_dict
 
     try:
-        graph_result = await executor.invoke_async(execute_data)
+        result_dict = await idempotency_manager.run_once("invoke", graph_id, idempotency_key, request_hash, run)
+        return Result.ok(data=result_dict)
 
-        for node, node_result in graph_result.results.items():
-            if node in output_required:
-                result_dict[node] = node_result.result.structured_output.model_dump()
+    except AdmissionRejected:
+        raise
+    except IdempotencyConflict as e:
+        return Result.error(code=e.status_code, message=str(e))
+    except Exception as e:
+        msg = f"{type(e).__name__}: {e}"
+        logger.error(msg)
+        return Result.error(message=msg)
 
-        return Result.ok(data=result_dict)
 
+BatchItem = Tuple[int, Any]
+
+
+async def read_ndjson_items(request: Request, max_items: int) -> List[Any]:
+    """
+    读取并按行解析 NDJSON 请求体，解析失败的行以 ValueError 交给调用方，不影响其他行
+
+    必须在返回 StreamingResponse 之前读完请求体：响应开始后 Starlette 在后台监听客户端断开，
+    会消费掉尚未读取的请求体消息。最多解析 max_items + 1 条，超出部分由 run_batch 报告 413。
+    """
+    items: List[Any] = []
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        items.extend(_parse_ndjson_line(line) for line in lines if line.strip())
+        if len(items) > max_items:
+            return items[:max_items + 1]
+    if buffer.strip():
+        items.append(_parse_ndjson_line(buffer))
+    return items
+
+
+async def iter_list_items(items: List[Any]) -> AsyncIterator[BatchItem]:
+    for index, item in enumerate(items):
+        yield index, item
+
+
+def _parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+async def run_batch(
+        items: AsyncIterator[BatchItem],
+        run_item: Callable[[int, Any], Awaitable[BatchInvokeItemResponse]],
+        concurrency: int,
+        max_items: int,
+) -> AsyncIterator[bytes]:
+    """按 concurrency 限制并发执行条目，按完成顺序输出 NDJSON 结果行"""
+    pending: Set[asyncio.Task] = set()
+
+    async def completed() -> AsyncIterator[bytes]:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result().model_dump_json().encode() + b"\n"
+
+    try:
+        async for index, item in items:
+            if index >= max_items:
+                yield BatchInvokeItemResponse(
+                    index=index, code=413, message=f"Batch exceeds {max_items} items, remaining items skipped"
+                ).model_dump_json().encode() + b"\n"
+                break
+            # 读取输入与执行条目交替进行，同时存在的任务不超过 concurrency
+            if len(pending) >= concurrency:
+                async for line in completed():
+                    yield line
+            pending.add(asyncio.create_task(run_item(index, item)))
+
+        while pending:
+            async for line in completed():
+                yield line
+    finally:
+        # 客户端断开时取消尚未完成的条目
+        for task in pending:
+            task.cancel()
+
+
+@web_hook_router.post("/invoke-batch/{graph_id}")
+async def invoke_batch(
+        graph_id: str,
+        request: Request,
+        concurrency: Optional[int] = Query(default=None, ge=1),
+        session: AsyncSession = Depends(get_db),
+        service: GraphService = Depends(ServiceManager.get_service_dependency(GraphService)),
+):
+    """
+    批量调用 Webhook
+
+    请求体为 JSON 数组或 NDJSON（Content-Type: application/x-ndjson），每个条目是一次 invoke 的 JSON 输入。
+    Graph 模板只编译一次；条目之间相互独立，每个条目使用各自的 builder 且不挂载 SessionManager，
+    避免并发条目共享同一个会话。条目按 concurrency 并发执行，
+    结果以 NDJSON 按完成顺序返回，每行为 BatchInvokeItemResponse（index 对应输入顺序）。
+
+    Args:
+        graph_id: Graph ID
+        concurrency: 并发执行的条目数，默认且不超过 hatchify.webhook_batch.max_concurrency
+    """
+    graph_spec = await service.get_graph_spec(session, graph_id)
+    if not graph_spec:
+        return Result.error(code=404, message=f"Graph '{graph_id}' not found")
+
+    webhook_spec = infer_webhook_spec_from_schema(graph_spec.input_schema)
+    if webhook_spec.input_type == "multipart/form-data":
+        return Result.error(code=415, message="Batch invoke does not support graphs with file inputs")
+
+    try:
+        builder = create_builder(graph_id, session_id=None)
+        template = await GraphTemplateManager.get_or_compile(graph_id, graph_spec, builder)
     except Exception as e:
         msg = f"{type(e).__name__}: {e}"
         logger.error(msg)
         return Result.error(message=msg)
 
+    batch_settings = settings.webhook_batch
+    concurrency = min(concurrency or batch_settings.max_concurrency, batch_settings.max_concurrency)
+
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = iter_list_items(await read_ndjson_items(request, batch_settings.max_items))
+    else:
+        try:
+            body = await request.json()
+        except ValueError as e:
+            return Result.error(code=400, message=f"Invalid JSON: {e}")
+        if not isinstance(body, list):
+            return Result.error(code=400, message="Request body must be a JSON array or NDJSON")
+        items = iter_list_items(body)
+
+    async def run_item(index: int, item: Any) -> BatchInvokeItemResponse:
+        if isinstance(item, Exception):
+            return BatchInvokeItemResponse(index=index, code=400, message=str(item))
+        if not isinstance(item, dict):
+            return BatchInvokeItemResponse(index=index, code=400, message="Batch item must be a JSON object")
+
+        # 并发已由 concurrency 限制，这里不受准入等待队列长度与超时限制
+        execute_data = GraphExecuteData(jsons=item, files={})
+        request_hash = compute_request_hash(template.spec_hash, execute_data)
+        cached = await result_cache.get(graph_id, request_hash)
+        if cached is not None:
+            metrics.inc("webhook_batch_items", status="cached")
+            return BatchInvokeItemResponse(index=index, code=200, message="Success", data=cached)
+
+        ticket = await admission_controller.acquire(graph_id, ExecutionType.WEBHOOK, scheduled=True)
+        start = time.perf_counter()
+        try:
+            builder = create_builder(graph_id, session_id=None)
+            data = await invoke_graph(graph_id, graph_spec, builder, template, execute_data)
+            await result_cache.put(graph_id, request_hash, data)
+            metrics.inc("webhook_batch_items", status="ok")
+            return BatchInvokeItemResponse(index=index, code=200, message="Success", data=data)
+        except Exception as e:
+            msg = f"{type(e).__name__}: {e}"
+            logger.error(f"Batch item {index} of {graph_id} failed: {msg}")
+            metrics.inc("webhook_batch_items", status="error")
+            return BatchInvokeItemResponse(index=index, code=500, message=msg)
+        finally:
+            ticket.release()
+            metrics.observe("webhook_batch_item_seconds", time.perf_counter() - start)
+
+    return StreamingResponse(
+        run_batch(items, run_item, concurrency, batch_settings.max_items),
+        media_type="application/x-ndjson",
+    )
+
 
 @web_hook_router.post("/stream/{graph_id}", response_model=Result[ExecutionResponse])
 async def submit(
         graph_id: str,
         request: Request,
+        priority: ExecutionPriority = Query(default=ExecutionPriority.INTERACTIVE),
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
         session: AsyncSession = Depends(get_db),
         service: GraphService = Depends(ServiceManager.get_service_dependency(GraphService)),
         execution_service: ExecutionService = Depends(ServiceManager.get_service_dependency(ExecutionService)),
 ):
+    """
+    提交 Webhook 流式执行
+
+    执行进入 ExecutionScheduler 队列（状态 QUEUED），由 worker 按优先级与 Graph 公平调度后启动；
+    排队期间即可通过 GET /stream/{execution_id} 订阅事件。
+    携带 Idempotency-Key 时，相同 Key 的重试请求返回首次提交的 execution_id，不会重复执行
+    """
     graph_spec = await service.get_graph_spec(session, graph_id)
     if not graph_spec:
         return Result.error(code=404, message=f"Graph '{graph_id}' not found")
 
-    # 通过 Service 创建执行记录
-    execution_obj: ExecutionTable = await execution_service.create_execution(
-        session=session,
-        execution_type=ExecutionType.WEBHOOK,
-        graph_id=graph_id,
-        session_id=graph_id,
-    )
+    async def run() -> Dict[str, Any]:
+        execution_scheduler.ensure_capacity()
 
-    try:
-        execute_data = await prepare_data(graph_id, graph_spec, request)
+        # 通过 Service 创建执行记录
+        execution_obj: ExecutionTable = await execution_service.create_execution(
+            session=session,
+            execution_type=ExecutionType.WEBHOOK,
+            graph_id=graph_id,
+            session_id=graph_id,
+            status=ExecutionStatus.QUEUED,
+        )
 
         builder = DynamicGraphBuilder(
             tool_router=tool_factory,
@@ -165,7 +394,8 @@ async def submit(
             hooks=[GraphStateHook()],
             session_manager=create_session_manager(graph_id=graph_id, session_id=execution_obj.id),
         )
-        graph = builder.build_graph(graph_spec)
+        template = await GraphTemplateManager.get_or_compile(graph_id, graph_spec, builder)
+        graph = builder.instantiate(template)
 
         executor = GraphExecutor(
             graph_id=execution_obj.id,
@@ -175,11 +405,28 @@ async def submit(
         )
 
         await StreamManager.create(execution_obj.id, executor)
+        await executor.ensure_event_store()
 
-        await executor.submit_task(execute_data)
+        execution_scheduler.submit(ScheduledJob(
+            handler=executor,
+            start=partial(executor.submit_task, execute_data),
+            graph_id=graph_id,
+            execution_type=ExecutionType.WEBHOOK,
+            priority=priority,
+        ))
 
-        return Result.ok(data=ExecutionResponse(graph_id=graph_id, session_id=graph_id, execution_id=execution_obj.id))
+        return ExecutionResponse(graph_id=graph_id, session_id=graph_id, execution_id=execution_obj.id).model_dump()
 
+    try:
+        execute_data = await prepare_data(graph_id, graph_spec, request)
+        request_hash = compute_request_hash(compute_spec_hash(graph_spec), execute_data)
+        response = await idempotency_manager.run_once("stream", graph_id, idempotency_key, request_hash, run)
+        return Result.ok(data=ExecutionResponse.model_validate(response))
+
+    except AdmissionRejected:
+        raise
+    except IdempotencyConflict as e:
+        return Result.error(code=e.status_code, message=str(e))
     except Exception as e:
         msg = f"{type(e).__name__}: {e}"
         logger.error(msg)
@@ -209,5 +456,6 @@ async def stream(
         execution_id=execution_id,
         last_event_id=last_event_id,
         latest_event_id=latest_event_id,
-        replay=replay
+        replay=replay,
+        endpoint="webhook",
     )
@@ -2,6 +2,8 @@ from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
 from loguru import logger
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 from hatchify.business.db.base import Base
@@ -32,13 +34,33 @@ async def transaction(session: AsyncSession):
         raise
 
 
+# create_all 不会修改已存在的表，新增的可空列在这里补齐：(表名, 列名, 列定义)
+_ADDED_COLUMNS = [
+    ("graph_version", "analysis", "JSON"),
+]
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    inspector = inspect(conn)
+    for table, column, ddl in _ADDED_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        if column in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        logger.info(f"Added column {table}.{column}")
+
+
 async def init_db():
     from hatchify.business.models.graph import GraphTable
     from hatchify.business.models.graph_version import GraphVersionTable
     from hatchify.business.models.session import SessionTable
     from hatchify.business.models.messages import MessageTable
     from hatchify.business.models.execution import ExecutionTable
+    from hatchify.business.models.idempotency_record import IdempotencyRecordTable
+    from hatchify.business.models.result_cache import ResultCacheTable
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
         logger.debug("Initialized db")
@@ -35,6 +35,8 @@ class GraphVersionTable(Base):
         default=GraphVersionType.SNAPSHOT,
     )
     spec: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # GraphSpec 静态分析结果（拓扑层级、关键路径、理论并行度等），见 analyze_graph_spec
+    analysis: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     comment: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     parent_version_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     branch_session_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
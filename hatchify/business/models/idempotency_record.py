@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import (
+    String,
+    DateTime,
+    func,
+    Enum,
+    Float,
+    JSON,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from hatchify.business.db.base import Base
+from hatchify.common.domain.enums.idempotency_status import IdempotencyStatus
+
+
+class IdempotencyRecordTable(Base):
+    """幂等记录表 - 相同 Idempotency-Key 的重复请求返回首个请求的结果"""
+    __tablename__ = "idempotency_record"
+
+    # sha256(endpoint, graph_id, idempotency_key)
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    # 调用的接口 (invoke/stream)
+    endpoint: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    graph_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+
+    idempotency_key: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # 请求内容哈希，相同的 Key 携带不同内容时拒绝
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    status: Mapped[IdempotencyStatus] = mapped_column(
+        Enum(IdempotencyStatus),
+        nullable=False,
+        default=IdempotencyStatus.IN_PROGRESS,
+    )
+
+    # 首个请求的响应数据（完成后写入）
+    response: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+
+    # 过期时间（Unix 时间戳），过期记录由 ResourceReaper 清理
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
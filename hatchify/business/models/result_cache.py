@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    String,
+    DateTime,
+    func,
+    Float,
+    JSON,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from hatchify.business.db.base import Base
+
+
+class ResultCacheTable(Base):
+    """Graph 执行结果缓存表 - 相同 spec 与输入（含文件内容）的 webhook 调用直接返回缓存结果"""
+    __tablename__ = "result_cache"
+
+    # sha256(graph_id, sha256(spec_hash, 规范化输入, 文件内容哈希))
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    graph_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+
+    result: Mapped[Any] = mapped_column(JSON, nullable=False)
+
+    # 过期时间（Unix 时间戳），过期记录由 ResourceReaper 清理
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
@@ -22,6 +22,7 @@ class ExecutionService(GenericService[ExecutionTable]):
             execution_type: ExecutionType,
             graph_id: Optional[str] = None,
             session_id: Optional[str] = None,
+            status: ExecutionStatus = ExecutionStatus.PENDING,
     ) -> ExecutionTable:
         """
         创建执行记录
@@ -31,13 +32,14 @@ class ExecutionService(GenericService[ExecutionTable]):
             execution_type: 执行类型
             graph_id: Graph ID（可选）
             session_id: 会话ID（可选）
+            status: 初始状态，进入调度队列的执行为 QUEUED
 
         Returns:
             创建的执行记录
         """
         execution = ExecutionTable(
             type=execution_type,
-            status=ExecutionStatus.PENDING,
+            status=status,
             graph_id=graph_id,
             session_id=session_id,
         )
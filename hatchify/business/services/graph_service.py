@@ -1,6 +1,7 @@
 import mimetypes
 from typing import Optional, cast, List, get_args, Sequence, Tuple, Any
 
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from strands.types.content import ContentBlock, Messages, Message
 from strands.types.media import DocumentFormat, VideoFormat, ImageFormat, DocumentContent, ImageContent, VideoContent
@@ -19,13 +20,17 @@ from hatchify.business.repositories.session_repository import SessionRepository
 from hatchify.business.services.base.generic_service import GenericService
 from hatchify.business.services.graph_version_service import GraphVersionService
 from hatchify.business.services.session_service import SessionService
+from hatchify.common.domain.entity.graph_analysis import GraphAnalysis
 from hatchify.common.domain.entity.graph_spec import GraphSpec
 from hatchify.common.domain.enums.graph_version_type import GraphVersionType
 from hatchify.common.domain.enums.session_scene import SessionScene
 from hatchify.common.domain.requests.graph_patch import GraphSpecPatchRequest
 from hatchify.core.graph.dynamic_graph_builder import DynamicGraphBuilder
 from hatchify.core.manager.function_manager import function_router
+from hatchify.core.manager.graph_template_manager import GraphTemplateManager
+from hatchify.core.manager.node_latency_manager import node_latency_history
 from hatchify.core.manager.tool_manager import tool_factory
+from hatchify.core.utils.schema_utils import analyze_graph_spec, compute_spec_hash
 
 document_formats = get_args(DocumentFormat)
 image_formats = get_args(ImageFormat)
@@ -94,6 +99,37 @@ class GraphService(GenericService[GraphTable]):
             return None
         return GraphSpec.model_validate(graph_obj.current_spec)
 
+    async def analyze_graph(
+            self,
+            session: AsyncSession,
+            graph_id: str,
+            use_history: bool = True,
+    ) -> GraphAnalysis | None:
+        """
+        静态分析 Graph 当前 spec
+        - use_history=True 时结合本进程记录的（同一 spec 的）节点平均耗时预测执行耗时
+        """
+        graph_spec = await self.get_graph_spec(session, graph_id)
+        if graph_spec is None:
+            return None
+
+        node_latencies = {}
+        if use_history:
+            averages = node_latency_history.averages(compute_spec_hash(graph_spec))
+            node_latencies = {node: averages[node] for node in graph_spec.nodes if node in averages}
+        return analyze_graph_spec(graph_spec, node_latencies or None)
+
+    @staticmethod
+    def _analyze_spec(spec_data: dict | None) -> dict | None:
+        """生成随版本保存的分析结果，分析失败不影响版本创建"""
+        if spec_data is None:
+            return None
+        try:
+            return analyze_graph_spec(GraphSpec.model_validate(spec_data)).model_dump(mode="json")
+        except Exception as e:
+            logger.warning(f"Analyze graph spec failed: {type(e).__name__}: {e}")
+            return None
+
     async def get_current_session_id(
             self,
             session: AsyncSession,
@@ -191,6 +227,7 @@ class GraphService(GenericService[GraphTable]):
             type=GraphVersionType.DRAFT,
             version=None,
             spec=graph.current_spec,
+            analysis=self._analyze_spec(graph.current_spec),
             comment=comment or "auto-draft",
             parent_version_id=parent_version_id,
             branch_session_id=branched_session.id if branched_session else None,
@@ -286,6 +323,9 @@ class GraphService(GenericService[GraphTable]):
                 if result:
                     await session.refresh(result)
 
+            if "current_spec" in update_data:
+                await GraphTemplateManager.invalidate(entity_id)
+
             return result
         except Exception:
             if commit:
@@ -299,7 +339,8 @@ class GraphService(GenericService[GraphTable]):
             tool_router=tool_factory,
             function_router=function_router,
         )
-        builder.build_graph(spec_model)
+        # 只编译模板完成校验，不实例化，避免从 Agent 池借出 Agent
+        builder.compile_template(spec_model)
 
         return spec_model.model_dump(exclude_none=True)
 
@@ -372,6 +413,7 @@ class GraphService(GenericService[GraphTable]):
                 type=GraphVersionType.SNAPSHOT,
                 version=new_version_no,
                 spec=graph.current_spec,
+                analysis=self._analyze_spec(graph.current_spec),
                 parent_version_id=parent_id,
                 branch_session_id=branch_session_id,
                 comment=comment,
@@ -461,7 +503,9 @@ class GraphService(GenericService[GraphTable]):
                 raise ValueError(f"Failed to rollback Graph {graph_id}")
 
             await session.refresh(result)
-            return result
+
+        await GraphTemplateManager.invalidate(graph_id)
+        return result
 
     async def delete_by_id(
             self,
@@ -510,6 +554,9 @@ class GraphService(GenericService[GraphTable]):
             if result and commit:
                 await session.commit()
 
+            if result:
+                await GraphTemplateManager.invalidate(entity_id)
+
             return result
         except Exception as e:
             if commit:
@@ -572,6 +619,8 @@ class GraphService(GenericService[GraphTable]):
                 if result:
                     await session.refresh(result)
 
+            await GraphTemplateManager.invalidate(graph_id)
+
             return result
         except Exception:
             if commit:
@@ -1,10 +1,65 @@
-from typing import Optional
+import time
+from typing import Optional, AsyncIterator
 
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 from loguru import logger
 
+from hatchify.common.domain.event.base_event import StreamEvent, PingEvent
+from hatchify.common.settings.settings import get_hatchify_settings
+from hatchify.core.manager.event_manager import EventStore, interrupted_events
+from hatchify.core.manager.execution_registry import execution_registry
 from hatchify.core.manager.stream_manager import StreamManager
+from hatchify.core.stream_handler.sse_coalescer import SSECoalescer
+from hatchify.core.stream_handler.stream_handler import BaseStreamHandler
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Access-Control-Allow-Origin": "*"
+}
+
+
+async def replay_stored_events(store: EventStore, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    从事件存储重放事件（handler 已不存在，如进程重启后）
+
+    调用方已确认没有存活的 worker 在执行：事件日志中没有终止事件的执行已中断，
+    只在重放结果末尾补齐中断事件，不写回事件存储
+    """
+    if last_event_id and await store.has_after(last_event_id):
+        events = store.iter_after(last_event_id)
+    else:
+        events = store.iter_all()
+    async for event in events:
+        yield BaseStreamHandler.format_sse(event)
+    if not store.is_completed():
+        for event in interrupted_events(store.source_id):
+            yield BaseStreamHandler.format_sse(event)
+
+
+async def relay_remote_events(execution_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+    """转发在其他 worker 上运行的执行的事件（多 worker 部署）"""
+    async for event in execution_registry.subscribe_remote(
+            execution_id,
+            last_event_id=last_event_id,
+            ping_factory=lambda: StreamEvent(type="ping", data=PingEvent(timestamp=int(time.time()))),
+    ):
+        yield BaseStreamHandler.format_sse(event)
+
+
+def _coalesced(frames: AsyncIterator[bytes], endpoint: Optional[str]) -> AsyncIterator[bytes]:
+    """按端点配置决定是否合并 SSE 帧写出"""
+    settings = get_hatchify_settings().stream
+    if not endpoint or endpoint not in settings.coalesce_endpoints:
+        return frames
+    coalescer = SSECoalescer(
+        max_bytes=settings.coalesce_max_bytes,
+        min_interval=settings.coalesce_min_interval,
+        max_interval=settings.coalesce_max_interval,
+    )
+    return coalescer.coalesce(frames)
 
 
 async def create_sse_response(
@@ -12,6 +67,7 @@ async def create_sse_response(
         last_event_id: Optional[str] = None,
         latest_event_id: Optional[str] = None,
         replay: bool = False,
+        endpoint: Optional[str] = None,
 ) -> StreamingResponse:
     """
     创建 SSE 流式响应
@@ -21,6 +77,7 @@ async def create_sse_response(
         last_event_id: SSE 重连时的最后一个事件 ID（从 Header）
         latest_event_id: SSE 重连时的最后一个事件 ID（从 Query，优先级更高）
         replay: 是否强制从头重播所有事件（忽略 last_event_id）
+        endpoint: 端点名称，用于匹配 hatchify.stream.coalesce_endpoints 决定是否合并写出
 
     Returns:
         StreamingResponse: SSE 流式响应
@@ -28,28 +85,49 @@ async def create_sse_response(
     Raises:
         HTTPException: 如果 execution 不存在或流式处理出错
     """
+    # 确定有效的 last_event_id（如果 replay=True，强制为 None 以重播所有事件）
+    effective_last_id = None if replay else (latest_event_id or last_event_id)
+
     # 获取 executor
     executor = await StreamManager.get(execution_id)
     if not executor:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Execution '{execution_id}' not found. It may have expired or been cleaned up."
-        )
+        try:
+            remote = await execution_registry.is_remote(execution_id)
+        except Exception as e:
+            # 无法确认执行是否仍在其他 worker 上运行，不能按已中断重放
+            logger.warning(f"Failed to check owner of execution {execution_id}: {type(e).__name__}: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Execution registry is temporarily unavailable, please retry later",
+                headers={"Retry-After": "1"},
+            )
+        if remote:
+            # 执行在其他 worker 上运行，从共享的事件日志转发
+            return StreamingResponse(
+                _coalesced(relay_remote_events(execution_id, effective_last_id), endpoint),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+            )
 
-    # 确定有效的 last_event_id（如果 replay=True，强制为 None 以重播所有事件）
-    effective_last_id = None if replay else (latest_event_id or last_event_id)
+        # handler 已不存在且没有存活的 worker 在执行（如进程重启），从事件日志重放
+        store = await EventStore.get(execution_id)
+        if store is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Execution '{execution_id}' not found. It may have expired or been cleaned up."
+            )
+        return StreamingResponse(
+            _coalesced(replay_stored_events(store, effective_last_id), endpoint),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
 
     # 创建 SSE 响应
     try:
         return StreamingResponse(
-            executor.worker(last_event_id=effective_last_id),
+            _coalesced(executor.worker(last_event_id=effective_last_id), endpoint),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache, no-transform",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-                "Access-Control-Allow-Origin": "*"
-            }
+            headers=SSE_HEADERS,
         )
     except Exception as e:
         msg = f"{type(e).__name__}: {e}"
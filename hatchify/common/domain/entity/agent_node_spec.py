@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any, Type
 from pydantic import Field, BaseModel
 
 from hatchify.common.domain.enums.agent_category import AgentCategory
-from hatchify.utils.json_schema_2_pydantic import jsonschema_to_pydantic
+from hatchify.utils.json_schema_2_pydantic import cached_jsonschema_to_pydantic
 
 
 class AgentNode(BaseModel):
@@ -37,4 +37,4 @@ class AgentNode(BaseModel):
             **self.structured_output_schema
         }
 
-        return jsonschema_to_pydantic(schema_with_title)
+        return cached_jsonschema_to_pydantic(schema_with_title)
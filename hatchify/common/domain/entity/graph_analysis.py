@@ -0,0 +1,46 @@
+from typing import List, Optional, Dict
+
+from pydantic import BaseModel, Field
+
+
+class GraphAnalysis(BaseModel):
+    """GraphSpec 静态分析结果（拓扑层级、环、关键路径、理论并行度）"""
+    node_count: int = Field(..., description="节点数")
+    edge_count: int = Field(..., description="边数")
+    levels: List[List[str]] = Field(
+        default_factory=list,
+        description="拓扑层级，同一层级的节点之间没有依赖，可并行执行（环内节点视为同一层）"
+    )
+    max_fan_out: int = Field(default=0, description="最大出度")
+    max_fan_out_nodes: List[str] = Field(default_factory=list, description="出度最大的节点")
+    max_fan_in: int = Field(default=0, description="最大入度")
+    max_fan_in_nodes: List[str] = Field(default_factory=list, description="入度最大的节点")
+    max_width: int = Field(default=0, description="最宽层级可并行执行的分支数，一个环计为 1")
+    cycles: List[List[str]] = Field(
+        default_factory=list,
+        description="环（强连通分量），通常由 Router 回路产生"
+    )
+    critical_path: List[str] = Field(default_factory=list, description="关键路径（加权最长路径）上的节点")
+    critical_path_length: float = Field(
+        default=0.0,
+        description="关键路径长度；未提供节点耗时时按每个节点 1 计"
+    )
+    total_work: float = Field(default=0.0, description="所有节点耗时之和（单位同 critical_path_length）")
+    theoretical_parallelism: float = Field(
+        default=1.0,
+        description="理论并行度 = total_work / critical_path_length"
+    )
+    predicted_latency: Optional[float] = Field(
+        default=None,
+        description="结合节点历史耗时预测的执行耗时（秒），每个环按执行一轮估算"
+    )
+    node_latencies: Dict[str, float] = Field(
+        default_factory=dict,
+        description="参与预测的节点耗时（秒）"
+    )
+    unreachable_nodes: List[str] = Field(default_factory=list, description="从入口节点不可达的节点")
+    serial_chains: List[List[str]] = Field(
+        default_factory=list,
+        description="无条件串行的 Agent 链，若链上节点互不依赖对方输出则可改为并行"
+    )
+    warnings: List[str] = Field(default_factory=list, description="分析告警")
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from pydantic import BaseModel
 
@@ -10,6 +10,8 @@ class FileData(BaseModel):
     mime: str
     name: str
     source: StorageType
+    # 文件内容 sha256，用于幂等 / 结果缓存的请求哈希
+    content_hash: Optional[str] = None
 
 
 class GraphExecuteData(BaseModel):
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ExecutionPriority(str, Enum):
+    """执行优先级 - ExecutionScheduler 调度类别"""
+    INTERACTIVE = "interactive"              # 交互式调用，优先调度
+    BATCH = "batch"                          # 批量 / 后台调用
\ No newline at end of file
@@ -7,12 +7,14 @@ class ExecutionStatus(str, Enum):
 
     生命周期映射：
     - PENDING: 任务创建但未开始
+    - QUEUED: 已进入 ExecutionScheduler 队列，等待 worker 执行
     - RUNNING: 收到 StartEvent
     - COMPLETED: 收到 DoneEvent(reason="completed")
     - CANCELLED: 收到 DoneEvent(reason="cancel") 或 CancelEvent
     - FAILED: 收到 DoneEvent(reason="error") 或 ErrorEvent
     """
     PENDING = "pending"          # 等待中
+    QUEUED = "queued"            # 排队中 (ExecutionScheduler)
     RUNNING = "running"          # 处理中 (StartEvent)
     COMPLETED = "completed"      # 完成 (DoneEvent: completed)
     FAILED = "failed"            # 失败 (DoneEvent: error / ErrorEvent)
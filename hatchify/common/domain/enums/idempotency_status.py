@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class IdempotencyStatus(str, Enum):
+    """幂等记录状态"""
+    IN_PROGRESS = "in_progress"              # 首个请求正在执行
+    COMPLETED = "completed"                  # 已完成，重复请求直接返回保存的结果
@@ -1,7 +1,7 @@
 import uuid
-from typing import Literal, Any
+from typing import Literal, Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class StartEvent(BaseModel):
@@ -39,3 +39,29 @@ class StreamEvent[T, D](BaseModel):
     id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     type: T
     data: D
+
+    # SSE 帧缓存：事件发出后不再修改，只在 emit_event 时序列化一次，
+    # EventStore、广播与断线重放都直接复用同一份 bytes
+    _frame: Optional[bytes] = PrivateAttr(default=None)
+
+    @staticmethod
+    def build_frame(event_id: str, event_type: Any, data_json: str) -> bytes:
+        return f"id: {event_id}\nevent: {event_type}\ndata: {data_json}\n\n".encode("utf-8")
+
+    @classmethod
+    def from_serialized(cls, event_id: str, event_type: Any, data: Any, data_json: str) -> "StreamEvent":
+        """由已序列化的 data JSON 还原事件（如从事件日志读取），复用原 JSON 构建 SSE 帧"""
+        event = cls(id=event_id, type=event_type, data=data)
+        event._frame = cls.build_frame(event_id, event_type, data_json)
+        return event
+
+    def sse_frame(self) -> bytes:
+        """SSE 帧（id / event / data），首次调用时序列化"""
+        if self._frame is None:
+            self._frame = self.build_frame(self.id, self.type, self.data.model_dump_json(exclude_none=True))
+        return self._frame
+
+    def data_json(self) -> str:
+        """data 的 JSON，从 SSE 帧中截取，不重复序列化"""
+        frame = self.sse_frame()
+        return frame[frame.index(b"\ndata: ") + 7:-2].decode("utf-8")
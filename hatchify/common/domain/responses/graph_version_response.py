@@ -11,6 +11,7 @@ class GraphVersionResponse(BaseModel):
     version: int | None
     type: GraphVersionType
     spec: dict
+    analysis: dict | None = Field(default=None)
     comment: str | None = Field(default=None)
     parent_version_id: int | None = Field(default=None)
     branch_session_id: str | None = Field(default=None)
@@ -16,3 +16,11 @@ class WebHookInfoResponse(BaseModel):
     file_fields: List[str] = Field(default_factory=list)
     input_schema: Dict[str, Any] = Field(default_factory=dict)
     output_schema: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchInvokeItemResponse(BaseModel):
+    """批量调用中单个条目的结果（NDJSON 一行）"""
+    index: int
+    code: int
+    message: str
+    data: Optional[Dict[str, Any]] = Field(default=None)
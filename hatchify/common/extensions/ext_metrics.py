@@ -0,0 +1,125 @@
+"""
+进程内指标注册表
+
+提供 counter / gauge / summary 三类指标，线程安全，通过 /api/metrics 导出快照。
+指标名使用 `模块_含义` 的蛇形命名，标签以关键字参数传入，例如：
+
+    metrics.inc("agent_pool_checkouts", result="hit")
+    metrics.observe("graph_build_seconds", 0.12)
+    metrics.register_gauge("agent_pool_idle", agent_pool.idle_count)
+"""
+import threading
+from typing import Callable, Dict, Tuple, Any
+
+LabelKey = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, LabelKey]
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: MetricKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class _Summary:
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._counters: Dict[MetricKey, float] = {}
+        self._gauges: Dict[MetricKey, float] = {}
+        self._gauge_callbacks: Dict[MetricKey, Callable[[], float]] = {}
+        self._summaries: Dict[MetricKey, _Summary] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """累加 counter"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """设置 gauge 当前值"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def add_gauge(self, name: str, delta: float, **labels: Any) -> None:
+        """在 gauge 当前值上增减"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def register_gauge(self, name: str, callback: Callable[[], float], **labels: Any) -> None:
+        """注册回调型 gauge，导出快照时求值"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauge_callbacks[key] = callback
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """记录一次 summary 观测值（如耗时）"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary()
+            summary.observe(value)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """导出所有指标的当前快照"""
+        with self._lock:
+            counters = {_format_key(k): v for k, v in self._counters.items()}
+            gauges = {_format_key(k): v for k, v in self._gauges.items()}
+            callbacks = list(self._gauge_callbacks.items())
+            summaries = {_format_key(k): s.as_dict() for k, s in self._summaries.items()}
+
+        # 回调在锁外执行，避免回调内部再次记录指标时死锁
+        for key, callback in callbacks:
+            try:
+                gauges[_format_key(key)] = callback()
+            except Exception:
+                continue
+
+        return {
+            "counters": dict(sorted(counters.items())),
+            "gauges": dict(sorted(gauges.items())),
+            "summaries": dict(sorted(summaries.items())),
+        }
+
+    def reset(self) -> None:
+        """清空所有记录值（保留回调型 gauge）"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+metrics = MetricsRegistry()
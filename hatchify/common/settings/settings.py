@@ -164,6 +164,137 @@ class WebAppBuilderSettings(BaseSettings):
     init_steps: List[Union[EnvStep | WriteInputSchemaStep | WriteOutputSchemaStep]] | None = Field(default=None)
     security: SecuritySettings | None = Field(default=None)
 
+
+class LLMClientPoolSettings(BaseModel):
+    """LLM 客户端连接池配置"""
+    enabled: bool = Field(default=True, description="是否复用 Model 实例与 HTTP 连接池")
+    max_connections: int = Field(default=100, description="每个 provider 端点的最大连接数")
+    max_keepalive_connections: int = Field(default=20, description="每个 provider 端点保持的空闲连接数")
+    keepalive_expiry: float = Field(default=30.0, description="空闲连接保持时间（秒）")
+    timeout: float = Field(default=600.0, description="非 OpenAI 端点的默认请求超时（秒）")
+    max_models: int = Field(default=256, description="池中保留的 Model 数量上限，超出后按 LRU 淘汰")
+
+
+class AgentPoolSettings(BaseModel):
+    """Agent 预热池配置"""
+    enabled: bool = Field(default=True, description="是否在多次执行间复用已构建的 Agent")
+    max_idle_per_node: int = Field(default=4, description="每个 (spec_hash, node) 最多保留的空闲 Agent 数")
+    idle_ttl_seconds: float = Field(default=600.0, description="空闲 Agent 的最长保留时间（秒）")
+
+
+class NodeLatencySettings(BaseModel):
+    """Graph 节点耗时历史配置"""
+    max_specs: int = Field(default=1024, description="保留节点耗时历史的 spec 数量上限，超出后按 LRU 淘汰")
+
+
+class EventStoreSettings(BaseModel):
+    """SSE 事件存储配置"""
+    max_events: int = Field(default=10000, description="每个执行最多保留的事件数（不含固定头部），0 表示不限制")
+    max_bytes: int = Field(default=16 * 1024 * 1024, description="每个执行保留事件的最大字节数（不含固定头部），0 表示不限制")
+    pinned_head_events: int = Field(default=16, description="始终保留的头部事件数，用于断线重连时重建 UI")
+    log_file: ResolvablePath = Field(default=None, description="事件日志 SQLite 文件，为空时不落盘")
+    flush_batch_size: int = Field(default=64, description="事件日志批量写入的条数")
+    flush_retry_interval: float = Field(default=1.0, description="事件日志写入失败后的重试间隔（秒）")
+
+
+class ExecutionRegistrySettings(BaseModel):
+    """执行注册表配置（多 worker 部署时共享执行归属、事件流与取消请求）"""
+    backend: Literal["local", "sqlite"] = Field(
+        default="local",
+        description="local: 仅当前进程可见 / sqlite: 与 event_store.log_file 共用 SQLite 文件，多个 worker 进程共享",
+    )
+    heartbeat_interval: float = Field(default=2.0, description="worker 心跳间隔（秒）")
+    worker_timeout: float = Field(default=10.0, description="超过该时间没有心跳的 worker 视为已退出，其执行不再可用")
+    poll_interval: float = Field(default=0.1, description="事件落盘、取消请求检查与跨 worker 订阅轮询事件日志的间隔（秒）")
+    sqlite_timeout: float = Field(default=1.0, description="sqlite 后端等待其他进程释放写锁的超时（秒），超时后由下一轮重试")
+
+
+class StreamSettings(BaseModel):
+    """执行事件流配置"""
+    subscriber_buffer_size: int = Field(default=1024, description="每个 SSE 订阅者的缓冲事件数，超出后按 subscriber_overflow_policy 处理")
+    subscriber_overflow_policy: Literal["catch_up", "block", "drop_deltas", "detach"] = Field(
+        default="catch_up",
+        description="订阅者缓冲区满时的处理策略：catch_up 从 EventStore 补齐 / block 阻塞生产者 / "
+                    "drop_deltas 丢弃增量事件 / detach 断开订阅者",
+    )
+    subscriber_block_timeout: float = Field(default=5.0, description="block 策略下生产者最长等待时间（秒），超时后按 catch_up 处理")
+    coalesce_endpoints: List[str] = Field(
+        default_factory=lambda: ["web_builder"],
+        description="启用 SSE 帧合并写出的端点：web_builder / deploy / graph / webhook",
+    )
+    coalesce_max_bytes: int = Field(default=16 * 1024, description="合并块达到该字节数时立即写出")
+    coalesce_min_interval: float = Field(default=0.01, description="合并等待窗口下限（秒）")
+    coalesce_max_interval: float = Field(default=0.05, description="合并等待窗口上限（秒）")
+    listener_queue_size: int = Field(default=1024, description="每个 handler 的监听器分发队列长度")
+    listener_overflow_policy: Literal["block", "drop_newest", "drop_oldest"] = Field(
+        default="block",
+        description="监听器分发队列满时的处理策略，状态事件（start / done / error 等）始终等待不丢弃",
+    )
+    idle_cancel_seconds: float = Field(
+        default=0,
+        description="执行没有任何 SSE 订阅者超过该时间（秒）后自动取消，由 ResourceReaper 检查，0 表示不启用",
+    )
+    listener_drain_timeout: float = Field(default=30.0, description="执行结束或应用关闭时等待监听器处理完剩余事件的时间（秒）")
+
+
+class ReaperSettings(BaseModel):
+    """后台资源回收配置"""
+    enabled: bool = Field(default=True, description="是否启动后台回收任务")
+    interval_seconds: float = Field(default=30.0, description="回收间隔（秒）")
+    handler_grace_seconds: float = Field(default=300.0, description="执行结束后保留 stream handler 的时间（秒）")
+    memory_budget_bytes: int = Field(default=256 * 1024 * 1024, description="所有 EventStore 内存事件的总预算，0 表示不限制")
+
+
+class ExecutionRecorderSettings(BaseModel):
+    """执行状态写回配置"""
+    write_behind: bool = Field(default=True, description="是否合并执行状态变更后批量写库，关闭时每次状态变更立即写库")
+    flush_interval_seconds: float = Field(default=0.5, description="批量写库间隔（秒）")
+    max_batch_size: int = Field(default=256, description="待写执行数达到该值时立即写库")
+
+
+class AdmissionSettings(BaseModel):
+    """执行准入控制配置，并发上限为 0 表示不限制"""
+    enabled: bool = Field(default=True, description="是否启用准入控制")
+    max_concurrent: int = Field(default=32, description="全局同时运行的执行数上限")
+    max_concurrent_per_graph: int = Field(default=8, description="单个 Graph 同时运行的执行数上限")
+    max_concurrent_per_type: Dict[str, int] = Field(
+        default_factory=lambda: {"deploy": 2},
+        description="按执行类型（webhook / graph_builder / web_builder / deploy）的并发上限",
+    )
+    max_queue_size: int = Field(default=128, description="等待队列长度，超出后返回 429")
+    queue_timeout_seconds: float = Field(default=30.0, description="排队等待超时（秒），超时后返回 503")
+    retry_after_seconds: int = Field(default=5, description="没有历史执行耗时可供估算时返回的 Retry-After（秒）")
+    max_retry_after_seconds: int = Field(default=60, description="Retry-After 上限（秒）")
+
+
+class SchedulerSettings(BaseModel):
+    """Webhook 执行调度配置"""
+    workers: int = Field(default=16, description="同时运行的 webhook 执行数（worker 数量）")
+    max_queue_size: int = Field(default=1000, description="排队执行数上限，超出后返回 429")
+    batch_starvation_seconds: float = Field(
+        default=30.0,
+        description="batch 执行最长等待时间（秒），超过后优先于 interactive 调度，避免饿死",
+    )
+    default_graph_weight: float = Field(default=1.0, description="Graph 默认调度权重")
+    graph_weights: Dict[str, float] = Field(default_factory=dict, description="按 graph_id 指定的调度权重，权重越大分到的 worker 越多")
+
+
+class WebhookBatchSettings(BaseModel):
+    """Webhook 批量调用配置"""
+    max_concurrency: int = Field(default=8, description="单个批量请求同时执行的条目数上限，请求参数 concurrency 不能超过该值")
+    max_items: int = Field(default=50000, description="单个批量请求的条目数上限，超出的条目不再执行")
+
+
+class IdempotencySettings(BaseModel):
+    """Webhook 幂等键与结果缓存配置"""
+    enabled: bool = Field(default=True, description="是否支持 Idempotency-Key 请求头")
+    ttl_seconds: int = Field(default=86400, description="幂等记录保留时间（秒）")
+    in_progress_timeout_seconds: int = Field(default=900, description="执行中的幂等记录过期时间（秒），进程异常退出后 Key 在此之后可重新使用")
+    result_cache_enabled: bool = Field(default=False, description="是否缓存 invoke 结果，只适用于输出确定的 Graph")
+    result_cache_ttl_seconds: int = Field(default=3600, description="结果缓存保留时间（秒）")
+    result_cache_graph_ids: List[str] = Field(default_factory=list, description="启用结果缓存的 graph_id，为空时对所有 Graph 生效")
+
+
 class HatchifySettings(BaseModel):
     application: str
     server: ServerSettings | None = Field(default=None)
@@ -172,6 +303,18 @@ class HatchifySettings(BaseModel):
     session_manager: SessionManagerSettings | None = Field(default=None)
     db: DbSettings | None = Field(default=None)
     web_app_builder: WebAppBuilderSettings | None = Field(default=None)
+    llm_client_pool: LLMClientPoolSettings = Field(default_factory=LLMClientPoolSettings)
+    agent_pool: AgentPoolSettings = Field(default_factory=AgentPoolSettings)
+    node_latency: NodeLatencySettings = Field(default_factory=NodeLatencySettings)
+    event_store: EventStoreSettings = Field(default_factory=EventStoreSettings)
+    reaper: ReaperSettings = Field(default_factory=ReaperSettings)
+    execution_recorder: ExecutionRecorderSettings = Field(default_factory=ExecutionRecorderSettings)
+    admission: AdmissionSettings = Field(default_factory=AdmissionSettings)
+    scheduler: SchedulerSettings = Field(default_factory=SchedulerSettings)
+    webhook_batch: WebhookBatchSettings = Field(default_factory=WebhookBatchSettings)
+    idempotency: IdempotencySettings = Field(default_factory=IdempotencySettings)
+    stream: StreamSettings = Field(default_factory=StreamSettings)
+    execution_registry: ExecutionRegistrySettings = Field(default_factory=ExecutionRegistrySettings)
 
 
 class AppSettings(BaseSettings):
@@ -7,6 +7,7 @@ from strands.models.openai import OpenAIModel
 
 from hatchify.common.domain.entity.agent_card import AgentCard
 from hatchify.common.domain.entity.model_card import ModelCard, ProviderCard
+from hatchify.core.manager.llm_client_manager import llm_client_pool
 from hatchify.core.manager.model_card_manager import model_card_manager
 
 
@@ -15,6 +16,21 @@ def get_model_by_family(
         model_card: ModelCard,
         client_args: Dict[str, Any],
         max_tokens: int
+) -> Model:
+    """创建指定 family 的 Model，相同端点与参数的 Model 从连接池中复用"""
+    return llm_client_pool.get_or_create(
+        family=provider_card.family,
+        client_args=client_args,
+        model_params={"model_id": model_card.id, "max_tokens": max_tokens},
+        factory=lambda pooled_args: _new_model_by_family(provider_card, model_card, pooled_args, max_tokens),
+    )
+
+
+def _new_model_by_family(
+        provider_card: ProviderCard,
+        model_card: ModelCard,
+        client_args: Dict[str, Any],
+        max_tokens: int
 ) -> Model:
     match provider_card.family:
         case "openai":
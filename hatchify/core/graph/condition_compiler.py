@@ -0,0 +1,286 @@
+"""
+边条件预编译
+
+将 Edge 上的 JSONLogic 表达式和 rules 规则在构建期编译为闭包：
+- 运算符分派在编译期完成，运行时不再遍历表达式字典
+- 常量正则预编译，var 路径预先拆分
+- 不支持的运算符、参数个数错误、非法正则在构建期抛出 ValueError
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from hatchify.common.domain.entity.graph_spec import ConditionRule
+
+Data = Dict[str, Any]
+CompiledExpr = Callable[[Data], Any]
+CompiledRule = Callable[[Data], bool]
+
+_MISSING = object()
+
+
+def _constant(value: Any) -> CompiledExpr:
+    return lambda data: value
+
+
+def _compile_regex(pattern: str, where: str) -> re.Pattern:
+    try:
+        return re.compile(pattern)
+    except re.error as exc:
+        raise ValueError(f"{where} 的正则表达式 '{pattern}' 非法: {exc}") from exc
+
+
+# ==================== JSONLogic ====================
+
+def _compile_var(args: List[Any]) -> CompiledExpr:
+    path = args[0] if args else None
+    default = args[1] if len(args) > 1 else None
+
+    if path is None:
+        return lambda data: data
+
+    if not isinstance(path, str):
+        return lambda data: data.get(path, default)
+
+    keys = tuple(path.split("."))
+
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: data.get(key, default)
+
+    def get_var(data: Data) -> Any:
+        cur = data
+        for key in keys:
+            if isinstance(cur, dict):
+                cur = cur.get(key, _MISSING)
+                if cur is _MISSING:
+                    return default
+            else:
+                return default
+        return cur
+
+    return get_var
+
+
+def _compile_arg(val: Any) -> CompiledExpr:
+    """编译运算符参数（对应原解释器的 resolve）"""
+    if isinstance(val, dict):
+        return _compile_expr(val)
+    if isinstance(val, list):
+        items = [_compile_arg(v) for v in val]
+        return lambda data: [item(data) for item in items]
+    return _constant(val)
+
+
+def _require_args(op: str, args: List[Any], count: int) -> None:
+    if len(args) < count:
+        raise ValueError(f"JSONLogic 运算符 '{op}' 至少需要 {count} 个参数，实际为 {len(args)}: {args}")
+
+
+_BINARY_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "eq": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "neq": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    "gt": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "gte": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "lt": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _compile_in(args: List[Any]) -> CompiledExpr:
+    left, right = _compile_arg(args[0]), _compile_arg(args[1])
+
+    def op_in(data: Data) -> bool:
+        a, b = left(data), right(data)
+        try:
+            return a in b
+        except Exception as e:
+            logger.warning(f"{type(e).__name__}: {e}")
+            return False
+
+    return op_in
+
+
+def _compile_if(args: List[Any]) -> CompiledExpr:
+    """JSONLogic if: [c1, v1, c2, v2, ..., else]，依次判断条件，参数为奇数个时最后一个为默认值"""
+    compiled = [_compile_arg(arg) for arg in args]
+    pairs = list(zip(compiled[0::2], compiled[1::2]))
+    default = compiled[-1] if len(compiled) % 2 == 1 else None
+
+    def op_if(data: Data) -> Any:
+        for cond, val in pairs:
+            if bool(cond(data)):
+                return val(data)
+        return default(data) if default is not None else None
+
+    return op_if
+
+
+def _compile_regex_op(args: List[Any]) -> CompiledExpr:
+    pattern_arg, target = args[0], _compile_arg(args[1])
+
+    if isinstance(pattern_arg, str):
+        compiled = _compile_regex(pattern_arg, "JSONLogic regex")
+        return lambda data: isinstance(t := target(data), str) and compiled.search(t) is not None
+
+    if not isinstance(pattern_arg, (dict, list)):
+        # 常量但不是字符串，永远不匹配
+        return lambda data: False
+
+    pattern = _compile_arg(pattern_arg)
+
+    def op_regex(data: Data) -> bool:
+        p, t = pattern(data), target(data)
+        return isinstance(p, str) and isinstance(t, str) and re.search(p, t) is not None
+
+    return op_regex
+
+
+def _compile_expr(obj: Any) -> CompiledExpr:
+    """编译单个表达式（对应原解释器的 eval_expr）"""
+    if not isinstance(obj, dict) or len(obj) != 1:
+        return _constant(obj)
+
+    op, args = next(iter(obj.items()))
+    if not isinstance(args, list):
+        args = [args]
+
+    if op == "var":
+        return _compile_var(args)
+
+    binary = _BINARY_OPS.get(op)
+    if binary is not None:
+        _require_args(op, args, 2)
+        left, right = _compile_arg(args[0]), _compile_arg(args[1])
+        return lambda data: binary(left(data), right(data))
+
+    if op in {"!", "not"}:
+        _require_args(op, args, 1)
+        operand = _compile_arg(args[0])
+        return lambda data: not bool(operand(data))
+
+    if op == "and":
+        operands = [_compile_arg(arg) for arg in args]
+        return lambda data: all(bool(operand(data)) for operand in operands)
+
+    if op == "or":
+        operands = [_compile_arg(arg) for arg in args]
+        return lambda data: any(bool(operand(data)) for operand in operands)
+
+    if op == "in":
+        _require_args(op, args, 2)
+        return _compile_in(args)
+
+    if op == "if":
+        _require_args(op, args, 1)
+        return _compile_if(args)
+
+    if op == "regex":
+        _require_args(op, args, 2)
+        return _compile_regex_op(args)
+
+    raise ValueError(f"JSONLogic 未支持的运算符 '{op}'")
+
+
+def compile_json_logic(expr: Any) -> CompiledExpr:
+    """将 JSONLogic 表达式编译为 `fn(data) -> Any`
+
+    Raises:
+        ValueError: 存在不支持的运算符、参数个数不足或正则非法
+    """
+    return _compile_expr(expr)
+
+
+# ==================== Rules ====================
+
+RULE_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda l, r: l == r,
+    "eq": lambda l, r: l == r,
+    "!=": lambda l, r: l != r,
+    "neq": lambda l, r: l != r,
+    ">": lambda l, r: l is not None and r is not None and l > r,
+    "gt": lambda l, r: l is not None and r is not None and l > r,
+    ">=": lambda l, r: l is not None and r is not None and l >= r,
+    "gte": lambda l, r: l is not None and r is not None and l >= r,
+    "<": lambda l, r: l is not None and r is not None and l < r,
+    "lt": lambda l, r: l is not None and r is not None and l < r,
+    "<=": lambda l, r: l is not None and r is not None and l <= r,
+    "lte": lambda l, r: l is not None and r is not None and l <= r,
+    "in": lambda l, r: r is not None and l in r,
+    "not_in": lambda l, r: r is None or l not in r,
+    "contains": lambda l, r: l is not None and r in l,
+    "not_contains": lambda l, r: l is None or r not in l,
+    "startswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.startswith(r),
+    "endswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.endswith(r),
+    "between": lambda l, r: (
+            l is not None
+            and isinstance(r, (list, tuple))
+            and len(r) == 2
+            and r[0] <= l <= r[1]
+    ),
+    "is_true": lambda l, _: bool(l) is True,
+    "is_false": lambda l, _: bool(l) is False,
+    "exists": lambda l, _: l is not None,
+    "not_exists": lambda l, _: l is None,
+}
+
+_REGEX_RULE_OPERATORS = {"regex", "regex_not"}
+
+
+def _compile_rule(rule: ConditionRule) -> CompiledRule:
+    field = rule.field
+    value = rule.value
+    op = (rule.op or "").lower()
+
+    if op in _REGEX_RULE_OPERATORS:
+        if not isinstance(value, str):
+            return lambda output: False
+        pattern = _compile_regex(value, f"规则 field={field}, op={rule.op}")
+        matched = op == "regex"
+        return lambda output: isinstance(l := output.get(field), str) and (pattern.search(l) is not None) is matched
+
+    handler = RULE_OPERATORS.get(op)
+    if handler is None:
+        raise ValueError(f"不支持的比较运算符 '{rule.op}'")
+
+    def eval_rule(output: Data) -> bool:
+        left = output.get(field)
+        try:
+            return handler(left, value)
+        except Exception as exc:
+            logger.warning(
+                f"规则计算失败：field={field}, op={rule.op}, value={value}, left={left}",
+                exc_info=exc
+            )
+            return False
+
+    return eval_rule
+
+
+def compile_rules(rules: Optional[Sequence[ConditionRule]], logic: str = "and") -> CompiledRule:
+    """将 rules 列表编译为 `fn(output) -> bool`
+
+    Args:
+        rules: 规则列表，为空时始终返回 True
+        logic: 组合逻辑，'and' 或 'or'
+
+    Raises:
+        ValueError: 存在不支持的运算符或正则非法
+    """
+    compiled = [_compile_rule(rule) for rule in rules or []]
+    if not compiled:
+        return lambda output: True
+
+    if len(compiled) == 1:
+        return compiled[0]
+
+    if logic == "or":
+        return lambda output: any(rule(output) for rule in compiled)
+    return lambda output: all(rule(output) for rule in compiled)
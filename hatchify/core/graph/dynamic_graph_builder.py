@@ -1,10 +1,7 @@
-import re
-from typing import Optional, Dict, Any, cast, List, Callable
+from typing import Optional, Dict, cast, List
 
 from loguru import logger
-from strands.agent import AgentResult
 from strands.hooks import HookProvider
-from strands.multiagent.graph import GraphState
 from strands.session import SessionManager
 from strands.tools.decorator import DecoratedFunctionTool
 from strands.types.tools import AgentTool
@@ -12,13 +9,15 @@ from strands.types.tools import AgentTool
 from hatchify.common.domain.entity.agent_card import AgentCard
 from hatchify.common.domain.entity.agent_node_spec import AgentNode
 from hatchify.common.domain.entity.function_node_spec import FunctionNode
-from hatchify.common.domain.entity.graph_spec import GraphSpec, ConditionRule, Edge
+from hatchify.common.domain.entity.graph_spec import GraphSpec
 from hatchify.common.domain.enums.agent_category import AgentCategory
-from hatchify.core.factory.agent_factory import create_agent_by_agent_card
+from hatchify.core.factory.llm_factory import create_llm_by_agent_card
 from hatchify.core.factory.tool_factory import ToolRouter
-from hatchify.core.graph.graph_wrapper import GraphBuilderAdapter
-from hatchify.core.graph.nodes.function_node import FunctionNodeWrapper
-
+from hatchify.core.graph.graph_template import GraphTemplate, AgentBlueprint, FunctionBlueprint, EdgeBlueprint
+from hatchify.core.graph.graph_wrapper import GraphBuilderAdapter, GraphWrapper
+from hatchify.core.graph.routing import NodeRoutingEvaluator
+from hatchify.core.manager.agent_pool_manager import agent_pool
+from hatchify.core.utils.schema_utils import compute_spec_hash
 
 class DynamicGraphBuilder:
     """根据 GraphSpec 动态构建 Strands Graph
@@ -55,6 +54,7 @@ class DynamicGraphBuilder:
             function_router: Function 工具路由器（来自 function_manager，只接受 DecoratedFunctionTool）
             hooks: 可选的 Hook Providers 列表
             execution_timeout: Graph 执行超时时间（秒），默认 600 秒（10 分钟）
+            session_manager: 可选的 Graph SessionManager
         """
         self.tool_router = tool_router
         self.function_router = function_router
@@ -62,9 +62,11 @@ class DynamicGraphBuilder:
         self.execution_timeout = execution_timeout
         self.session_manager = session_manager
 
-    def build_graph(self, graph_spec: GraphSpec) -> Any:
+    def build_graph(self, graph_spec: GraphSpec) -> GraphWrapper:
         """根据 GraphSpec 构建可执行的 Strands Graph
 
+        等价于 compile_template + instantiate，需要复用编译结果时请直接使用这两个方法。
+
         Args:
             graph_spec: Graph 规范对象（包含 agents, functions, edges 等）
 
@@ -74,97 +76,181 @@ class DynamicGraphBuilder:
         Raises:
             ValueError: 节点名称重复、边引用的节点不存在、工具不存在等错误
         """
-        self._validate_unique_node_names(graph_spec)
+        return self.instantiate(self.compile_template(graph_spec))
 
-        builder = GraphBuilderAdapter()
+    def compile_template(self, graph_spec: GraphSpec, spec_hash: Optional[str] = None) -> GraphTemplate:
+        """将 GraphSpec 编译为不可变的 GraphTemplate
 
-        created_nodes: Dict[str, Any] = {}
+        完成所有与单次执行无关的工作：校验、解析 AgentCard、创建 LLM Model、
+        生成结构化输出模型和边条件函数。
 
-        # 步骤 1: 添加所有 Agent 节点
-        for agent_node in graph_spec.agents:
-            agent = self._create_agent_node(agent_node)
-            builder.add_node(agent, agent_node.name)
-            created_nodes[agent_node.name] = agent
+        Args:
+            graph_spec: Graph 规范对象
+            spec_hash: 可选的 spec 内容哈希，未提供时自动计算
+
+        Returns:
+            编译好的 GraphTemplate
+
+        Raises:
+            ValueError: 节点名称重复、边引用的节点不存在、工具不存在等错误
+        """
+        self._validate_unique_node_names(graph_spec)
+
+        # 步骤 1: 编译所有 Agent 节点
+        agents = tuple(self._create_agent_blueprint(agent_node) for agent_node in graph_spec.agents)
 
-        # 步骤 2: 添加所有 Function 节点
-        for function_node_spec in graph_spec.functions:
-            function_node = self._create_function_node(function_node_spec)
-            builder.add_node(function_node, function_node_spec.name)
-            created_nodes[function_node_spec.name] = function_node
+        # 步骤 2: 编译所有 Function 节点
+        functions = tuple(
+            self._create_function_blueprint(function_node) for function_node in graph_spec.functions
+        )
+
+        node_names = [blueprint.name for blueprint in agents] + [blueprint.name for blueprint in functions]
+        created_nodes = set(node_names)
 
+        # 步骤 3: 编译所有边，同一源节点的条件出边共享一个路由判定器
+        edges: List[EdgeBlueprint] = []
+        evaluators: Dict[str, NodeRoutingEvaluator] = {}
         for edge in graph_spec.edges:
             if edge.from_node not in created_nodes:
                 raise ValueError(
                     f"边的起始节点 '{edge.from_node}' 不存在于 Graph 中。"
-                    f"可用节点: {list(created_nodes.keys())}"
+                    f"可用节点: {node_names}"
                 )
             if edge.to_node not in created_nodes:
                 raise ValueError(
                     f"边的目标节点 '{edge.to_node}' 不存在于 Graph 中。"
-                    f"可用节点: {list(created_nodes.keys())}"
+                    f"可用节点: {node_names}"
                 )
 
-            from_agent_spec = self._get_agent_spec_by_name(graph_spec, edge.from_node)
-
-            condition = None
-
-            # 优先使用自定义规则/JSONLogic 条件
-            if edge.json_logic:
-                condition = self._create_json_logic_condition(edge, from_agent_spec)
-            elif edge.rules:
-                condition = self._create_rules_condition(edge, from_agent_spec)
-            elif from_agent_spec and from_agent_spec.category == AgentCategory.ROUTER:
-                condition = self._create_router_condition(edge.from_node, edge.to_node)
-            elif from_agent_spec and from_agent_spec.category == AgentCategory.ORCHESTRATOR:
-                condition = self._create_orchestrator_condition(edge.from_node, edge.to_node)
+            evaluator = evaluators.get(edge.from_node)
+            if evaluator is None:
+                evaluator = NodeRoutingEvaluator(
+                    edge.from_node, self._get_agent_spec_by_name(graph_spec, edge.from_node)
+                )
+                evaluators[edge.from_node] = evaluator
 
-            if condition:
-                builder.add_edge(edge.from_node, edge.to_node, condition=condition)
-            else:
-                builder.add_edge(edge.from_node, edge.to_node)
+            condition = evaluator.add_edge(edge)
+            edges.append(EdgeBlueprint(from_node=edge.from_node, to_node=edge.to_node, condition=condition))
 
         if graph_spec.entry_point not in created_nodes:
             raise ValueError(
                 f"入口点 '{graph_spec.entry_point}' 不存在于 Graph 中。"
-                f"可用节点: {list(created_nodes.keys())}"
+                f"可用节点: {node_names}"
             )
 
-        builder.set_entry_point(graph_spec.entry_point)
+        return GraphTemplate(
+            spec_hash=spec_hash or compute_spec_hash(graph_spec),
+            graph_spec=graph_spec,
+            agents=agents,
+            functions=functions,
+            edges=tuple(edges),
+            entry_point=graph_spec.entry_point,
+        )
+
+    def instantiate(self, template: GraphTemplate) -> GraphWrapper:
+        """基于 GraphTemplate 创建一次执行专用的 Graph 实例
+
+        Agent 从预热池中借出（没有空闲 Agent 时新建），FunctionNodeWrapper 每次新建；
+        边条件、LLM Model 和结构化输出模型直接复用模板中的对象。
+        执行结束后需要调用 graph.release() 归还借出的 Agent。
+
+        Args:
+            template: compile_template 生成的模板
+
+        Returns:
+            构建好的 Strands Graph 实例
+        """
+        builder = GraphBuilderAdapter()
+
+        # Agent 从预热池借出，执行结束后通过 graph.release() 归还
+        leased_agents = [
+            (agent_blueprint.name, agent_pool.checkout(template.spec_hash, agent_blueprint))
+            for agent_blueprint in template.agents
+        ]
+
+        def release_agents():
+            agent_pool.release(template.spec_hash, leased_agents)
+
+        try:
+            function_nodes = [function_blueprint.create_node() for function_blueprint in template.functions]
+
+            for node_name, agent in leased_agents:
+                builder.add_node(agent, node_name)
+
+            for function_blueprint, function_node in zip(template.functions, function_nodes):
+                builder.add_node(function_node, function_blueprint.name)
+
+            for edge_blueprint in template.edges:
+                if edge_blueprint.condition:
+                    builder.add_edge(
+                        edge_blueprint.from_node, edge_blueprint.to_node, condition=edge_blueprint.condition
+                    )
+                else:
+                    builder.add_edge(edge_blueprint.from_node, edge_blueprint.to_node)
+
+            builder.set_entry_point(template.entry_point)
+
+            if self.hooks:
+                builder.set_hook_providers(self.hooks)
 
-        if self.hooks:
-            builder.set_hook_providers(self.hooks)
+            if self.execution_timeout:
+                builder.set_execution_timeout(self.execution_timeout)
 
-        if self.execution_timeout:
-            builder.set_execution_timeout(self.execution_timeout)
+            if self.session_manager:
+                builder.set_session_manager(self.session_manager)
 
-        if self.session_manager:
-            builder.set_session_manager(self.session_manager)
+            graph = builder.build()
+        except Exception:
+            release_agents()
+            raise
 
-        graph = builder.build()
+        graph.add_release_callback(release_agents)
         return graph
 
-    def _create_agent_node(self, agent_node: AgentNode) -> Any:
-        """从 AgentNode 创建 Agent 实例
+    def _create_agent_blueprint(self, agent_node: AgentNode) -> AgentBlueprint:
+        """从 AgentNode 创建 Agent 构建蓝图
 
         Args:
             agent_node: Agent 节点规范
 
         Returns:
-            创建好的 Agent 实例
+            AgentBlueprint
 
         Raises:
-            KeyError: 工具不存在
+            ValueError: 工具不存在
         """
-        # 步骤 1: 创建 AgentCard
+        # 步骤 1: 验证工具是否存在
+        for tool_name in agent_node.tools:
+            try:
+                self.tool_router.get_tool(tool_name)
+            except KeyError:
+                available_tools = list(self.tool_router.get_all_tools().keys())
+                raise ValueError(
+                    f"Agent '{agent_node.name}' 引用的工具 '{tool_name}' 不存在。"
+                    f"可用工具: {available_tools}"
+                )
+
+        # 步骤 2: 如果是 Router 或 Orchestrator，注入完成指令到 system_prompt
+        instruction = agent_node.instruction
+        if agent_node.category in [AgentCategory.ROUTER, AgentCategory.ORCHESTRATOR]:
+            completion_instruction = (
+                "\n\nIMPORTANT: When you determine that the workflow is complete "
+                "and all necessary agents have been executed, "
+                'output {"next_node": "COMPLETE"} to signal completion. '
+                'Otherwise, continue routing to the appropriate next agent.'
+            )
+            instruction = instruction + completion_instruction
+
+        # 步骤 3: 创建 AgentCard
         agent_card = AgentCard(
             name=agent_node.name,
             model=agent_node.model,
-            instruction=agent_node.instruction,
+            instruction=instruction,
             description=f"Agent for {agent_node.name}",
             tools=agent_node.tools
         )
 
-        # 步骤 2: 获取 structured_output_model
+        # 步骤 4: 获取 structured_output_model
         # 这是一个 @computed_field，会自动将 JSON Schema 转换为 BaseModel
         structured_output_model = agent_node.structured_output_model
 
@@ -174,55 +260,29 @@ class DynamicGraphBuilder:
                 f"{structured_output_model.__name__}"
             )
 
-        # 步骤 3: 验证工具是否存在
-        for tool_name in agent_node.tools:
-            try:
-                self.tool_router.get_tool(tool_name)
-            except KeyError:
-                available_tools = list(self.tool_router.get_all_tools().keys())
-                raise ValueError(
-                    f"Agent '{agent_node.name}' 引用的工具 '{tool_name}' 不存在。"
-                    f"可用工具: {available_tools}"
-                )
-
-        # 步骤 4: 创建 Agent
+        # 步骤 5: 创建 LLM Model（Model 只保存配置，可在多个 Agent 实例间共享）
         # 注意：不再需要 FilterReasoningContentHook，因为：
         # - GeminiModel 原生支持 reasoningContent
         # - OpenAIModel 和其他模型不会产生 reasoningContent
-        agent = create_agent_by_agent_card(
+        return AgentBlueprint(
+            name=agent_node.name,
             agent_card=agent_card,
+            model=create_llm_by_agent_card(agent_card),
             structured_output_model=structured_output_model,
-            hooks=None
         )
 
-        # 步骤 5: 如果是 Router 或 Orchestrator，注入完成指令
-        if agent_node.category in [AgentCategory.ROUTER, AgentCategory.ORCHESTRATOR]:
-            completion_instruction = (
-                "\n\nIMPORTANT: When you determine that the workflow is complete "
-                "and all necessary agents have been executed, "
-                'output {"next_node": "COMPLETE"} to signal completion. '
-                'Otherwise, continue routing to the appropriate next agent.'
-            )
-
-            # 注入到 Agent 的 system_prompt
-            original_prompt = agent.system_prompt
-            agent.system_prompt = original_prompt + completion_instruction
-
-        return agent
-
-    def _create_function_node(self, function_node_spec: FunctionNode) -> FunctionNodeWrapper:
-        """从 FunctionNodeSpec 创建 FunctionNodeWrapper 实例
+    def _create_function_blueprint(self, function_node_spec: FunctionNode) -> FunctionBlueprint:
+        """从 FunctionNodeSpec 创建 Function 构建蓝图
 
         Args:
             function_node_spec: Function 节点规范
 
         Returns:
-            创建好的 FunctionNodeWrapper 实例
+            FunctionBlueprint
 
         Raises:
-            KeyError: Function 类型对应的工具不存在
+            ValueError: Function 类型对应的工具不存在
         """
-        # 步骤 1: 从 function_router 获取 tool
         try:
             tool = self.function_router.get_tool(function_node_spec.function_ref)
         except KeyError:
@@ -232,19 +292,14 @@ class DynamicGraphBuilder:
                 f"可用 Function: {available_functions}"
             )
 
-        # 步骤 2: 创建 FunctionNodeWrapper
-        # 注意：不要在节点级别传递 hooks，hooks 应该在 GraphBuilder 级别设置
-        function_node = FunctionNodeWrapper(
-            tool=cast(DecoratedFunctionTool, tool),
-            hooks=None,
-            _id=function_node_spec.name  # 使用 function_node_spec.name 作为节点 ID
-        )
-
         logger.debug(
             f"Function '{function_node_spec.name}' 使用工具: {function_node_spec.function_ref}"
         )
 
-        return function_node
+        return FunctionBlueprint(
+            name=function_node_spec.name,
+            tool=cast(DecoratedFunctionTool, tool),
+        )
 
     @staticmethod
     def _validate_unique_node_names(graph_spec: GraphSpec) -> None:
@@ -299,374 +354,3 @@ class DynamicGraphBuilder:
             if agent_node.name == node_name:
                 return agent_node
         return None
-
-    @staticmethod
-    def _apply_json_logic(expr: Any, data: Dict[str, Any]) -> Any:
-        """最小实现的 JSONLogic 解析，覆盖常用运算符"""
-
-        def get_var(path: Any, default: Any = None) -> Any:
-            if path is None:
-                return data
-            if not isinstance(path, str):
-                return data.get(path, default)
-            cur = data
-            for key in path.split("."):
-                if isinstance(cur, dict) and key in cur:
-                    cur = cur[key]
-                else:
-                    return default
-            return cur
-
-        def resolve(val: Any) -> Any:
-            if isinstance(val, dict):
-                return eval_expr(val)
-            if isinstance(val, list):
-                return [resolve(v) for v in val]
-            return val
-
-        def eval_expr(obj: Any) -> Any:
-            if not isinstance(obj, dict) or len(obj) != 1:
-                return obj
-            op, args = next(iter(obj.items()))
-            if not isinstance(args, list):
-                args = [args]
-
-            if op in {"var"}:
-                path = args[0] if args else None
-                default = args[1] if len(args) > 1 else None
-                return get_var(path, default)
-
-            if op in {"==", "eq"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a == b
-            if op in {"!=", "neq"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a != b
-            if op in {">", "gt"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a > b
-            if op in {">=", "gte"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a >= b
-            if op in {"<", "lt"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a < b
-            if op in {"<=", "lte"}:
-                a, b = resolve(args[0]), resolve(args[1])
-                return a <= b
-            if op in {"!", "not"}:
-                return not bool(resolve(args[0]))
-            if op == "and":
-                return all(bool(resolve(arg)) for arg in args)
-            if op == "or":
-                return any(bool(resolve(arg)) for arg in args)
-            if op == "in":
-                a, b = resolve(args[0]), resolve(args[1])
-                try:
-                    return a in b
-                except Exception as e:
-                    logger.warning(f"{type(e).__name__}: {e}")
-                    return False
-            if op == "if":
-                # args: [cond1, val1, cond2, val2, ..., else]
-                pairs = list(zip(args[0::2], args[1::2]))
-                for cond, val in pairs[:-1]:
-                    if bool(resolve(cond)):
-                        return resolve(val)
-                if len(args) % 2 == 1:
-                    # last default
-                    return resolve(args[-1])
-                # even number: evaluate last pair
-                cond, val = pairs[-1]
-                return resolve(val) if bool(resolve(cond)) else None
-            if op == "regex":
-                pattern = resolve(args[0])
-                target = resolve(args[1])
-                return (
-                        isinstance(pattern, str)
-                        and isinstance(target, str)
-                        and re.search(pattern, target) is not None
-                )
-
-            # 未支持的运算符，直接返回 False
-            logger.warning(f"JSONLogic 未支持的运算符 '{op}'")
-            return False
-
-        return eval_expr(expr)
-
-    @staticmethod
-    def _create_json_logic_condition(edge: Edge, from_agent_spec: Optional[AgentNode]) -> Callable[[GraphState], bool]:
-        """使用 JSONLogic 表达式创建条件函数"""
-
-        def condition(state: GraphState) -> bool:
-            node_result = state.results.get(edge.from_node)
-            if not node_result:
-                return False
-
-            agent_result = node_result.result
-            if not isinstance(agent_result, AgentResult):
-                return False
-
-            structured_output = agent_result.structured_output
-            if not structured_output:
-                logger.warning(
-                    f"节点 '{edge.from_node}' 没有 structured_output，无法应用 JSONLogic 路由"
-                )
-                return False
-
-            output = structured_output.model_dump()
-
-            # Orchestrator COMPLETE 信号直接终止
-            if (
-                    from_agent_spec
-                    and from_agent_spec.category == AgentCategory.ORCHESTRATOR
-                    and isinstance(output.get("next_node"), str)
-                    and output.get("next_node").upper() == "COMPLETE"
-            ):
-                logger.info(
-                    f"Orchestrator '{edge.from_node}' 发出 COMPLETE 信号，跳过边 {edge.from_node} -> {edge.to_node}"
-                )
-                return False
-
-            try:
-                decision = bool(DynamicGraphBuilder._apply_json_logic(edge.json_logic, output))
-                if decision:
-                    logger.debug(
-                        f"JSONLogic 命中，from='{edge.from_node}' -> to='{edge.to_node}', expr={edge.json_logic}"
-                    )
-                return decision
-            except Exception as exc:
-                logger.warning(
-                    f"JSONLogic 计算失败: expr={edge.json_logic}, output={output}",
-                    exc_info=exc
-                )
-                return False
-
-        return condition
-
-    @staticmethod
-    def _create_rules_condition(edge: Edge, from_agent_spec: Optional[AgentNode]) -> Callable[[GraphState], bool]:
-        """根据 Edge.rules 构造条件函数，支持 and/or 组合"""
-        logic = (edge.logic or "and").lower()
-        if logic not in {"and", "or"}:
-            logger.warning(f"未知逻辑运算符 '{edge.logic}'，使用 'and' 代替")
-            logic = "and"
-
-        def eval_rule(rule: ConditionRule, output: Dict[str, Any]) -> bool:
-            left = output.get(rule.field)
-            right = rule.value
-            op = (rule.op or "").lower()
-
-            handlers: Dict[str, Callable[[Any, Any], bool]] = {
-                "==": lambda l, r: l == r,
-                "eq": lambda l, r: l == r,
-                "!=": lambda l, r: l != r,
-                "neq": lambda l, r: l != r,
-                ">": lambda l, r: l is not None and r is not None and l > r,
-                "gt": lambda l, r: l is not None and r is not None and l > r,
-                ">=": lambda l, r: l is not None and r is not None and l >= r,
-                "gte": lambda l, r: l is not None and r is not None and l >= r,
-                "<": lambda l, r: l is not None and r is not None and l < r,
-                "lt": lambda l, r: l is not None and r is not None and l < r,
-                "<=": lambda l, r: l is not None and r is not None and l <= r,
-                "lte": lambda l, r: l is not None and r is not None and l <= r,
-                "in": lambda l, r: r is not None and l in r,
-                "not_in": lambda l, r: r is None or l not in r,
-                "contains": lambda l, r: l is not None and r in l,
-                "not_contains": lambda l, r: l is None or r not in l,
-                "startswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.startswith(r),
-                "endswith": lambda l, r: isinstance(l, str) and isinstance(r, str) and l.endswith(r),
-                "regex": lambda l, r: isinstance(l, str) and isinstance(r, str) and re.search(r, l) is not None,
-                "regex_not": lambda l, r: isinstance(l, str) and isinstance(r, str) and re.search(r, l) is None,
-                "between": lambda l, r: (
-                        l is not None
-                        and isinstance(r, (list, tuple))
-                        and len(r) == 2
-                        and r[0] <= l <= r[1]
-                ),
-                "is_true": lambda l, _: bool(l) is True,
-                "is_false": lambda l, _: bool(l) is False,
-                "exists": lambda l, _: l is not None,
-                "not_exists": lambda l, _: l is None,
-            }
-
-            try:
-                handler = handlers.get(op)
-                if not handler:
-                    logger.warning(f"不支持的比较运算符 '{rule.op}'")
-                    return False
-                return handler(left, right)
-            except Exception as exc:
-                logger.warning(
-                    f"规则计算失败：field={rule.field}, op={rule.op}, value={rule.value}, left={left}",
-                    exc_info=exc
-                )
-                return False
-
-        def condition(state: GraphState) -> bool:
-            node_result = state.results.get(edge.from_node)
-            if not node_result:
-                return False
-
-            agent_result = node_result.result
-            if not isinstance(agent_result, AgentResult):
-                return False
-
-            structured_output = agent_result.structured_output
-            if not structured_output:
-                logger.warning(
-                    f"节点 '{edge.from_node}' 没有 structured_output，无法应用规则路由"
-                )
-                return False
-
-            output = structured_output.model_dump()
-
-            # Orchestrator COMPLETE 信号直接终止
-            if (
-                    from_agent_spec
-                    and from_agent_spec.category == AgentCategory.ORCHESTRATOR
-                    and isinstance(output.get("next_node"), str)
-                    and output.get("next_node").upper() == "COMPLETE"
-            ):
-                logger.info(
-                    f"Orchestrator '{edge.from_node}' 发出 COMPLETE 信号，跳过边 {edge.from_node} -> {edge.to_node}"
-                )
-                return False
-
-            rules = edge.rules or []
-            if not rules:
-                return True
-
-            results = [eval_rule(rule, output) for rule in rules]
-            decision = any(results) if logic == "or" else all(results)
-
-            if decision:
-                logger.debug(
-                    f"规则命中，from='{edge.from_node}' -> to='{edge.to_node}', logic={logic}, rules={rules}"
-                )
-
-            return decision
-
-        return condition
-
-    @staticmethod
-    def _create_router_condition(router_name: str, target_node: str) -> Callable[[GraphState], bool]:
-        """为 Router 创建条件函数
-
-        条件函数读取 Router Agent 的 structured_output["next_node"]，
-        判断是否等于目标节点名称。
-
-        Args:
-            router_name: Router 节点名称
-            target_node: 目标节点名称
-
-        Returns:
-            条件函数，接受 GraphState，返回 bool
-        """
-
-        def condition(state: GraphState) -> bool:
-            # 1. 获取 Router 的执行结果
-            router_result = state.results.get(router_name)
-            if not router_result:
-                return False
-
-            # 2. 提取 AgentResult
-            agent_result = router_result.result
-            if not isinstance(agent_result, AgentResult):
-                return False
-
-            # 3. 获取 structured_output
-            structured_output = agent_result.structured_output
-            if not structured_output:
-                logger.warning(
-                    f"Router '{router_name}' 没有 structured_output，无法路由"
-                )
-                return False
-
-            # 4. 转换为 dict（可能是 Pydantic model）
-            output = structured_output.model_dump()
-
-            # 5. 读取 next_node 字段
-            next_node = output.get("next_node")
-
-            if not next_node:
-                logger.warning(
-                    f"Router '{router_name}' 的 structured_output 缺少 'next_node' 字段"
-                )
-                return False
-
-            # 6. 判断是否匹配目标节点
-            is_match = next_node == target_node
-
-            if is_match:
-                logger.debug(
-                    f"Router '{router_name}' 路由到 '{target_node}' (next_node={next_node})"
-                )
-
-            return is_match
-
-        return condition
-
-    @staticmethod
-    def _create_orchestrator_condition(orch_name: str, target_node: str) -> Callable[[GraphState], bool]:
-        """为 Orchestrator 创建条件函数
-
-        与 Router 类似，但额外处理 COMPLETE 信号。
-
-        Args:
-            orch_name: Orchestrator 节点名称
-            target_node: 目标节点名称
-
-        Returns:
-            条件函数，接受 GraphState，返回 bool
-        """
-
-        def condition(state: GraphState) -> bool:
-            # 1. 获取 Orchestrator 的执行结果
-            orch_result = state.results.get(orch_name)
-            if not orch_result:
-                return False
-
-            # 2. 提取 AgentResult
-            agent_result = orch_result.result
-            if not isinstance(agent_result, AgentResult):
-                return False
-
-            # 3. 获取 structured_output
-            structured_output = agent_result.structured_output
-            if not structured_output:
-                logger.warning(
-                    f"Orchestrator '{orch_name}' 没有 structured_output，无法路由"
-                )
-                return False
-
-            # 4. 转换为 dict（可能是 Pydantic model）
-            output = structured_output.model_dump()
-
-            # 5. 读取 next_node 字段
-            next_node = output.get("next_node")
-
-            if not next_node:
-                logger.warning(
-                    f"Orchestrator '{orch_name}' 的 structured_output 缺少 'next_node' 字段"
-                )
-                return False
-
-            # 6. 处理 COMPLETE 信号
-            if next_node.upper() == "COMPLETE":
-                logger.info(
-                    f"Orchestrator '{orch_name}' 发出 COMPLETE 信号，工作流即将终止"
-                )
-                return False  # 所有条件边都返回 False，Graph 自然终止
-
-            # 7. 判断是否匹配目标节点
-            is_match = next_node == target_node
-
-            if is_match:
-                logger.debug(
-                    f"Orchestrator '{orch_name}' 路由到 '{target_node}' (next_node={next_node})"
-                )
-
-            return is_match
-
-        return condition
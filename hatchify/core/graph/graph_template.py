@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import Optional, Type, Tuple, Callable
+
+from pydantic import BaseModel
+from strands import Agent
+from strands.models import Model
+from strands.multiagent.graph import GraphState
+from strands.tools.decorator import DecoratedFunctionTool
+
+from hatchify.common.domain.entity.agent_card import AgentCard
+from hatchify.common.domain.entity.graph_spec import GraphSpec
+from hatchify.core.factory.agent_factory import create_agent_by_agent_card
+from hatchify.core.graph.nodes.function_node import FunctionNodeWrapper
+
+
+@dataclass(frozen=True)
+class AgentBlueprint:
+    """Agent 节点的不可变构建蓝图
+
+    保存编译期已解析好的 AgentCard（含最终 system prompt）、结构化输出模型和 LLM Model，
+    每次执行只需基于蓝图创建一个新的 Agent 实例（Agent 自身带有 messages/state，不能跨执行共享）。
+    """
+    name: str
+    agent_card: AgentCard
+    model: Model
+    structured_output_model: Optional[Type[BaseModel]] = None
+
+    def create_agent(self) -> Agent:
+        return create_agent_by_agent_card(
+            agent_card=self.agent_card,
+            structured_output_model=self.structured_output_model,
+            hooks=None,
+            model=self.model,
+        )
+
+
+@dataclass(frozen=True)
+class FunctionBlueprint:
+    """Function 节点的不可变构建蓝图"""
+    name: str
+    tool: DecoratedFunctionTool
+
+    def create_node(self) -> FunctionNodeWrapper:
+        # 注意：不要在节点级别传递 hooks，hooks 应该在 GraphBuilder 级别设置
+        return FunctionNodeWrapper(
+            tool=self.tool,
+            hooks=None,
+            _id=self.name  # 使用 function_node_spec.name 作为节点 ID
+        )
+
+
+@dataclass(frozen=True)
+class EdgeBlueprint:
+    """边的构建蓝图，condition 只依赖 GraphState，可以在多次执行间复用"""
+    from_node: str
+    to_node: str
+    condition: Optional[Callable[[GraphState], bool]] = None
+
+
+@dataclass(frozen=True)
+class GraphTemplate:
+    """编译后的 Graph 模板
+
+    由 DynamicGraphBuilder.compile_template 生成，包含校验后的节点/边蓝图，
+    可被缓存并通过 DynamicGraphBuilder.instantiate 反复实例化为独立的 GraphWrapper。
+    """
+    spec_hash: str
+    graph_spec: GraphSpec
+    agents: Tuple[AgentBlueprint, ...]
+    functions: Tuple[FunctionBlueprint, ...]
+    edges: Tuple[EdgeBlueprint, ...]
+    entry_point: str
@@ -1,12 +1,91 @@
-from typing import List
+from typing import Any, Callable, Dict, List
 
 from loguru import logger
 from strands.agent import AgentResult
-from strands.multiagent.graph import Graph, GraphNode, GraphBuilder
+from strands.multiagent.base import Status
+from strands.multiagent.graph import Graph, GraphNode, GraphBuilder, GraphEdge
 from strands.types.content import ContentBlock
 
 
 class GraphWrapper(Graph):
+    """在 Strands Graph 基础上维护按 node_id 索引的邻接表
+
+    Strands 默认每次依赖解析都全量扫描 edges/nodes，这里预先构建 incoming/outgoing
+    邻接表，使节点输入组装和就绪判断的开销与节点入度/出度成正比。
+    """
+
+    def __init__(self, nodes: Dict[str, GraphNode], edges: set[GraphEdge], *args: Any, **kwargs: Any) -> None:
+        # 需要在 super().__init__ 之前构建：初始化 hook（如 session 恢复）可能已经用到邻接表
+        self.incoming_edges: Dict[str, List[GraphEdge]] = {node_id: [] for node_id in nodes}
+        self.outgoing_edges: Dict[str, List[GraphEdge]] = {node_id: [] for node_id in nodes}
+        for edge in edges:
+            self.incoming_edges[edge.to_node.node_id].append(edge)
+            self.outgoing_edges[edge.from_node.node_id].append(edge)
+        self._node_order: Dict[str, int] = {node_id: index for index, node_id in enumerate(nodes)}
+        self._release_callbacks: List[Callable[[], None]] = []
+
+        super().__init__(nodes, edges, *args, **kwargs)
+
+    def add_release_callback(self, callback: Callable[[], None]) -> None:
+        """注册执行结束后释放资源的回调（如归还池化的 Agent）"""
+        self._release_callbacks.append(callback)
+
+    def release(self) -> None:
+        """执行结束后调用，释放本次执行借用的资源；重复调用无副作用"""
+        callbacks, self._release_callbacks = self._release_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Graph release callback failed: {type(e).__name__}: {e}")
+
+    def _find_newly_ready_nodes(self, completed_batch: list[GraphNode]) -> list[GraphNode]:
+        """Find nodes that became ready after the last execution.
+
+        只检查刚完成节点的直接后继，并保持与 self.nodes 一致的顺序。
+        """
+        candidate_ids = {
+            edge.to_node.node_id
+            for completed in completed_batch
+            for edge in self.outgoing_edges.get(completed.node_id, ())
+        }
+        newly_ready = []
+        for node_id in sorted(candidate_ids, key=self._node_order.__getitem__):
+            node = self.nodes[node_id]
+            if self._is_node_ready_with_conditions(node, completed_batch):
+                newly_ready.append(node)
+        return newly_ready
+
+    def _is_node_ready_with_conditions(self, node: GraphNode, completed_batch: list[GraphNode]) -> bool:
+        """Check if a node is ready considering conditional edges."""
+        for edge in self.incoming_edges.get(node.node_id, ()):
+            if edge.from_node in completed_batch:
+                if edge.should_traverse(self.state):
+                    logger.debug(
+                        "from=<{}>, to=<{}> | edge ready via satisfied condition", edge.from_node.node_id, node.node_id
+                    )
+                    return True
+                else:
+                    logger.debug(
+                        "from=<{}>, to=<{}> | edge condition not satisfied", edge.from_node.node_id, node.node_id
+                    )
+        return False
+
+    def _compute_ready_nodes_for_resume(self) -> list[GraphNode]:
+        if self.state.status == Status.PENDING:
+            return []
+        ready_nodes: list[GraphNode] = []
+        completed_nodes = set(self.state.completed_nodes)
+        for node_id, node in self.nodes.items():
+            if node in completed_nodes:
+                continue
+            incoming = self.incoming_edges.get(node_id, ())
+            if not incoming:
+                ready_nodes.append(node)
+            elif all(e.from_node in completed_nodes and e.should_traverse(self.state) for e in incoming):
+                ready_nodes.append(node)
+
+        return ready_nodes
 
     def _build_node_input(self, node: GraphNode) -> list[ContentBlock]:
         """Build input text for a node based on dependency outputs.
@@ -27,10 +106,9 @@ class GraphWrapper(Graph):
         """
         # Get satisfied dependencies
         dependency_results = {}
-        for edge in self.edges:
+        for edge in self.incoming_edges.get(node.node_id, ()):
             if (
-                    edge.to_node == node
-                    and edge.from_node in self.state.completed_nodes
+                    edge.from_node in self.state.completed_nodes
                     and edge.from_node.node_id in self.state.results
             ):
                 if edge.should_traverse(self.state):
@@ -8,7 +8,6 @@ from typing import Any, AsyncIterator, cast, Optional
 from loguru import logger
 from opentelemetry import trace as trace_api
 from pydantic import BaseModel
-from strands._async import run_async
 from strands.agent import AgentResult
 from strands.experimental.hooks.multiagent import MultiAgentInitializedEvent, AfterMultiAgentInvocationEvent, \
     BeforeMultiAgentInvocationEvent, BeforeNodeCallEvent, AfterNodeCallEvent
@@ -65,11 +64,13 @@ class FunctionNodeWrapper(MultiAgentBase):
             for hook in hooks:
                 self.hooks.add_hook(hook)
         self._resume_from_session = False
+        self._initialized_event_fired = False
 
         # Validate tool return transport - MUST be BaseModel for transport-safe output
         self._validate_tool_return_type()
 
-        run_async(lambda: self.hooks.invoke_callbacks_async(MultiAgentInitializedEvent(self)))
+        # MultiAgentInitializedEvent 推迟到首次执行时触发：
+        # 在构造函数中通过 run_async 触发会为每个 Function 节点额外创建一个线程
 
     def _validate_tool_return_type(self) -> None:
         """Validate that tool returns a BaseModel for transport-safe structured output.
@@ -125,6 +126,10 @@ class FunctionNodeWrapper(MultiAgentBase):
         if invocation_state is None:
             invocation_state = {}
 
+        if not self._initialized_event_fired:
+            self._initialized_event_fired = True
+            await self.hooks.invoke_callbacks_async(MultiAgentInitializedEvent(self))
+
         await self.hooks.invoke_callbacks_async(BeforeMultiAgentInvocationEvent(self, invocation_state))
 
         start_time = time.time()
@@ -185,17 +190,12 @@ class FunctionNodeWrapper(MultiAgentBase):
             raise ValueError("FunctionNodeWrapper must run in a Graph, but source_graph not found")
 
         # Find current node
-        current_node = None
-        for node_id, node in graph.nodes.items():
-            if node.executor == self:
-                current_node = node
-                break
-
-        if not current_node:
+        current_node = graph.nodes.get(self.id)
+        if not current_node or current_node.executor is not self:
             raise ValueError(f"Cannot find FunctionNodeWrapper in Graph (id={self.id})")
 
         # Find incoming edges (dependency nodes)
-        incoming_edges = [edge for edge in graph.edges if edge.to_node == current_node]
+        incoming_edges = graph.incoming_edges.get(current_node.node_id, [])
 
         # Validate single dependency
         if len(incoming_edges) == 0:
@@ -0,0 +1,143 @@
+"""
+节点级路由判定
+
+同一源节点的所有条件出边（JSONLogic / rules / Router / Orchestrator）由一个
+NodeRoutingEvaluator 统一判定：
+- 每个节点结果只执行一次 structured_output.model_dump()
+- 一次遍历得到所有出边的判定结果
+- 判定结果按节点执行结果缓存在 GraphState 上，边条件退化为 O(1) 查表
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from strands.agent import AgentResult
+from strands.multiagent.base import NodeResult
+from strands.multiagent.graph import GraphState
+
+from hatchify.common.domain.entity.agent_node_spec import AgentNode
+from hatchify.common.domain.entity.graph_spec import Edge
+from hatchify.common.domain.enums.agent_category import AgentCategory
+from hatchify.core.graph.condition_compiler import compile_json_logic, compile_rules
+
+EdgeDecider = Callable[[Dict[str, Any]], bool]
+
+# 判定结果缓存挂在 GraphState 上，随单次执行的生命周期释放
+_DECISIONS_ATTR = "_routing_decisions"
+
+
+class NodeRoutingEvaluator:
+    """单个源节点所有条件出边的路由判定器
+
+    在模板编译期创建，可被多次执行共享；单次执行的判定结果缓存在对应的 GraphState 中。
+    """
+
+    def __init__(self, node_id: str, node_spec: Optional[AgentNode] = None):
+        self.node_id = node_id
+        self.category = node_spec.category if node_spec else None
+        self._edges: List[Edge] = []
+        self._deciders: List[EdgeDecider] = []
+        self._uses_next_node = False
+
+    @property
+    def is_orchestrator(self) -> bool:
+        return self.category == AgentCategory.ORCHESTRATOR
+
+    def add_edge(self, edge: Edge) -> Optional[Callable[[GraphState], bool]]:
+        """注册一条出边，返回该边的条件函数；无条件边返回 None
+
+        Raises:
+            ValueError: 边的 JSONLogic / rules 存在不支持的运算符
+        """
+        decider = self._compile_edge(edge)
+        if decider is None:
+            return None
+
+        index = len(self._deciders)
+        self._edges.append(edge)
+        self._deciders.append(decider)
+
+        def condition(state: GraphState) -> bool:
+            return self.decide(state)[index]
+
+        return condition
+
+    def decide(self, state: GraphState) -> Tuple[bool, ...]:
+        """返回所有已注册出边的判定结果，同一次节点执行只计算一次"""
+        node_result = state.results.get(self.node_id)
+        if not node_result:
+            return self._reject_all()
+
+        decisions_cache: Dict[str, Tuple[NodeResult, Tuple[bool, ...]]] = vars(state).setdefault(
+            _DECISIONS_ATTR, {}
+        )
+        cached = decisions_cache.get(self.node_id)
+        if cached is not None and cached[0] is node_result:
+            return cached[1]
+
+        decisions = self._evaluate(node_result)
+        decisions_cache[self.node_id] = (node_result, decisions)
+        return decisions
+
+    def _compile_edge(self, edge: Edge) -> Optional[EdgeDecider]:
+        # 优先使用自定义规则/JSONLogic 条件
+        if edge.json_logic:
+            return self._compile_json_logic_decider(edge)
+        if edge.rules:
+            logic = (edge.logic or "and").lower()
+            if logic not in {"and", "or"}:
+                logger.warning(f"未知逻辑运算符 '{edge.logic}'，使用 'and' 代替")
+                logic = "and"
+            return compile_rules(edge.rules, logic)
+        if self.category in (AgentCategory.ROUTER, AgentCategory.ORCHESTRATOR):
+            self._uses_next_node = True
+            target_node = edge.to_node
+            return lambda output: output.get("next_node") == target_node
+        return None
+
+    @staticmethod
+    def _compile_json_logic_decider(edge: Edge) -> EdgeDecider:
+        evaluate = compile_json_logic(edge.json_logic)
+
+        def decider(output: Dict[str, Any]) -> bool:
+            try:
+                return bool(evaluate(output))
+            except Exception as exc:
+                logger.warning(
+                    f"JSONLogic 计算失败: expr={edge.json_logic}, output={output}",
+                    exc_info=exc
+                )
+                return False
+
+        return decider
+
+    def _reject_all(self) -> Tuple[bool, ...]:
+        return (False,) * len(self._deciders)
+
+    def _evaluate(self, node_result: NodeResult) -> Tuple[bool, ...]:
+        agent_result = node_result.result
+        if not isinstance(agent_result, AgentResult):
+            return self._reject_all()
+
+        structured_output = agent_result.structured_output
+        if not structured_output:
+            logger.warning(f"节点 '{self.node_id}' 没有 structured_output，无法路由")
+            return self._reject_all()
+
+        output = structured_output.model_dump()
+        next_node = output.get("next_node")
+
+        # Orchestrator COMPLETE 信号：所有条件边都返回 False，Graph 自然终止
+        if self.is_orchestrator and isinstance(next_node, str) and next_node.upper() == "COMPLETE":
+            logger.info(f"Orchestrator '{self.node_id}' 发出 COMPLETE 信号，工作流即将终止")
+            return self._reject_all()
+
+        if self._uses_next_node and not next_node:
+            logger.warning(f"节点 '{self.node_id}' 的 structured_output 缺少 'next_node' 字段")
+
+        decisions = tuple(decider(output) for decider in self._deciders)
+
+        if any(decisions):
+            targets = [edge.to_node for edge, decision in zip(self._edges, decisions) if decision]
+            logger.debug(f"节点 '{self.node_id}' 路由到 {targets}")
+
+        return decisions
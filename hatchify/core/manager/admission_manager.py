@@ -0,0 +1,206 @@
+"""
+执行准入控制
+
+所有提交执行的入口（webhook / graph / web builder / deploy）在创建执行记录前先申请准入：
+- 同时受全局、单个 Graph、单种执行类型三级并发上限约束，三者都有空位才放行
+- 没有空位时进入有界等待队列，按先来先到放行；队首受单个 Graph 上限阻塞时，
+  其他 Graph 的请求不会被它挡住
+- 等待队列已满时立即拒绝（429），等待超时拒绝（503），两者都带 Retry-After
+- 准入凭证绑定到执行任务，任务结束（完成 / 失败 / 取消）时自动归还
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException
+from loguru import logger
+
+from hatchify.common.domain.enums.execution_type import ExecutionType
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, AdmissionSettings
+
+
+class AdmissionRejected(HTTPException):
+    """准入被拒绝，status_code 为 429（等待队列已满）或 503（等待超时）"""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(status_code=status_code, detail=message, headers={"Retry-After": str(retry_after)})
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """准入凭证，release() 可重复调用"""
+
+    def __init__(self, controller: "AdmissionController", graph_id: Optional[str], execution_type: str):
+        self.controller = controller
+        self.graph_id = graph_id
+        self.execution_type = execution_type
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.controller.release(self)
+
+    def bind(self, task: Optional[asyncio.Task]) -> None:
+        """执行任务结束时自动归还；没有任务（如启动失败）时立即归还"""
+        if task is None or task.done():
+            self.release()
+        else:
+            task.add_done_callback(lambda _: self.release())
+
+
+class _Waiter:
+    def __init__(self, graph_id: Optional[str], execution_type: str):
+        self.graph_id = graph_id
+        self.execution_type = execution_type
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """执行准入控制器（单例模式）"""
+
+    def __init__(self, settings: Optional[AdmissionSettings] = None):
+        self.settings = settings or AdmissionSettings()
+        self._running = 0
+        self._running_by_graph: Dict[str, int] = {}
+        self._running_by_type: Dict[str, int] = {}
+        self._waiters: Deque[_Waiter] = deque()
+        # 执行耗时的指数滑动平均，用于估算 Retry-After
+        self._avg_duration: Optional[float] = None
+
+        metrics.register_gauge("admission_running", lambda: self._running)
+        metrics.register_gauge("admission_waiting", lambda: len(self._waiters))
+        metrics.register_gauge("admission_saturation", self.saturation)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def saturation(self) -> float:
+        """全局并发占用比例"""
+        limit = self.settings.max_concurrent
+        return self._running / limit if limit > 0 else 0.0
+
+    def _has_capacity(self, graph_id: Optional[str], execution_type: str) -> bool:
+        settings = self.settings
+        if 0 < settings.max_concurrent <= self._running:
+            return False
+        if graph_id and 0 < settings.max_concurrent_per_graph <= self._running_by_graph.get(graph_id, 0):
+            return False
+        type_limit = settings.max_concurrent_per_type.get(execution_type, 0)
+        if 0 < type_limit <= self._running_by_type.get(execution_type, 0):
+            return False
+        return True
+
+    def _admit(self, graph_id: Optional[str], execution_type: str) -> AdmissionTicket:
+        self._running += 1
+        if graph_id:
+            self._running_by_graph[graph_id] = self._running_by_graph.get(graph_id, 0) + 1
+        self._running_by_type[execution_type] = self._running_by_type.get(execution_type, 0) + 1
+        metrics.inc("admission_admitted", type=execution_type)
+        return AdmissionTicket(self, graph_id, execution_type)
+
+    def retry_after(self) -> int:
+        """按排队人数与平均执行耗时估算客户端重试等待时间（秒）"""
+        if self._avg_duration is None:
+            return self.settings.retry_after_seconds
+        slots = max(self.settings.max_concurrent, 1)
+        estimate = self._avg_duration * (len(self._waiters) + 1) / slots
+        return min(max(math.ceil(estimate), 1), self.settings.max_retry_after_seconds)
+
+    def _reject(self, status_code: int, reason: str, message: str, execution_type: str) -> AdmissionRejected:
+        metrics.inc("admission_rejected", reason=reason, type=execution_type)
+        logger.warning(f"Execution admission rejected ({reason}): {message}")
+        return AdmissionRejected(status_code, message, self.retry_after())
+
+    async def acquire(
+            self,
+            graph_id: Optional[str],
+            execution_type: ExecutionType | str,
+            scheduled: bool = False,
+    ) -> AdmissionTicket:
+        """
+        申请执行准入
+
+        Args:
+            graph_id: Graph ID，为空时不受单个 Graph 上限约束
+            execution_type: 执行类型
+            scheduled: 来自 ExecutionScheduler 的 worker，数量已受 worker 池约束，
+                不受等待队列长度与超时限制
+
+        Raises:
+            AdmissionRejected: 等待队列已满（429）或等待超时（503）
+        """
+        execution_type = ExecutionType(execution_type).value
+        if not self.settings.enabled:
+            return self._admit(graph_id, execution_type)
+
+        # 有人排队时新请求也排队，避免插队
+        if not self._waiters and self._has_capacity(graph_id, execution_type):
+            return self._admit(graph_id, execution_type)
+
+        if not scheduled and len(self._waiters) >= self.settings.max_queue_size:
+            raise self._reject(429, "queue_full", "Too many executions in progress, please retry later",
+                               execution_type)
+
+        waiter = _Waiter(graph_id, execution_type)
+        self._waiters.append(waiter)
+        # 排在前面的等待者可能只是受单个 Graph / 类型上限阻塞，这里立即尝试放行一轮
+        self._wake_waiters()
+        start = time.monotonic()
+        try:
+            timeout = None if scheduled else self.settings.queue_timeout_seconds
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                # 超时的同时刚好被放行
+                return waiter.future.result()
+            raise self._reject(503, "timeout", "Timed out waiting for an execution slot", execution_type)
+        except asyncio.CancelledError:
+            # 请求被取消（如客户端断开），已放行的凭证直接归还
+            if waiter.future.done() and not waiter.future.cancelled():
+                waiter.future.result().release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.cancel()
+            metrics.observe("admission_wait_seconds", time.monotonic() - start)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        self._running -= 1
+        if ticket.graph_id:
+            remaining = self._running_by_graph.get(ticket.graph_id, 1) - 1
+            if remaining > 0:
+                self._running_by_graph[ticket.graph_id] = remaining
+            else:
+                self._running_by_graph.pop(ticket.graph_id, None)
+        self._running_by_type[ticket.execution_type] = self._running_by_type.get(ticket.execution_type, 1) - 1
+
+        duration = time.monotonic() - ticket.admitted_at
+        self._avg_duration = duration if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * duration
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """按排队顺序放行所有能放行的等待者"""
+        for waiter in list(self._waiters):
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self._has_capacity(waiter.graph_id, waiter.execution_type):
+                self._waiters.remove(waiter)
+                waiter.future.set_result(self._admit(waiter.graph_id, waiter.execution_type))
+            elif 0 < self.settings.max_concurrent <= self._running:
+                break
+
+
+admission_controller = AdmissionController(get_hatchify_settings().admission)
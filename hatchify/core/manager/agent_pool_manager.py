@@ -0,0 +1,152 @@
+"""
+Agent 预热池
+
+按 (spec_hash, node_name) 缓存已构建好的 strands Agent：
+- 每次执行从池中借出 Agent，执行结束后重置 messages/state 等执行状态再归还
+- 每个节点最多保留 max_idle_per_node 个空闲 Agent，超出直接丢弃
+- 空闲超过 idle_ttl_seconds 的 Agent 由 evict_idle() 淘汰
+- Graph spec 变化后旧 spec_hash 的空闲 Agent 由 invalidate() 清理
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from strands import Agent
+from strands.agent import SlidingWindowConversationManager
+from strands.agent.state import AgentState
+from strands.handlers import PrintingCallbackHandler
+from strands.telemetry import EventLoopMetrics
+
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, AgentPoolSettings
+from hatchify.core.graph.graph_template import AgentBlueprint
+
+PoolKey = Tuple[str, str]
+
+
+def reset_agent(agent: Agent) -> None:
+    """将 Agent 重置为刚构建时的执行状态
+
+    注意使用新对象替换而不是原地清空，已返回给调用方的 AgentResult 仍可能引用旧对象。
+    """
+    agent.messages = []
+    agent.state = AgentState()
+    agent.event_loop_metrics = EventLoopMetrics()
+    agent.trace_span = None
+    if isinstance(agent.conversation_manager, SlidingWindowConversationManager):
+        agent.conversation_manager = SlidingWindowConversationManager(
+            window_size=agent.conversation_manager.window_size,
+            should_truncate_results=agent.conversation_manager.should_truncate_results,
+        )
+    if isinstance(agent.callback_handler, PrintingCallbackHandler):
+        agent.callback_handler = PrintingCallbackHandler()
+    if hasattr(agent, "_interrupt_state"):
+        agent._interrupt_state = type(agent._interrupt_state)()
+
+
+class AgentPool:
+    """Agent 预热池（单例模式）
+
+    instantiate 可能在线程中执行，因此使用 threading.Lock 保护。
+    """
+
+    def __init__(self, settings: Optional[AgentPoolSettings] = None):
+        self.settings = settings or AgentPoolSettings()
+        self._idle: Dict[PoolKey, Deque[Tuple[float, Agent]]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        metrics.register_gauge("agent_pool_idle", self.idle_count)
+
+    def checkout(self, spec_hash: str, blueprint: AgentBlueprint) -> Agent:
+        """借出一个 Agent，池中没有空闲 Agent 时基于蓝图新建"""
+        if self.settings.enabled:
+            key = (spec_hash, blueprint.name)
+            with self._lock:
+                idle = self._idle.get(key)
+                agent = idle.pop()[1] if idle else None
+            if agent is not None:
+                metrics.inc("agent_pool_checkouts", result="hit")
+                return agent
+            metrics.inc("agent_pool_checkouts", result="miss")
+
+        start = time.perf_counter()
+        agent = blueprint.create_agent()
+        metrics.observe("agent_pool_create_seconds", time.perf_counter() - start)
+        return agent
+
+    def release(self, spec_hash: str, agents: List[Tuple[str, Agent]]) -> None:
+        """归还一次执行借出的 Agent 列表 [(node_name, agent)]"""
+        if not self.settings.enabled:
+            return
+
+        now = time.monotonic()
+        for node_name, agent in agents:
+            try:
+                reset_agent(agent)
+            except Exception as e:
+                logger.warning(f"Failed to reset agent '{node_name}', discarding: {type(e).__name__}: {e}")
+                metrics.inc("agent_pool_discarded", reason="reset_failed")
+                continue
+
+            key = (spec_hash, node_name)
+            with self._lock:
+                idle = self._idle.setdefault(key, deque())
+                if len(idle) >= self.settings.max_idle_per_node:
+                    accepted = False
+                else:
+                    idle.append((now, agent))
+                    accepted = True
+
+            if accepted:
+                metrics.inc("agent_pool_returns")
+            else:
+                metrics.inc("agent_pool_discarded", reason="pool_full")
+
+        # 归还时顺带清理过期的空闲 Agent，避免没有后台任务时池只增不减
+        if now - self._last_sweep >= min(self.settings.idle_ttl_seconds, 60.0):
+            self.evict_idle(now)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """淘汰空闲超过 idle_ttl_seconds 的 Agent，返回淘汰数量"""
+        now = time.monotonic() if now is None else now
+        deadline = now - self.settings.idle_ttl_seconds
+        evicted = 0
+        with self._lock:
+            self._last_sweep = now
+            for key in list(self._idle):
+                idle = self._idle[key]
+                # 归还顺序即时间顺序，最旧的在左侧
+                while idle and idle[0][0] < deadline:
+                    idle.popleft()
+                    evicted += 1
+                if not idle:
+                    del self._idle[key]
+
+        if evicted:
+            metrics.inc("agent_pool_evicted", evicted, reason="idle_ttl")
+            logger.debug(f"Evicted {evicted} idle agents")
+        return evicted
+
+    def invalidate(self, spec_hash: str) -> int:
+        """清理指定 spec_hash 的所有空闲 Agent"""
+        with self._lock:
+            keys = [key for key in self._idle if key[0] == spec_hash]
+            evicted = sum(len(self._idle.pop(key)) for key in keys)
+
+        if evicted:
+            metrics.inc("agent_pool_evicted", evicted, reason="invalidated")
+        return evicted
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+
+agent_pool = AgentPool(get_hatchify_settings().agent_pool)
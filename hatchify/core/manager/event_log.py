@@ -0,0 +1,185 @@
+"""
+SSE 事件持久化日志
+
+基于 SQLite 的追加写事件日志，作为 EventStore 的落盘后端：
+- EventStore 内存中只保留头部与热尾部，被淘汰的旧事件从日志中读取
+- 执行完成后事件仍保存在日志中，进程重启后在 TTL 内仍可重放
+- 写入按批次提交（WAL 模式），done 事件与内存淘汰前触发写入
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+
+from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.common.settings.settings import get_hatchify_settings
+
+# (seq, event_id, type, payload)
+EventRow = Tuple[int, str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stream_event (
+    source_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (source_id, seq)
+);
+CREATE INDEX IF NOT EXISTS ix_stream_event_id ON stream_event (source_id, event_id);
+CREATE TABLE IF NOT EXISTS stream_meta (
+    source_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    ttl_seconds INTEGER NOT NULL,
+    next_seq INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class PersistedEventData(BaseModel):
+    """从事件日志恢复的事件数据，按原始 JSON 字段还原，序列化结果与写入时一致"""
+    model_config = ConfigDict(extra="allow")
+
+
+class StreamMeta(NamedTuple):
+    source_id: str
+    created_at: float
+    ttl_seconds: int
+    next_seq: int
+    completed: bool
+
+
+class SQLiteEventLog:
+    """SQLite 事件日志
+
+    读写都由调用方通过 asyncio.to_thread 执行，提交、等待写锁与读取不占用事件循环。
+    读写使用各自的连接与 threading.Lock，WAL 模式下读取不会等待进行中的写入。
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+
+    def append(
+            self,
+            source_id: str,
+            rows: List[EventRow],
+            created_at: float,
+            ttl_seconds: int,
+            next_seq: int,
+            completed: bool,
+    ) -> None:
+        """批量追加事件并更新流元数据（同一事务）"""
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO stream_event (source_id, seq, event_id, type, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(source_id, *row) for row in rows],
+                )
+            self._conn.execute(
+                "INSERT INTO stream_meta (source_id, created_at, ttl_seconds, next_seq, completed) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(source_id) DO UPDATE SET next_seq = excluded.next_seq, completed = excluded.completed",
+                (source_id, created_at, ttl_seconds, next_seq, int(completed)),
+            )
+
+    def read_range(self, source_id: str, start: int, end: int, limit: int = 256) -> List[Tuple[int, StreamEvent]]:
+        """读取序号 [start, end) 内的事件，最多 limit 条"""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT seq, event_id, type, payload FROM stream_event "
+                "WHERE source_id = ? AND seq >= ? AND seq < ? ORDER BY seq LIMIT ?",
+                (source_id, start, end, limit),
+            ).fetchall()
+        return [
+            (seq, StreamEvent.from_serialized(
+                event_id, event_type, PersistedEventData.model_validate_json(payload), payload
+            ))
+            for seq, event_id, event_type, payload in rows
+        ]
+
+    def find_seq(self, source_id: str, event_id: str) -> Optional[int]:
+        """按事件 ID 查找序号"""
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT seq FROM stream_event WHERE source_id = ? AND event_id = ?",
+                (source_id, event_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_meta(self, source_id: str) -> Optional[StreamMeta]:
+        """读取流元数据，不存在时返回 None"""
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT source_id, created_at, ttl_seconds, next_seq, completed FROM stream_meta WHERE source_id = ?",
+                (source_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return StreamMeta(row[0], row[1], row[2], row[3], bool(row[4]))
+
+    def delete(self, source_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM stream_event WHERE source_id = ?", (source_id,))
+            self._conn.execute("DELETE FROM stream_meta WHERE source_id = ?", (source_id,))
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """删除超过 TTL 的流，返回删除的流数量"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            expired = [
+                row[0] for row in self._conn.execute(
+                    "SELECT source_id FROM stream_meta WHERE created_at + ttl_seconds < ?", (now,)
+                )
+            ]
+            for source_id in expired:
+                self._conn.execute("DELETE FROM stream_event WHERE source_id = ?", (source_id,))
+                self._conn.execute("DELETE FROM stream_meta WHERE source_id = ?", (source_id,))
+        if expired:
+            logger.info(f"Purged {len(expired)} expired streams from event log")
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+
+_event_log: Optional[SQLiteEventLog] = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log() -> Optional[SQLiteEventLog]:
+    """获取全局事件日志；未配置 hatchify.event_store.log_file 时返回 None"""
+    global _event_log
+    log_file = get_hatchify_settings().event_store.log_file
+    if not log_file:
+        return None
+    if _event_log is None:
+        with _event_log_lock:
+            if _event_log is None:
+                _event_log = SQLiteEventLog(log_file)
+                logger.info(f"Opened SSE event log: {log_file}")
+    return _event_log
+
+
+def close_event_log() -> None:
+    global _event_log
+    with _event_log_lock:
+        if _event_log is not None:
+            _event_log.close()
+            _event_log = None
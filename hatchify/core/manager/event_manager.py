@@ -1,33 +1,98 @@
 """
 事件存储模块，用于支持 SSE 断线重连
+
+- 每个事件按追加顺序分配单调递增的序号，事件 ID -> 序号的索引使断线重连定位为 O(1)
+- 头部 pinned_head_events 个事件（start 等）始终保留，用于重建 UI
+- 其余事件保存在按条数 / 字节数限制的环形缓冲区中，超出时淘汰最旧的事件
+- 读取方通过 iter_after / iter_all 获得异步游标迭代器，不再复制整个事件列表
+- 配置了事件日志时，所有事件批量写入 SQLite：淘汰出内存的旧事件从日志读取，
+  进程重启后已完成的执行在 TTL 内仍可从日志重放
+  - 日志读写都通过 asyncio.to_thread 执行，不阻塞事件循环，也不在 _lock 内进行
+  - 写入在后台任务中执行，不阻塞 emit_event
+  - 写入失败只记录日志与 event_log_flush_errors 指标，事件保留在待写入队列中按间隔重试
+  - 从日志恢复的存储只读：多 worker 共享事件日志时执行可能仍在其他 worker 上写入，
+    未结束的执行由读取方确认没有存活的 worker 后，只在重放结果中补齐中断事件（interrupted_events）
 """
 import asyncio
+import time
+from contextlib import aclosing
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, AsyncIterator, Tuple
 
 from loguru import logger
 
-from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.common.domain.event.base_event import StreamEvent, ErrorEvent, DoneEvent
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, EventStoreSettings
+from hatchify.core.manager.event_log import SQLiteEventLog, StreamMeta, get_event_log
+
+# 环形缓冲区头部空洞超过该长度时压缩底层列表
+_COMPACT_THRESHOLD = 1024
+# 从事件日志分批读取的条数
+_LOG_READ_CHUNK = 256
+
+
+def interrupted_events(source_id: str, reason: str = "Execution interrupted: worker exited") -> List[StreamEvent]:
+    """执行所在 worker 已退出、事件日志中没有终止事件时，补发给订阅者的终止事件（不写入事件存储）"""
+    return [
+        StreamEvent(type="error", data=ErrorEvent(reason=reason)),
+        StreamEvent(type="done", data=DoneEvent(task_id=source_id, reason="error")),
+    ]
 
 
 class EventStore:
     _stores: Dict[str, 'EventStore'] = {}
     _lock = asyncio.Lock()
 
-    def __init__(self, source_id: str, ttl_seconds: int = 900):
+    def __init__(
+            self,
+            source_id: str,
+            ttl_seconds: int = 900,
+            settings: Optional[EventStoreSettings] = None,
+            event_log: Optional[SQLiteEventLog] = None,
+    ):
         """
         初始化事件存储
 
         Args:
             source_id: 图执行 ID
             ttl_seconds: 过期时间（秒），900秒
+            settings: 缓冲区配置，默认读取 hatchify.event_store
+            event_log: 事件日志，默认使用全局事件日志（未配置时不落盘）
         """
         self.source_id = source_id
-        self.events: List[StreamEvent] = []
+        self.settings = settings or get_hatchify_settings().event_store
         self.created_at = datetime.now()
         self.ttl_seconds = ttl_seconds
         self._completed = False
 
+        # 固定保留的头部事件，序号 [0, len(_head))
+        self._head: List[StreamEvent] = []
+        # 环形缓冲区：_tail[_tail_start:] 依次对应序号 [_tail_first_seq, _next_seq)
+        self._tail: List[Optional[Tuple[StreamEvent, int]]] = []
+        self._tail_start = 0
+        self._tail_first_seq = self.settings.pinned_head_events
+        self._tail_bytes = 0
+        self._head_bytes = 0
+        self._next_seq = 0
+        self._index: Dict[str, int] = {}
+        self.dropped = 0
+        # 最近一次读写时间，全局内存预算按 LRU 淘汰
+        self.last_access = time.monotonic()
+
+        self._log = event_log or get_event_log()
+        # 尚未写入日志的事件 (seq, event, payload)，序号从 _persisted_seq 开始连续
+        self._pending: List[Tuple[int, StreamEvent, str]] = []
+        self._persisted_seq = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # 最近一次写入失败时不再等待落盘，按内存上限照常淘汰
+        self._flush_failed = False
+        # 已从 _stores 移除，不再写入日志
+        self._closed = False
+        # 从事件日志恢复的只读存储，不追加事件
+        self._read_only = False
+
     @classmethod
     async def get_or_create(cls, source_id: str, ttl_seconds: int = 900) -> 'EventStore':
         """
@@ -49,7 +114,7 @@ class EventStore:
     @classmethod
     async def get(cls, source_id: str) -> Optional['EventStore']:
         """
-        获取事件存储
+        获取事件存储，内存中不存在时尝试从事件日志恢复
 
         Args:
             source_id: 图执行 ID
@@ -58,7 +123,40 @@ class EventStore:
             EventStore 实例，如果不存在返回 None
         """
         async with cls._lock:
-            return cls._stores.get(source_id)
+            store = cls._stores.get(source_id)
+        if store is not None:
+            return store
+
+        # 读取日志不持有 _lock，并发恢复同一执行时只保留先放入的存储
+        store = await cls._rehydrate(source_id)
+        if store is None or not store.is_completed():
+            # 未结束的执行可能仍在其他 worker 上写入日志，不缓存，每次读取重新加载元数据
+            return store
+        async with cls._lock:
+            return cls._stores.setdefault(source_id, store)
+
+    @classmethod
+    async def _rehydrate(cls, source_id: str) -> Optional['EventStore']:
+        """从事件日志恢复未过期的事件存储（只恢复元数据，事件按需从日志读取）"""
+        event_log = get_event_log()
+        if event_log is None:
+            return None
+        meta = await asyncio.to_thread(event_log.load_meta, source_id)
+        if meta is None or time.time() - meta.created_at > meta.ttl_seconds:
+            return None
+
+        store = EventStore(source_id, meta.ttl_seconds, event_log=event_log)
+        store._restore(meta)
+        store._read_only = True
+        logger.info(f"Rehydrated EventStore from event log: {source_id} ({meta.next_seq} events)")
+        return store
+
+    def _restore(self, meta: StreamMeta) -> None:
+        self.created_at = datetime.fromtimestamp(meta.created_at)
+        self._next_seq = meta.next_seq
+        self._tail_first_seq = meta.next_seq
+        self._persisted_seq = meta.next_seq
+        self._completed = meta.completed
 
     @classmethod
     async def delete(cls, source_id: str) -> bool:
@@ -72,18 +170,29 @@ class EventStore:
             是否删除成功
         """
         async with cls._lock:
-            if source_id in cls._stores:
-                del cls._stores[source_id]
-                logger.info(f"Deleted EventStore for graph: {source_id}")
-                return True
-            return False
+            store = cls._stores.pop(source_id, None)
+        event_log = store._log if store else get_event_log()
+        if store is not None:
+            store._closed = True
+            # 等待进行中的写入结束，避免删除后又被写回
+            async with store._flush_lock:
+                pass
+        if event_log is not None:
+            await asyncio.to_thread(event_log.delete, source_id)
+        if store is not None:
+            logger.info(f"Deleted EventStore for graph: {source_id}")
+            return True
+        return False
 
     @classmethod
-    async def cleanup_expired(cls):
+    async def cleanup_expired(cls) -> int:
         """
         清理过期的事件存储
 
-        建议在定时任务中调用
+        由后台 ResourceReaper 定时调用
+
+        Returns:
+            清理的事件存储数量
         """
         async with cls._lock:
             now = datetime.now()
@@ -95,10 +204,85 @@ class EventStore:
                     expired.append(gid)
 
             for gid in expired:
-                del cls._stores[gid]
+                cls._stores.pop(gid)._closed = True
+
+        if expired:
+            metrics.inc("event_store_removed", len(expired), reason="ttl")
+            logger.info(f"Cleaned up {len(expired)} expired EventStores: {expired}")
+
+        event_log = get_event_log()
+        if event_log is not None:
+            await asyncio.to_thread(event_log.purge_expired)
+
+        return len(expired)
 
-            if expired:
-                logger.info(f"Cleaned up {len(expired)} expired EventStores: {expired}")
+    @classmethod
+    async def enforce_memory_budget(cls, budget_bytes: int) -> int:
+        """
+        按 LRU 释放事件存储占用的内存，直到总量不超过 budget_bytes
+
+        - 已落盘的存储：已完成的直接移出内存（之后按需从日志恢复），运行中的只清空内存缓冲
+        - 未落盘的存储：只能移除已完成的（之后无法重放），运行中的跳过
+
+        Returns:
+            释放内存的事件存储数量
+        """
+        if budget_bytes <= 0:
+            return 0
+
+        async with cls._lock:
+            total = sum(store.memory_bytes() for store in cls._stores.values())
+            if total <= budget_bytes:
+                return 0
+            candidates = sorted(cls._stores.values(), key=lambda item: item.last_access)
+
+        # 落盘不持有 _lock，避免写入耗时阻塞其他执行创建 / 读取事件存储
+        released = 0
+        for store in candidates:
+            if total <= budget_bytes:
+                break
+            size = store.memory_bytes()
+            if size == 0:
+                continue
+            if store.is_completed():
+                if not await store.flush():
+                    continue
+                async with cls._lock:
+                    if cls._stores.get(store.source_id) is store:
+                        del cls._stores[store.source_id]
+                        store._closed = True
+                metrics.inc("event_store_removed", reason="budget")
+            elif store._log is not None:
+                if not await store.spill():
+                    continue
+                metrics.inc("event_store_spilled")
+            else:
+                continue
+            total -= size
+            released += 1
+
+        if released:
+            logger.info(f"Released {released} EventStores to meet memory budget ({total}/{budget_bytes} bytes)")
+        return released
+
+    @classmethod
+    async def memory_usage(cls) -> int:
+        """所有事件存储在内存中保留的事件字节数"""
+        async with cls._lock:
+            return sum(store.memory_bytes() for store in cls._stores.values())
+
+    @classmethod
+    async def count_stores(cls) -> int:
+        async with cls._lock:
+            return len(cls._stores)
+
+    @classmethod
+    async def flush_all(cls):
+        """将所有事件存储中尚未落盘的事件写入事件日志，应用退出时调用"""
+        async with cls._lock:
+            stores = list(cls._stores.values())
+        for store in stores:
+            await store.flush()
 
     @classmethod
     async def get_all_source_ids(cls) -> List[str]:
@@ -112,15 +296,252 @@ class EventStore:
 
         Args:
             event: 图事件
+
+        Raises:
+            RuntimeError: 从事件日志恢复的只读存储
         """
-        self.events.append(event)
+        if self._read_only:
+            raise RuntimeError(f"EventStore {self.source_id} is rehydrated from the event log and read-only")
+        seq = self._next_seq
+        self._next_seq += 1
+        self._index[event.id] = seq
+        self.last_access = time.monotonic()
+
+        # 内存占用按 SSE 帧大小估算，帧在 emit_event 时已序列化并缓存在事件上
+        size = len(event.sse_frame())
+        if self._log:
+            self._pending.append((seq, event, event.data_json()))
+
+        # 从日志恢复或已释放内存的存储没有内存头部，后续事件全部进入环形缓冲区
+        if seq < self.settings.pinned_head_events and seq == len(self._head):
+            self._head.append(event)
+            self._head_bytes += size
+        else:
+            self._tail.append((event, size))
+            self._tail_bytes += size
+            self._evict()
 
         # 检查是否完成
         if event.type == "done":
             self._completed = True
             logger.debug(f"EventStore marked as completed for graph: {self.source_id}")
 
-    def get_after(self, last_event_id: Optional[str]) -> List[StreamEvent]:
+        if self._needs_flush():
+            self._request_flush()
+
+    def _has_unpersisted(self) -> bool:
+        return bool(self._pending) or self._persisted_seq != self._next_seq
+
+    def _needs_flush(self) -> bool:
+        """done 事件、攒满一批，或环形缓冲区等待落盘后淘汰时需要写入"""
+        if self._log is None or self._closed or not self._has_unpersisted():
+            return False
+        return self._completed or len(self._pending) >= self.settings.flush_batch_size or self._over_limit()
+
+    def _request_flush(self) -> None:
+        """在后台任务中写入事件日志，同一存储同时只有一个写入任务"""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有事件循环时留给 flush_all 写入
+            return
+        self._flush_task = loop.create_task(self._flush_in_background(), name=f"event-log-flush-{self.source_id}")
+
+    async def _flush_in_background(self) -> None:
+        while self._needs_flush():
+            if not await self.flush():
+                await asyncio.sleep(self.settings.flush_retry_interval)
+
+    async def flush(self) -> bool:
+        """
+        将尚未落盘的事件批量写入事件日志
+
+        写入失败时事件保留在待写入队列中，等待下次重试
+
+        Returns:
+            是否已全部落盘（没有事件日志时返回 True）
+        """
+        async with self._flush_lock:
+            if self._log is None or self._closed or not self._has_unpersisted():
+                return True
+            pending, self._pending = self._pending, []
+            next_seq, completed = self._next_seq, self._completed
+            try:
+                await asyncio.to_thread(
+                    self._log.append,
+                    self.source_id,
+                    [(seq, event.id, event.type, payload) for seq, event, payload in pending],
+                    created_at=self.created_at.timestamp(),
+                    ttl_seconds=self.ttl_seconds,
+                    next_seq=next_seq,
+                    completed=completed,
+                )
+            except Exception as e:
+                self._pending = pending + self._pending
+                self._flush_failed = True
+                metrics.inc("event_log_flush_errors")
+                logger.warning(
+                    f"Failed to flush {len(pending)} events of EventStore {self.source_id}, will retry: "
+                    f"{type(e).__name__}: {e}"
+                )
+                self._trim_pending()
+                self._evict()
+                return False
+            self._persisted_seq = next_seq
+            self._flush_failed = False
+            # 等待落盘的事件现在可以淘汰了
+            self._evict()
+            return not self._has_unpersisted()
+
+    def _trim_pending(self) -> None:
+        """日志持续不可用时限制待写入队列的长度，丢弃最旧的事件"""
+        limit = self.settings.max_events and max(self.settings.max_events, self.settings.flush_batch_size)
+        if limit and len(self._pending) > limit:
+            dropped = len(self._pending) - limit
+            del self._pending[:dropped]
+            metrics.inc("event_log_dropped", dropped)
+            logger.warning(f"Dropped {dropped} unpersisted events of EventStore {self.source_id}")
+
+    async def spill(self) -> bool:
+        """落盘后清空内存中的事件缓冲，之后的读取全部走事件日志；未能全部落盘时不清空"""
+        if self._log is None or not await self.flush():
+            return False
+        self._head.clear()
+        self._tail.clear()
+        self._tail_start = 0
+        self._tail_first_seq = self._next_seq
+        self._tail_bytes = 0
+        self._head_bytes = 0
+        self._index.clear()
+        return True
+
+    def memory_bytes(self) -> int:
+        """内存中保留事件的序列化字节数（估算值）"""
+        return self._head_bytes + self._tail_bytes
+
+    def _tail_len(self) -> int:
+        return len(self._tail) - self._tail_start
+
+    def _over_limit(self) -> bool:
+        max_events = self.settings.max_events
+        max_bytes = self.settings.max_bytes
+        return self._tail_len() > 1 and bool(
+            (max_events and self._tail_len() > max_events)
+            or (max_bytes and self._tail_bytes > max_bytes)
+        )
+
+    def _evict(self) -> None:
+        """淘汰环形缓冲区中最旧的事件，至少保留最新的一个"""
+        evicted = 0
+        while self._over_limit():
+            if self._log and not self._flush_failed and self._tail_first_seq >= self._persisted_seq:
+                # 未落盘的事件暂留内存，落盘后再淘汰，之后仍可从日志读取
+                break
+            event, size = self._tail[self._tail_start]
+            self._tail[self._tail_start] = None
+            self._tail_start += 1
+            self._tail_first_seq += 1
+            self._tail_bytes -= size
+            self._index.pop(event.id, None)
+            evicted += 1
+
+        if evicted:
+            self.dropped += evicted
+            metrics.inc("event_store_evicted", evicted, reason="ring")
+            if self._tail_start >= _COMPACT_THRESHOLD and self._tail_start * 2 >= len(self._tail):
+                del self._tail[:self._tail_start]
+                self._tail_start = 0
+
+    def _get(self, seq: int) -> StreamEvent:
+        if seq < len(self._head):
+            return self._head[seq]
+        return self._tail[self._tail_start + seq - self._tail_first_seq][0]
+
+    async def _iter_range(self, seq: int, end: int) -> AsyncIterator[StreamEvent]:
+        """按序号遍历 [seq, end)，已淘汰出内存的区间从事件日志读取
+
+        每一步都重新按序号定位，迭代过程中追加 / 淘汰事件不会使游标失效。
+        """
+        while seq < end:
+            if len(self._head) <= seq < self._tail_first_seq:
+                rows = []
+                if self._log is not None:
+                    rows = await asyncio.to_thread(
+                        self._log.read_range,
+                        self.source_id, seq, min(self._tail_first_seq, end), limit=_LOG_READ_CHUNK,
+                    )
+                if not rows:
+                    # 未落盘时中间事件已丢失，直接跳到缓冲区中最旧的事件
+                    seq = self._tail_first_seq
+                    continue
+                for row_seq, event in rows:
+                    yield event
+                    seq = row_seq + 1
+                continue
+            yield self._get(seq)
+            seq += 1
+
+    async def _start_seq(self, last_event_id: Optional[str]) -> int:
+        """计算 last_event_id 之后第一个事件的序号；ID 未知时从头开始"""
+        if not last_event_id:
+            return 0
+        seq = self._index.get(last_event_id)
+        if seq is None and self._log is not None:
+            seq = await asyncio.to_thread(self._log.find_seq, self.source_id, last_event_id)
+        if seq is None:
+            # ID 未找到，可能是太旧（已淘汰）或无效，从头返回
+            logger.warning(f"last_event_id '{last_event_id}' not found in EventStore {self.source_id}, replaying from start")
+            return 0
+        return seq + 1
+
+    async def iter_after(self, last_event_id: Optional[str]) -> AsyncIterator[StreamEvent]:
+        """
+        获取指定事件 ID 之后事件的游标迭代器
+
+        迭代范围在开始迭代时确定，之后追加的事件不包含在内。
+
+        Args:
+            last_event_id: 上次收到的事件 ID（客户端提供），为空时从头开始
+        """
+        self.last_access = time.monotonic()
+        seq = await self._start_seq(last_event_id)
+        async with aclosing(self._iter_range(seq, self._next_seq)) as events:
+            async for event in events:
+                yield event
+
+    def iter_all(self) -> AsyncIterator[StreamEvent]:
+        """获取所有保留事件的游标迭代器"""
+        self.last_access = time.monotonic()
+        return self._iter_range(0, self._next_seq)
+
+    async def read_after(self, last_event_id: Optional[str], limit: int) -> List[StreamEvent]:
+        """
+        读取指定事件 ID 之后最多 limit 个事件
+
+        返回空列表时已读到最新事件，且返回前不再让出事件循环，
+        调用方随即订阅实时事件不会遗漏读取期间追加的事件。
+        """
+        self.last_access = time.monotonic()
+        seq = await self._start_seq(last_event_id)
+        while True:
+            end = self._next_seq
+            batch = []
+            async with aclosing(self._iter_range(seq, end)) as events:
+                async for event in events:
+                    batch.append(event)
+                    if len(batch) >= limit:
+                        break
+            # 读取日志期间可能追加了新事件，没读到时重新读取
+            if batch or end == self._next_seq:
+                return batch
+
+    async def has_after(self, last_event_id: Optional[str]) -> bool:
+        """指定事件 ID 之后是否还有事件"""
+        return await self._start_seq(last_event_id) < self._next_seq
+
+    async def get_after(self, last_event_id: Optional[str]) -> List[StreamEvent]:
         """
         获取指定事件 ID 之后的所有事件
 
@@ -130,53 +551,55 @@ class EventStore:
         Returns:
             事件列表
         """
-        if not last_event_id:
-            # 没有提供 ID，返回所有事件
-            logger.debug(f"Returning all {len(self.events)} events (no last_event_id)")
-            return self.events.copy()
-
-        # 查找事件位置
-        for i, event in enumerate(self.events):
-            if event.id == last_event_id:
-                # 返回该事件之后的所有事件
-                remaining = self.events[i + 1:]
-                logger.debug(f"Found last_event_id at index {i}, returning {len(remaining)} events")
-                return remaining
-
-        # ID 未找到，可能是太旧或无效，返回所有事件
-        logger.warning(f"last_event_id '{last_event_id}' not found, returning all {len(self.events)} events")
-        return self.events.copy()
-
-    def get_all(self) -> List[StreamEvent]:
+        return [event async for event in self.iter_after(last_event_id)]
+
+    async def get_all(self) -> List[StreamEvent]:
         """获取所有事件"""
-        return self.events.copy()
+        return [event async for event in self.iter_all()]
 
     def is_completed(self) -> bool:
         """检查流是否已完成"""
         return self._completed
 
     def count(self) -> int:
-        """获取事件数量"""
-        return len(self.events)
+        """获取保留的事件数量"""
+        return len(self._head) + self._tail_len()
 
-    def get_first_event_id(self) -> Optional[str]:
-        """获取第一个事件的 ID"""
-        return self.events[0].id if self.events else None
+    async def get_first_event_id(self) -> Optional[str]:
+        """获取第一个保留事件的 ID"""
+        async with aclosing(self.iter_all()) as events:
+            first = await anext(events, None)
+        return first.id if first else None
 
-    def get_last_event_id(self) -> Optional[str]:
+    async def get_last_event_id(self) -> Optional[str]:
         """获取最后一个事件的 ID"""
-        return self.events[-1].id if self.events else None
+        async with aclosing(self._iter_range(self._next_seq - 1, self._next_seq)) as events:
+            last = await anext(events, None)
+        return last.id if last else None
 
-    def clear(self) -> None:
+    async def clear(self) -> None:
         """清空所有事件"""
-        self.events.clear()
+        self._head.clear()
+        self._tail.clear()
+        self._tail_start = 0
+        self._tail_first_seq = self.settings.pinned_head_events
+        self._tail_bytes = 0
+        self._head_bytes = 0
+        self._next_seq = 0
+        self._index.clear()
+        self.dropped = 0
+        self._pending.clear()
+        self._persisted_seq = 0
         self._completed = False
+        if self._log is not None:
+            await asyncio.to_thread(self._log.delete, self.source_id)
         logger.debug(f"Cleared EventStore for graph: {self.source_id}")
 
     def __repr__(self) -> str:
         return (
             f"EventStore(source_id={self.source_id}, "
-            f"events={len(self.events)}, "
+            f"events={self.count()}, "
+            f"dropped={self.dropped}, "
             f"completed={self._completed}, "
             f"age={datetime.now() - self.created_at})"
         )
@@ -0,0 +1,147 @@
+"""
+执行状态写回（write-behind）
+
+ExecutionTrackerListener 的每次状态变更（start / error / done）不再单独开事务写库，
+而是交给 ExecutionStatusRecorder：
+- 同一执行在一个周期内的多次变更合并为一条 UPDATE（后到的字段覆盖先到的）
+- 后台任务按 flush_interval_seconds 把所有待写执行放在同一个事务中批量写库
+- 待写执行数达到 max_batch_size 或出现终态（completed_at）时提前唤醒写库
+- 写库失败时把该批变更合并回待写队列，下个周期重试
+- 应用关闭时 stop() 保证剩余变更写库
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import update
+
+from hatchify.business.db.session import AsyncSessionLocal
+from hatchify.business.models.execution import ExecutionTable
+from hatchify.common.domain.enums.execution_status import ExecutionStatus
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, ExecutionRecorderSettings
+
+
+class ExecutionStatusRecorder:
+    """执行状态批量写回（单例模式）"""
+
+    def __init__(self, settings: Optional[ExecutionRecorderSettings] = None):
+        self.settings = settings or ExecutionRecorderSettings()
+        # execution_id -> 待写字段
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        if not self.settings.write_behind or self._task is not None:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="execution-status-recorder")
+        logger.info(f"Execution status recorder started, interval={self.settings.flush_interval_seconds}s")
+
+    async def stop(self) -> None:
+        """停止后台任务并写入剩余变更"""
+        task, self._task = self._task, None
+        if task is not None:
+            # 不取消进行中的写库，等待后台任务在本轮结束后退出
+            self._stopping = True
+            self._wakeup.set()
+            await task
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {len(self._pending)} execution status updates on shutdown: "
+                         f"{type(e).__name__}: {e}")
+
+    async def record(
+            self,
+            execution_id: str,
+            status: Optional[ExecutionStatus] = None,
+            error: Optional[str] = None,
+            started_at: Optional[datetime] = None,
+            completed_at: Optional[datetime] = None,
+    ) -> None:
+        """记录一次状态变更，只更新提供的字段"""
+        values = {
+            key: value for key, value in (
+                ("status", status),
+                ("error", error),
+                ("started_at", started_at),
+                ("completed_at", completed_at),
+            ) if value is not None
+        }
+        if not values:
+            return
+
+        self._pending.setdefault(execution_id, {}).update(values)
+        metrics.inc("execution_status_recorded")
+
+        if self._task is None:
+            # 未启用 write-behind（或后台任务未启动）时直接写库
+            await self.flush()
+        elif completed_at is not None or len(self._pending) >= self.settings.max_batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.settings.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution status flush failed: {type(e).__name__}: {e}")
+
+    async def flush(self) -> int:
+        """
+        在一个事务中写入所有待写变更
+
+        Returns:
+            写入的执行数量
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+
+            start = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as session:
+                    missing = []
+                    for execution_id, values in batch.items():
+                        result = await session.execute(
+                            update(ExecutionTable)
+                            .where(ExecutionTable.id == execution_id)
+                            .values(**values)
+                        )
+                        if result.rowcount == 0:
+                            missing.append(execution_id)
+                    await session.commit()
+            except Exception:
+                # 失败的变更放回队列，已有的更新变更优先
+                for execution_id, values in batch.items():
+                    self._pending[execution_id] = {**values, **self._pending.get(execution_id, {})}
+                metrics.inc("execution_status_flush_errors")
+                raise
+
+            metrics.observe("execution_status_flush_seconds", time.perf_counter() - start)
+            metrics.observe("execution_status_flush_batch", len(batch))
+            for execution_id in missing:
+                logger.warning(f"Execution {execution_id} not found in database")
+            logger.debug(f"Flushed status of {len(batch)} executions")
+            return len(batch)
+
+
+execution_status_recorder = ExecutionStatusRecorder(get_hatchify_settings().execution_recorder)
@@ -0,0 +1,337 @@
+"""
+执行注册表
+
+StreamManager 与 EventStore 只保存在当前进程中，uvicorn 以多个 worker 运行时，
+订阅请求落到其他 worker 会找不到执行。ExecutionRegistry 记录执行归属的 worker，
+并提供跨 worker 的事件订阅与取消：
+- local: 单进程部署，所有执行都在当前进程，不做任何共享（默认）
+- sqlite: 与事件日志（hatchify.event_store.log_file）共用 SQLite 文件，
+  同一台机器上的多个 worker 进程通过它共享执行归属
+  - 执行所在 worker 按 poll_interval 把事件写入事件日志，其他 worker 轮询事件日志转发给订阅者
+  - 其他 worker 收到的取消请求写入注册表，由执行所在 worker 取消执行
+  - worker 定期写入心跳，超过 worker_timeout 没有心跳的 worker 上的执行视为已中断
+  - 所有 SQLite 操作在专用线程中按提交顺序执行，不阻塞事件循环
+"""
+import abc
+import asyncio
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, ExecutionRegistrySettings
+from hatchify.core.manager.event_log import get_event_log
+from hatchify.core.manager.event_manager import EventStore, interrupted_events
+
+# 取消回调：(execution_id, reason) -> 是否取消成功
+CancelCallback = Callable[[str, str], Awaitable[bool]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registry_worker (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registry_execution (
+    execution_id TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    registered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_registry_execution_worker ON registry_execution (worker_id);
+CREATE TABLE IF NOT EXISTS registry_cancel (
+    execution_id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    requested_at REAL NOT NULL
+);
+"""
+
+
+class ExecutionRegistry(metaclass=abc.ABCMeta):
+    """执行注册表"""
+
+    def __init__(self, settings: Optional[ExecutionRegistrySettings] = None):
+        self.settings = settings or ExecutionRegistrySettings()
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    @property
+    def is_shared(self) -> bool:
+        """是否与其他 worker 共享执行"""
+        return False
+
+    async def start(self, on_cancel: Optional[CancelCallback] = None) -> None:
+        """启动后台同步，on_cancel 用于处理其他 worker 提交的取消请求"""
+
+    async def stop(self) -> None:
+        """停止后台同步并移除当前 worker 的登记"""
+
+    async def register(self, execution_id: str) -> None:
+        """登记当前 worker 上的执行"""
+
+    async def unregister(self, execution_id: str) -> None:
+        """执行 handler 释放后移除登记"""
+
+    async def owner(self, execution_id: str) -> Optional[str]:
+        """执行所在的存活 worker，不存在时返回 None"""
+        return None
+
+    async def is_remote(self, execution_id: str) -> bool:
+        """执行是否在其他存活 worker 上运行"""
+        owner = await self.owner(execution_id)
+        return owner is not None and owner != self.worker_id
+
+    async def request_cancel(self, execution_id: str, reason: str) -> bool:
+        """请求取消其他 worker 上的执行，返回是否已提交"""
+        return False
+
+    def subscribe_remote(
+            self,
+            execution_id: str,
+            last_event_id: Optional[str] = None,
+            ping_interval: float = 15,
+            ping_factory: Optional[Callable[[], StreamEvent]] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """订阅其他 worker 上执行的事件，收到 done 事件后结束"""
+        raise NotImplementedError(f"{type(self).__name__} does not support remote executions")
+
+
+class LocalExecutionRegistry(ExecutionRegistry):
+    """单进程注册表，所有执行都在当前进程"""
+
+
+class SQLiteExecutionRegistry(ExecutionRegistry):
+    """基于 SQLite 的注册表，供同一台机器上的多个 worker 进程共享
+
+    SQLite 操作通过单线程 executor 执行：不阻塞事件循环，同一执行的登记与移除按调用顺序生效。
+    连接使用较短的 sqlite_timeout，其他进程长时间持有写锁时快速失败，由下一轮重试。
+    """
+
+    def __init__(self, path: str, settings: Optional[ExecutionRegistrySettings] = None):
+        super().__init__(settings)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=self.settings.sqlite_timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="execution-registry")
+        self._task: Optional[asyncio.Task] = None
+        self._on_cancel: Optional[CancelCallback] = None
+
+    @property
+    def is_shared(self) -> bool:
+        return True
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self, on_cancel: Optional[CancelCallback] = None) -> None:
+        if self._task is not None:
+            return
+        self._on_cancel = on_cancel
+        await self._call(self._heartbeat)
+        self._task = asyncio.create_task(self._run(), name="execution-registry")
+        logger.info(f"Execution registry started: worker={self.worker_id}, path={self.path}")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self._call(self._remove_worker)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to remove worker {self.worker_id} from execution registry: {e}")
+        await self._call(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _remove_worker(self) -> None:
+        # 当前 worker 上的执行随进程退出中断，移除登记后其他 worker 按已中断处理
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM registry_execution WHERE worker_id = ?", (self.worker_id,))
+            self._conn.execute("DELETE FROM registry_worker WHERE worker_id = ?", (self.worker_id,))
+
+    def _close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def register(self, execution_id: str) -> None:
+        try:
+            await self._call(self._register, execution_id)
+        except sqlite3.Error as e:
+            # 登记失败只影响其他 worker 的订阅与取消，不影响当前执行
+            metrics.inc("execution_registry_errors", op="register")
+            logger.error(f"Failed to register execution {execution_id}: {e}")
+
+    async def unregister(self, execution_id: str) -> None:
+        try:
+            await self._call(self._unregister, execution_id)
+        except sqlite3.Error as e:
+            # 未移除的登记在当前 worker 停止心跳后失效
+            metrics.inc("execution_registry_errors", op="unregister")
+            logger.error(f"Failed to unregister execution {execution_id}: {e}")
+
+    async def owner(self, execution_id: str) -> Optional[str]:
+        return await self._call(self._owner, execution_id)
+
+    async def request_cancel(self, execution_id: str, reason: str) -> bool:
+        if not await self.is_remote(execution_id):
+            return False
+        await self._call(self._request_cancel, execution_id, reason)
+        metrics.inc("execution_registry_cancel_requested")
+        return True
+
+    def _register(self, execution_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO registry_execution (execution_id, worker_id, registered_at) VALUES (?, ?, ?)",
+                (execution_id, self.worker_id, time.time()),
+            )
+
+    def _unregister(self, execution_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM registry_execution WHERE execution_id = ? AND worker_id = ?",
+                (execution_id, self.worker_id),
+            )
+            self._conn.execute("DELETE FROM registry_cancel WHERE execution_id = ?", (execution_id,))
+
+    def _owner(self, execution_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.worker_id FROM registry_execution e "
+                "JOIN registry_worker w ON w.worker_id = e.worker_id "
+                "WHERE e.execution_id = ? AND w.heartbeat_at >= ?",
+                (execution_id, time.time() - self.settings.worker_timeout),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _request_cancel(self, execution_id: str, reason: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO registry_cancel (execution_id, reason, requested_at) VALUES (?, ?, ?)",
+                (execution_id, reason, time.time()),
+            )
+
+    def _heartbeat(self) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO registry_worker (worker_id, heartbeat_at) VALUES (?, ?)",
+                (self.worker_id, now),
+            )
+            # 清理异常退出（未执行 stop）的 worker 留下的登记
+            stale = now - self.settings.worker_timeout * 10
+            self._conn.execute(
+                "DELETE FROM registry_execution WHERE worker_id IN "
+                "(SELECT worker_id FROM registry_worker WHERE heartbeat_at < ?)",
+                (stale,),
+            )
+            self._conn.execute("DELETE FROM registry_worker WHERE heartbeat_at < ?", (stale,))
+
+    def _take_cancel_requests(self) -> List[Tuple[str, str]]:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT c.execution_id, c.reason FROM registry_cancel c "
+                "JOIN registry_execution e ON e.execution_id = c.execution_id WHERE e.worker_id = ?",
+                (self.worker_id,),
+            ).fetchall()
+            for execution_id, _ in rows:
+                self._conn.execute("DELETE FROM registry_cancel WHERE execution_id = ?", (execution_id,))
+        return rows
+
+    async def _run(self) -> None:
+        last_heartbeat = time.monotonic()
+        while True:
+            await asyncio.sleep(self.settings.poll_interval)
+            try:
+                if time.monotonic() - last_heartbeat >= self.settings.heartbeat_interval:
+                    await self._call(self._heartbeat)
+                    last_heartbeat = time.monotonic()
+                # 其他 worker 只能从事件日志读取事件，这里限制事件落盘的延迟
+                await EventStore.flush_all()
+                for execution_id, reason in await self._call(self._take_cancel_requests):
+                    logger.info(f"Received cancel request for {execution_id} from another worker")
+                    if self._on_cancel is not None:
+                        await self._on_cancel(execution_id, reason)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution registry sync failed: {type(e).__name__}: {e}")
+
+    async def subscribe_remote(
+            self,
+            execution_id: str,
+            last_event_id: Optional[str] = None,
+            ping_interval: float = 15,
+            ping_factory: Optional[Callable[[], StreamEvent]] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        event_log = get_event_log()
+        seq = 0
+        if last_event_id:
+            found = await asyncio.to_thread(event_log.find_seq, execution_id, last_event_id)
+            seq = 0 if found is None else found + 1
+
+        metrics.add_gauge("execution_registry_remote_subscribers", 1)
+        try:
+            idle_since = time.monotonic()
+            completed = False
+            while True:
+                rows = await asyncio.to_thread(event_log.read_range, execution_id, seq, sys.maxsize)
+                for row_seq, event in rows:
+                    seq = row_seq + 1
+                    yield event
+                    if event.type == "done":
+                        return
+                if rows:
+                    idle_since = time.monotonic()
+                    continue
+                if completed:
+                    return
+
+                try:
+                    owner = await self.owner(execution_id)
+                except sqlite3.Error as e:
+                    # 注册表暂时不可用（如写锁超时），下一轮再检查
+                    logger.warning(f"Failed to check owner of {execution_id}: {e}")
+                    owner = self.worker_id
+                if owner is None:
+                    # 执行已从所在 worker 释放：正常结束时事件日志中已有 done，再读取一轮；否则视为中断
+                    meta = await asyncio.to_thread(event_log.load_meta, execution_id)
+                    if meta is not None and meta.completed:
+                        completed = True
+                        continue
+                    for event in interrupted_events(execution_id):
+                        yield event
+                    return
+
+                await asyncio.sleep(self.settings.poll_interval)
+                if ping_factory and time.monotonic() - idle_since >= ping_interval:
+                    idle_since = time.monotonic()
+                    yield ping_factory()
+        finally:
+            metrics.add_gauge("execution_registry_remote_subscribers", -1)
+
+
+def create_execution_registry(settings: ExecutionRegistrySettings) -> ExecutionRegistry:
+    if settings.backend == "sqlite":
+        log_file = get_hatchify_settings().event_store.log_file
+        if not log_file:
+            raise ValueError("hatchify.execution_registry.backend=sqlite requires hatchify.event_store.log_file")
+        # 先打开事件日志，确保目录存在
+        get_event_log()
+        return SQLiteExecutionRegistry(log_file, settings)
+    return LocalExecutionRegistry(settings)
+
+
+execution_registry = create_execution_registry(get_hatchify_settings().execution_registry)
@@ -0,0 +1,129 @@
+"""
+GraphTemplate 缓存管理器
+
+按 graph_id 缓存编译后的 GraphTemplate，支持：
+- 以 (graph_id, spec_hash) 命中缓存，spec 变化时自动重新编译
+- Graph spec 更新时主动失效
+- LRU 淘汰，限制缓存的 Graph 数量
+- 编译在线程中执行且不持有全局锁，同一 (graph_id, spec_hash) 的并发请求共享一次编译
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from hatchify.common.domain.entity.graph_spec import GraphSpec
+from hatchify.core.graph.dynamic_graph_builder import DynamicGraphBuilder
+from hatchify.core.graph.graph_template import GraphTemplate
+from hatchify.core.manager.agent_pool_manager import agent_pool
+from hatchify.core.utils.schema_utils import compute_spec_hash
+
+
+class GraphTemplateManager:
+    """
+    全局 GraphTemplate 缓存（单例模式）
+
+    模板本身不可变，每次执行通过 DynamicGraphBuilder.instantiate 生成独立的 Graph 实例
+    """
+
+    # 类级别存储
+    _templates: "OrderedDict[str, GraphTemplate]" = OrderedDict()
+    # 进行中的编译：(graph_id, spec_hash) -> 编译任务
+    _compiling: Dict[Tuple[str, str], "asyncio.Task[GraphTemplate]"] = {}
+    _lock = asyncio.Lock()
+    max_templates: int = 128
+
+    @classmethod
+    async def get_or_compile(
+            cls,
+            graph_id: str,
+            graph_spec: GraphSpec,
+            builder: DynamicGraphBuilder,
+    ) -> GraphTemplate:
+        """获取 Graph 的编译模板，不存在或 spec 已变化时使用 builder 重新编译"""
+        spec_hash = compute_spec_hash(graph_spec)
+        async with cls._lock:
+            template = cls._templates.get(graph_id)
+            if template and template.spec_hash == spec_hash:
+                cls._templates.move_to_end(graph_id)
+                return template
+
+            key = (graph_id, spec_hash)
+            task = cls._compiling.get(key)
+            if task is None:
+                task = asyncio.create_task(
+                    cls._compile(graph_id, graph_spec, spec_hash, builder),
+                    name=f"compile-template-{graph_id}",
+                )
+                cls._compiling[key] = task
+                task.add_done_callback(lambda done: cls._on_compiled(key, done))
+
+        # 调用方取消不影响其他等待同一编译的请求
+        return await asyncio.shield(task)
+
+    @classmethod
+    def _on_compiled(cls, key: Tuple[str, str], task: "asyncio.Task[GraphTemplate]") -> None:
+        cls._compiling.pop(key, None)
+        # 所有等待方都已取消时避免 "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    @classmethod
+    async def _compile(
+            cls,
+            graph_id: str,
+            graph_spec: GraphSpec,
+            spec_hash: str,
+            builder: DynamicGraphBuilder,
+    ) -> GraphTemplate:
+        template = await asyncio.to_thread(builder.compile_template, graph_spec, spec_hash=spec_hash)
+        async with cls._lock:
+            stale = cls._templates.get(graph_id)
+            if stale is not None and stale.spec_hash == spec_hash:
+                stale = None
+            cls._templates[graph_id] = template
+            cls._templates.move_to_end(graph_id)
+            logger.info(f"Compiled graph template: {graph_id} (spec_hash={spec_hash[:12]})")
+            if stale:
+                agent_pool.invalidate(stale.spec_hash)
+
+            while len(cls._templates) > cls.max_templates:
+                evicted_id, evicted = cls._templates.popitem(last=False)
+                agent_pool.invalidate(evicted.spec_hash)
+                logger.debug(f"Evicted graph template: {evicted_id}")
+
+            return template
+
+    @classmethod
+    async def get(cls, graph_id: str) -> Optional[GraphTemplate]:
+        """获取已缓存的模板"""
+        async with cls._lock:
+            return cls._templates.get(graph_id)
+
+    @classmethod
+    async def invalidate(cls, graph_id: str) -> bool:
+        """使指定 Graph 的模板失效"""
+        async with cls._lock:
+            template = cls._templates.pop(graph_id, None)
+            if template is not None:
+                agent_pool.invalidate(template.spec_hash)
+                logger.info(f"Invalidated graph template: {graph_id}")
+                return True
+            return False
+
+    @classmethod
+    async def count(cls) -> int:
+        """获取缓存的模板数量"""
+        async with cls._lock:
+            return len(cls._templates)
+
+    @classmethod
+    async def clear(cls):
+        """清空所有模板"""
+        async with cls._lock:
+            count = len(cls._templates)
+            for template in cls._templates.values():
+                agent_pool.invalidate(template.spec_hash)
+            cls._templates.clear()
+            logger.warning(f"Cleared all {count} graph templates")
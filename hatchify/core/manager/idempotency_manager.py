@@ -0,0 +1,240 @@
+"""
+Webhook 幂等键与结果缓存
+
+客户端超时重试时，同一个请求会重复执行整个 Graph：
+- IdempotencyManager: 携带 Idempotency-Key 请求头的调用按 (endpoint, graph_id, key) 去重
+  - 首个请求执行期间，当前进程内的重复请求等待并共享它的结果；首个请求被取消时等待者重新检查并执行
+  - 完成后结果写入 idempotency_record 表，TTL 内的重复请求直接返回保存的结果
+  - 执行失败时删除记录，重试会重新执行
+  - 相同的 Key 携带不同的请求内容时返回 422；其他进程中仍在执行时返回 409
+  - 执行中的记录在 in_progress_timeout_seconds 后过期，避免进程异常退出后 Key 一直不可用
+- ResultCache: 可选的确定性结果缓存，按 (graph_id, spec 哈希, 规范化输入, 文件内容哈希) 缓存 invoke 结果
+- 过期记录由 ResourceReaper 定时清理
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from hatchify.business.db.session import AsyncSessionLocal
+from hatchify.business.models.idempotency_record import IdempotencyRecordTable
+from hatchify.business.models.result_cache import ResultCacheTable
+from hatchify.common.domain.entity.graph_execute_data import GraphExecuteData
+from hatchify.common.domain.enums.idempotency_status import IdempotencyStatus
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, IdempotencySettings
+from hatchify.utils.canonical_hash import canonical_hash
+
+
+class IdempotencyConflict(Exception):
+    """幂等键冲突，status_code 为 409（仍在执行）或 422（请求内容不一致）"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def compute_request_hash(spec_hash: str, execute_data: GraphExecuteData) -> str:
+    """请求内容哈希：spec 哈希 + 规范化 JSON 输入 + 文件内容哈希（没有内容哈希时使用存储 key）"""
+    return canonical_hash({
+        "spec": spec_hash,
+        "jsons": execute_data.jsons,
+        "files": {
+            field: [file.content_hash or file.key for file in files]
+            for field, files in execute_data.files.items()
+        },
+    })
+
+
+class IdempotencyManager:
+    """幂等请求管理器（单例模式）"""
+
+    def __init__(self, settings: Optional[IdempotencySettings] = None):
+        self.settings = settings or IdempotencySettings()
+        # record_id -> (请求哈希, 首个请求的结果)
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def run_once(
+            self,
+            endpoint: str,
+            graph_id: str,
+            idempotency_key: Optional[str],
+            request_hash: str,
+            run: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        同一个 Idempotency-Key 只执行一次 run，重复请求返回相同的结果
+
+        Args:
+            endpoint: 接口名称，不同接口的 Key 互不影响
+            graph_id: Graph ID
+            idempotency_key: 请求头中的 Idempotency-Key，为空时直接执行
+            request_hash: compute_request_hash 计算的请求内容哈希
+            run: 实际执行，返回可 JSON 序列化的结果
+
+        Raises:
+            IdempotencyConflict: 相同的 Key 请求内容不一致（422）或在其他进程中仍在执行（409）
+        """
+        if not idempotency_key or not self.settings.enabled:
+            return await run()
+
+        record_id = canonical_hash([endpoint, graph_id, idempotency_key])
+        while (inflight := self._inflight.get(record_id)) is not None:
+            self._check_request_hash(inflight[0], request_hash)
+            metrics.inc("idempotency_hits", state="in_flight")
+            try:
+                return await asyncio.shield(inflight[1])
+            except asyncio.CancelledError:
+                # 当前请求自身被取消时向上抛出；首个请求被取消（如客户端断开）时，
+                # 它的记录已删除，重新检查后由当前请求执行
+                if not inflight[1].cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # 没有重复请求等待时避免 "Future exception was never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[record_id] = (request_hash, future)
+        try:
+            result = await self._run_recorded(record_id, endpoint, graph_id, idempotency_key, request_hash, run)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(record_id, None)
+
+    async def _run_recorded(
+            self,
+            record_id: str,
+            endpoint: str,
+            graph_id: str,
+            idempotency_key: str,
+            request_hash: str,
+            run: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        async with AsyncSessionLocal() as session:
+            record = await session.get(IdempotencyRecordTable, record_id)
+            if record is not None and record.expires_at < time.time():
+                await session.delete(record)
+                await session.commit()
+                record = None
+
+            if record is not None:
+                self._check_request_hash(record.request_hash, request_hash)
+                if record.status == IdempotencyStatus.COMPLETED:
+                    metrics.inc("idempotency_hits", state="completed")
+                    return record.response
+                raise IdempotencyConflict(409, "A request with the same Idempotency-Key is still in progress")
+
+            session.add(IdempotencyRecordTable(
+                id=record_id,
+                endpoint=endpoint,
+                graph_id=graph_id,
+                idempotency_key=idempotency_key,
+                request_hash=request_hash,
+                status=IdempotencyStatus.IN_PROGRESS,
+                expires_at=time.time() + self.settings.in_progress_timeout_seconds,
+            ))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # 其他进程同时提交了相同的 Key
+                raise IdempotencyConflict(409, "A request with the same Idempotency-Key is still in progress")
+
+        try:
+            result = await run()
+        except BaseException:
+            # 失败（或取消）的请求不保存结果，重试时重新执行
+            await self._discard(record_id)
+            raise
+
+        async with AsyncSessionLocal() as session:
+            record = await session.get(IdempotencyRecordTable, record_id)
+            if record is not None:
+                record.status = IdempotencyStatus.COMPLETED
+                record.response = result
+                record.expires_at = time.time() + self.settings.ttl_seconds
+                await session.commit()
+        metrics.inc("idempotency_recorded", endpoint=endpoint)
+        return result
+
+    @staticmethod
+    def _check_request_hash(expected: str, actual: str) -> None:
+        if expected != actual:
+            metrics.inc("idempotency_conflicts")
+            raise IdempotencyConflict(422, "Idempotency-Key was already used with a different request")
+
+    @staticmethod
+    async def _discard(record_id: str) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(delete(IdempotencyRecordTable).where(IdempotencyRecordTable.id == record_id))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to discard idempotency record {record_id}: {type(e).__name__}: {e}")
+
+    @staticmethod
+    async def purge_expired() -> int:
+        """删除过期的幂等记录与结果缓存，返回删除的记录数"""
+        now = time.time()
+        async with AsyncSessionLocal() as session:
+            records = await session.execute(
+                delete(IdempotencyRecordTable).where(IdempotencyRecordTable.expires_at < now)
+            )
+            cached = await session.execute(delete(ResultCacheTable).where(ResultCacheTable.expires_at < now))
+            await session.commit()
+        return records.rowcount + cached.rowcount
+
+
+class ResultCache:
+    """确定性结果缓存（单例模式），默认关闭"""
+
+    def __init__(self, settings: Optional[IdempotencySettings] = None):
+        self.settings = settings or IdempotencySettings()
+
+    @staticmethod
+    def _cache_id(graph_id: str, request_hash: str) -> str:
+        # request_hash 只包含 spec 与输入，不同 Graph 的 spec 可能完全相同
+        return canonical_hash([graph_id, request_hash])
+
+    def is_enabled(self, graph_id: str) -> bool:
+        graph_ids = self.settings.result_cache_graph_ids
+        return self.settings.result_cache_enabled and (not graph_ids or graph_id in graph_ids)
+
+    async def get(self, graph_id: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        if not self.is_enabled(graph_id):
+            return None
+        async with AsyncSessionLocal() as session:
+            cached = await session.get(ResultCacheTable, self._cache_id(graph_id, request_hash))
+        if cached is None or cached.expires_at < time.time():
+            metrics.inc("result_cache_misses")
+            return None
+        metrics.inc("result_cache_hits")
+        return cached.result
+
+    async def put(self, graph_id: str, request_hash: str, result: Dict[str, Any]) -> None:
+        if not self.is_enabled(graph_id):
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.merge(ResultCacheTable(
+                    id=self._cache_id(graph_id, request_hash),
+                    graph_id=graph_id,
+                    result=result,
+                    expires_at=time.time() + self.settings.result_cache_ttl_seconds,
+                ))
+                await session.commit()
+        except Exception as e:
+            # 缓存写入失败不影响本次调用
+            logger.warning(f"Failed to cache result of {graph_id}: {type(e).__name__}: {e}")
+
+
+idempotency_manager = IdempotencyManager(get_hatchify_settings().idempotency)
+result_cache = ResultCache(get_hatchify_settings().idempotency)
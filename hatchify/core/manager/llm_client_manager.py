@@ -0,0 +1,234 @@
+"""
+LLM 客户端连接池
+
+按 (family, base_url, api_key 哈希, 模型参数) 复用 Model 实例，并让同一 provider 端点
+的所有 Model 共享同一个 httpx.AsyncClient，从而在 Agent 与多次执行之间复用
+keep-alive 连接和 TLS 会话。
+
+- openai: 通过 client_args["http_client"] 注入共享连接池。strands 每次请求都会
+  `async with openai.AsyncOpenAI(...)`，退出时会关闭 http_client，因此共享客户端的
+  aclose() 为空操作，真正的关闭由 close() 在应用退出时完成。
+- gemini: 通过 http_options.httpx_async_client 注入共享连接池。genai.Client 不接受 base_url 参数，
+  无论是否启用连接池都移到 http_options.base_url 中。
+- 其他（LiteLLM）: LiteLLM 内部已按参数缓存 HTTP 客户端，这里只复用 Model 实例。
+
+池中的 Model 数量不超过 max_models，按 LRU 淘汰（如 API Key 轮换、模型参数修改后旧的组合不再使用）。
+被淘汰的 Model 可能仍被 Agent 引用，端点的共享客户端在该端点没有池中 Model、且淘汰的 Model
+都已被回收后，才由 ResourceReaper 调用 close_unused() 关闭。
+
+httpx 客户端的连接绑定在首次使用它的事件循环上，连接池只服务应用主事件循环（启动时 bind_loop）。
+在其他事件循环中创建的 Model 不经过连接池；在线程中编译模板（没有运行中的事件循环）时，
+Model 仍交给主事件循环使用，照常从连接池获取。
+"""
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import httpx
+import openai
+from loguru import logger
+from strands.models import Model
+
+from hatchify.common.settings.settings import get_hatchify_settings, LLMClientPoolSettings
+from hatchify.utils.canonical_hash import canonical_hash
+
+
+class _SharedOpenAIHttpClient(openai.DefaultAsyncHttpxClient):
+    """跨 AsyncOpenAI 实例共享的 httpx 客户端，忽略单次请求结束时的关闭"""
+
+    async def aclose(self) -> None:
+        return None
+
+    async def close_pool(self) -> None:
+        await super().aclose()
+
+
+class _SharedHttpClient(httpx.AsyncClient):
+    """跨 SDK 客户端共享的 httpx 客户端，忽略单次请求结束时的关闭"""
+
+    async def aclose(self) -> None:
+        return None
+
+    async def close_pool(self) -> None:
+        await super().aclose()
+
+
+EndpointKey = Tuple[str, Optional[str], Optional[str]]
+
+
+class LLMClientPool:
+    """LLM Model / HTTP 连接池（单例模式）
+
+    compile_template 在线程中执行，因此使用 threading.Lock 保护。
+    共享的 httpx 客户端只在 bind_loop 绑定的事件循环中使用。
+    """
+
+    def __init__(self, settings: Optional[LLMClientPoolSettings] = None):
+        self.settings = settings or LLMClientPoolSettings()
+        self._models: "OrderedDict[Hashable, Model]" = OrderedDict()
+        self._http_clients: Dict[EndpointKey, httpx.AsyncClient] = {}
+        # 端点上创建过且仍存活的 Model（包括已淘汰但仍被 Agent 引用的）
+        self._endpoint_models: Dict[EndpointKey, "weakref.WeakSet[Model]"] = {}
+        # 存在无法跟踪引用的 Model 的端点，客户端保留到应用退出
+        self._pinned_endpoints: Set[EndpointKey] = set()
+        self._lock = threading.Lock()
+        # 共享客户端所属的事件循环，未绑定时由首次在事件循环中的调用绑定
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """绑定使用共享客户端的事件循环，应用启动时调用"""
+        self._loop = loop
+
+    def _on_bound_loop(self) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 线程中编译，Model 由主事件循环使用
+            return True
+        if self._loop is None:
+            self._loop = loop
+        return loop is self._loop
+
+    @staticmethod
+    def normalize_client_args(family: str, client_args: Dict[str, Any]) -> Dict[str, Any]:
+        """按 family 规范化客户端参数，启用与未启用连接池时端点配置一致"""
+        normalized = dict(client_args)
+        if family == "gemini" and "base_url" in normalized:
+            # genai.Client 不接受 base_url 参数，需要放到 http_options 中
+            normalized["http_options"] = {"base_url": normalized.pop("base_url")}
+        return normalized
+
+    @staticmethod
+    def endpoint_key(family: str, client_args: Dict[str, Any]) -> EndpointKey:
+        api_key = client_args.get("api_key")
+        api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+        return family, client_args.get("base_url"), api_key_hash
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive_connections,
+            keepalive_expiry=self.settings.keepalive_expiry,
+        )
+
+    def _get_http_client(self, endpoint: EndpointKey) -> httpx.AsyncClient:
+        client = self._http_clients.get(endpoint)
+        if client is None:
+            if endpoint[0] == "openai":
+                client = _SharedOpenAIHttpClient(limits=self._limits())
+            else:
+                client = _SharedHttpClient(limits=self._limits(), timeout=self.settings.timeout)
+            self._http_clients[endpoint] = client
+            logger.debug(f"Created pooled http client: family={endpoint[0]}, base_url={endpoint[1]}")
+        return client
+
+    def get_or_create(
+            self,
+            family: str,
+            client_args: Dict[str, Any],
+            model_params: Dict[str, Any],
+            factory: Callable[[Dict[str, Any]], Model],
+    ) -> Model:
+        """获取池中的 Model，不存在时使用 factory(client_args) 创建
+
+        Args:
+            family: provider family（openai / gemini / 其他走 LiteLLM）
+            client_args: 原始客户端参数（api_key / base_url）
+            model_params: 决定 Model 配置的参数（model_id、max_tokens 等）
+            factory: 根据最终 client_args 创建 Model 的函数
+        """
+        if not self.settings.enabled:
+            return factory(self.normalize_client_args(family, client_args))
+        if not self._on_bound_loop():
+            logger.debug(f"Model created outside the pooled event loop, skip pooling: family={family}")
+            return factory(self.normalize_client_args(family, client_args))
+
+        endpoint = self.endpoint_key(family, client_args)
+        model_key = (endpoint, canonical_hash(model_params))
+
+        with self._lock:
+            model = self._models.get(model_key)
+            if model is not None:
+                self._models.move_to_end(model_key)
+                return model
+
+            pooled_args = self.normalize_client_args(family, client_args)
+            match family:
+                case "openai":
+                    pooled_args["http_client"] = self._get_http_client(endpoint)
+                case "gemini":
+                    http_options = pooled_args.setdefault("http_options", {})
+                    http_options["httpx_async_client"] = self._get_http_client(endpoint)
+
+            model = factory(pooled_args)
+            self._models[model_key] = model
+            if endpoint in self._http_clients:
+                self._track(endpoint, model)
+            while len(self._models) > self.settings.max_models:
+                evicted_key, _ = self._models.popitem(last=False)
+                logger.debug(f"Evicted pooled model: family={evicted_key[0][0]}, base_url={evicted_key[0][1]}")
+            return model
+
+    def _track(self, endpoint: EndpointKey, model: Model) -> None:
+        try:
+            self._endpoint_models.setdefault(endpoint, weakref.WeakSet()).add(model)
+        except TypeError:
+            logger.warning(f"Model {type(model).__name__} does not support weakref, http client kept until shutdown")
+            self._pinned_endpoints.add(endpoint)
+
+    def _unused_endpoints(self) -> List[EndpointKey]:
+        in_pool = {model_key[0] for model_key in self._models}
+        return [
+            endpoint for endpoint in self._http_clients
+            if endpoint not in in_pool
+            and endpoint not in self._pinned_endpoints
+            and not self._endpoint_models.get(endpoint)
+        ]
+
+    async def close_unused(self) -> int:
+        """关闭不再被任何 Model 使用的端点客户端，返回关闭数量"""
+        with self._lock:
+            clients = []
+            for endpoint in self._unused_endpoints():
+                clients.append(self._http_clients.pop(endpoint))
+                self._endpoint_models.pop(endpoint, None)
+
+        for client in clients:
+            try:
+                await client.close_pool()
+            except Exception as e:
+                logger.warning(f"Failed to close pooled http client: {type(e).__name__}: {e}")
+        if clients:
+            logger.info(f"Closed {len(clients)} unused pooled LLM http clients")
+        return len(clients)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"models": len(self._models), "http_clients": len(self._http_clients)}
+
+    async def close(self) -> None:
+        """关闭所有共享连接，应用退出时调用"""
+        with self._lock:
+            clients = list(self._http_clients.values())
+            self._http_clients.clear()
+            self._endpoint_models.clear()
+            self._pinned_endpoints.clear()
+            self._models.clear()
+            self._loop = None
+
+        for client in clients:
+            try:
+                await client.close_pool()
+            except Exception as e:
+                logger.warning(f"Failed to close pooled http client: {type(e).__name__}: {e}")
+        logger.info(f"Closed {len(clients)} pooled LLM http clients")
+
+
+llm_client_pool = LLMClientPool(get_hatchify_settings().llm_client_pool)
+
+
+async def close_llm_client_pool():
+    await llm_client_pool.close()
@@ -9,9 +9,9 @@ from __future__ import annotations
 
 import tomllib
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from hatchify.common.constants.constants import Constants
 from hatchify.common.domain.entity.model_card import ProviderCard, ModelCard
@@ -21,7 +21,21 @@ class ModelCardManager(BaseModel):
     default_provider: str
     providers: Dict[str, ProviderCard]
 
+    # 查找索引，在初始化时构建
+    # (provider_id, model_id) -> enabled 模型
+    _model_index: Dict[Tuple[str, str], ModelCard] = PrivateAttr(default_factory=dict)
+    # model_id -> 所有 enabled providers 中的 (provider_id, 候选模型)，按 provider priority 排序
+    _model_candidates: Dict[str, List[Tuple[str, ModelCard]]] = PrivateAttr(default_factory=dict)
+    # 按 priority 排序的 enabled provider id
+    _enabled_provider_ids: List[str] = PrivateAttr(default_factory=list)
+    _all_models: List[ModelCard] = PrivateAttr(default_factory=list)
+    _models_prompt: str = PrivateAttr(default="None available")
+
     def model_post_init(self, __context):
+        self._validate_default_provider()
+        self._build_indexes()
+
+    def _validate_default_provider(self):
         if self.default_provider not in self.providers:
             raise ValueError(
                 f"default_provider '{self.default_provider}' "
@@ -32,6 +46,37 @@ class ModelCardManager(BaseModel):
                 f"default_provider '{self.default_provider}' is not enabled"
             )
 
+    def _build_indexes(self):
+        """构建模型查找索引和预渲染的提示词"""
+        enabled_providers = [
+            (p_id, provider)
+            for p_id, provider in self.providers.items()
+            if provider.enabled
+        ]
+        # 按 priority 排序（数字越小优先级越高）
+        enabled_providers.sort(key=lambda x: x[1].priority)
+
+        model_index: Dict[Tuple[str, str], ModelCard] = {}
+        model_candidates: Dict[str, List[Tuple[str, ModelCard]]] = {}
+        all_models: List[ModelCard] = []
+        for p_id, provider in enabled_providers:
+            for m in provider.models:
+                if not m.enabled:
+                    continue
+                all_models.append(m)
+                if (p_id, m.id) not in model_index:
+                    model_index[(p_id, m.id)] = m
+                    model_candidates.setdefault(m.id, []).append((p_id, m))
+
+        self._model_index = model_index
+        self._model_candidates = model_candidates
+        self._enabled_provider_ids = [p_id for p_id, _ in enabled_providers]
+        self._all_models = all_models
+        self._models_prompt = "\n".join(
+            f"- {model.id}: {model.description} [provider: {model.provider_id}]"
+            for model in all_models
+        ) or "None available"
+
     def find_model(self, model_id: str, provider_id: Optional[str] = None) -> ModelCard:
         """严格查找模型：只在指定的 provider 中查找，找不到直接抛异常"""
         if provider_id is None:
@@ -39,10 +84,10 @@ class ModelCardManager(BaseModel):
         provider = self.providers.get(provider_id)
         if not provider or not provider.enabled:
             raise KeyError(f"provider '{provider_id}' not found or disabled")
-        for m in provider.models:
-            if m.id == model_id and m.enabled:
-                return m
-        raise KeyError(f"model '{model_id}' not found or disabled under provider '{provider_id}'")
+        model = self._model_index.get((provider_id, model_id))
+        if model is None:
+            raise KeyError(f"model '{model_id}' not found or disabled under provider '{provider_id}'")
+        return model
 
     def find_model_with_fallback(self, model_id: str, provider_id: Optional[str] = None) -> ModelCard:
         """智能查找模型：优先在指定 provider 查找，找不到则按优先级在其他 enabled providers 中查找
@@ -64,25 +109,16 @@ class ModelCardManager(BaseModel):
         except KeyError:
             pass
 
-        # 2. 在其他 enabled 的 providers 中按优先级查找
-        enabled_providers = [
-            (p_id, provider)
-            for p_id, provider in self.providers.items()
-            if provider.enabled and p_id != target_provider_id
-        ]
-
-        # 按 priority 排序（数字越小优先级越高）
-        enabled_providers.sort(key=lambda x: x[1].priority)
-
-        for p_id, provider in enabled_providers:
-            for m in provider.models:
-                if m.id == model_id and m.enabled:
-                    return m
+        # 2. 在其他 enabled 的 providers 中按优先级查找（候选列表已按 priority 排序）
+        for p_id, m in self._model_candidates.get(model_id, ()):
+            if p_id != target_provider_id:
+                return m
 
         # 3. 所有 providers 都找不到，抛出异常
+        fallback_count = sum(1 for p_id in self._enabled_provider_ids if p_id != target_provider_id)
         raise KeyError(
             f"model '{model_id}' not found in any enabled providers "
-            f"(tried: {target_provider_id} and {len(enabled_providers)} fallback providers)"
+            f"(tried: {target_provider_id} and {fallback_count} fallback providers)"
         )
 
     def get_active_provider(self, provider_id: Optional[str] = None) -> ProviderCard:
@@ -111,21 +147,8 @@ class ModelCardManager(BaseModel):
                 raise KeyError(f"provider '{provider_id}' not found or disabled")
             return [m for m in provider.models if m.enabled]
 
-        # 未指定 provider，返回所有 enabled providers 的 enabled 模型
-        all_models = []
-        enabled_providers = [
-            (p_id, provider)
-            for p_id, provider in self.providers.items()
-            if provider.enabled
-        ]
-
-        # 按 priority 排序
-        enabled_providers.sort(key=lambda x: x[1].priority)
-
-        for p_id, provider in enabled_providers:
-            all_models.extend([m for m in provider.models if m.enabled])
-
-        return all_models
+        # 未指定 provider，返回所有 enabled providers 的 enabled 模型（按 priority 排序）
+        return list(self._all_models)
 
     def format_models_for_prompt(self) -> str:
         """格式化所有可用模型为 LLM 提示词
@@ -135,15 +158,7 @@ class ModelCardManager(BaseModel):
             - model_id: description [provider: provider_id]
             注意：provider 信息放在描述末尾，避免 LLM 混淆 model_id
         """
-        models = self.get_all_models()
-        if not models:
-            return "None available"
-
-        lines = [
-            f"- {model.id}: {model.description} [provider: {model.provider_id}]"
-            for model in models
-        ]
-        return "\n".join(lines)
+        return self._models_prompt
 
     @classmethod
     def parse_toml(cls, path: str | Path) -> ModelCardManager:
@@ -0,0 +1,49 @@
+"""
+Graph 节点耗时历史
+
+按 spec 内容哈希记录每个节点的执行耗时，供 Graph 静态分析预测执行耗时。
+spec 每次修改都会产生新的哈希，因此不作为指标标签（会无限增长），
+而是保存在按 LRU 淘汰的进程内表中，最多保留 max_specs 个 spec。
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from hatchify.common.settings.settings import get_hatchify_settings, NodeLatencySettings
+
+
+class NodeLatencyHistory:
+    """节点耗时历史（单例模式），使用 threading.Lock 保护，可在任意线程中调用"""
+
+    def __init__(self, settings: Optional[NodeLatencySettings] = None):
+        self.settings = settings or NodeLatencySettings()
+        # spec_hash -> node -> [count, total_seconds]
+        self._specs: "OrderedDict[str, Dict[str, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, spec_hash: str, node: str, seconds: float) -> None:
+        """记录一次节点耗时"""
+        with self._lock:
+            nodes = self._specs.get(spec_hash)
+            if nodes is None:
+                nodes = self._specs[spec_hash] = {}
+                while len(self._specs) > self.settings.max_specs:
+                    self._specs.popitem(last=False)
+            else:
+                self._specs.move_to_end(spec_hash)
+            stats = nodes.setdefault(node, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+
+    def averages(self, spec_hash: str) -> Dict[str, float]:
+        """返回该 spec 各节点的平均耗时（秒），没有记录时返回空字典"""
+        with self._lock:
+            nodes = self._specs.get(spec_hash, {})
+            return {node: total / count for node, (count, total) in nodes.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._specs.clear()
+
+
+node_latency_history = NodeLatencyHistory(get_hatchify_settings().node_latency)
@@ -0,0 +1,93 @@
+"""
+后台资源回收
+
+由应用 lifespan 启动，定时执行：
+- 回收执行结束超过宽限期的 stream handler（连同其 Graph、Agent 与事件队列）
+- 取消没有订阅者超过 hatchify.stream.idle_cancel_seconds 的执行（可选）
+- 按 TTL 清理过期的 EventStore 与事件日志
+- 按全局内存预算以 LRU 释放 EventStore 内存
+- 淘汰 Agent 预热池中空闲过期的 Agent
+- 清理过期的幂等记录与结果缓存
+- 关闭 LLM 连接池中不再被任何 Model 使用的端点客户端
+"""
+import asyncio
+from typing import Dict, Optional
+
+from loguru import logger
+
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, ReaperSettings
+from hatchify.core.manager.agent_pool_manager import agent_pool
+from hatchify.core.manager.event_manager import EventStore
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.manager.idempotency_manager import idempotency_manager
+from hatchify.core.manager.llm_client_manager import llm_client_pool
+from hatchify.core.manager.stream_manager import StreamManager
+
+
+class ResourceReaper:
+    """后台资源回收任务（单例模式）"""
+
+    def __init__(self, settings: Optional[ReaperSettings] = None, idle_cancel_seconds: float = 0):
+        self.settings = settings or ReaperSettings()
+        self.idle_cancel_seconds = idle_cancel_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not self.settings.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(), name="resource-reaper")
+        logger.info(f"Resource reaper started, interval={self.settings.interval_seconds}s")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.interval_seconds)
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Resource reaper sweep failed: {type(e).__name__}: {e}")
+
+    async def _cancel_idle(self) -> int:
+        # 多 worker 共享执行时，订阅者可能连接在其他 worker 上，本地无法判断是否空闲
+        if self.idle_cancel_seconds <= 0 or execution_registry.is_shared:
+            return 0
+        return await StreamManager.cancel_idle(self.idle_cancel_seconds)
+
+    async def sweep(self) -> Dict[str, int]:
+        """执行一轮回收，返回各项回收数量"""
+        result = {
+            "idle_cancelled": await self._cancel_idle(),
+            "handlers": await StreamManager.prune_finished(self.settings.handler_grace_seconds),
+            "expired_stores": await EventStore.cleanup_expired(),
+            "budget_stores": await EventStore.enforce_memory_budget(self.settings.memory_budget_bytes),
+            "idle_agents": agent_pool.evict_idle(),
+            "expired_idempotency": await idempotency_manager.purge_expired(),
+            "llm_http_clients": await llm_client_pool.close_unused(),
+        }
+
+        metrics.set_gauge("stream_handlers_active", await StreamManager.count())
+        metrics.set_gauge("stream_subscriber_max_queue_depth", await StreamManager.max_subscriber_queue_depth())
+        metrics.set_gauge("event_stores_active", await EventStore.count_stores())
+        metrics.set_gauge("event_store_memory_bytes", await EventStore.memory_usage())
+
+        if any(result.values()):
+            logger.debug(f"Resource reaper sweep: {result}")
+        return result
+
+
+resource_reaper = ResourceReaper(
+    get_hatchify_settings().reaper,
+    idle_cancel_seconds=get_hatchify_settings().stream.idle_cancel_seconds,
+)
@@ -0,0 +1,248 @@
+"""
+Webhook 执行调度
+
+submit 接口只负责创建执行记录（QUEUED）与 handler，并把执行放入 ExecutionScheduler 队列，
+由固定数量的 worker 取出后启动，worker 在执行结束前不会取下一个任务：
+- 优先级：interactive 先于 batch 调度；batch 等待超过 batch_starvation_seconds 后优先调度，避免饿死
+- 同一优先级内按 Graph 加权公平调度（虚拟时间最小的 Graph 先出队，出队后按 1 / 权重推进），
+  单个 Graph 的突发请求不会占满 worker
+- worker 启动执行前仍需通过 AdmissionController，全局 / 单 Graph / 执行类型上限对排队执行同样生效
+- 排队时间记录到 scheduler_queue_wait_seconds
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+
+from hatchify.common.domain.enums.execution_priority import ExecutionPriority
+from hatchify.common.domain.enums.execution_type import ExecutionType
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.common.settings.settings import get_hatchify_settings, SchedulerSettings
+from hatchify.core.manager.admission_manager import admission_controller, AdmissionRejected
+from hatchify.core.stream_handler.stream_handler import BaseStreamHandler
+
+
+class ScheduledJob:
+    """排队中的执行"""
+
+    def __init__(
+            self,
+            handler: BaseStreamHandler,
+            start: Callable[[], Awaitable[None]],
+            graph_id: Optional[str],
+            execution_type: ExecutionType = ExecutionType.WEBHOOK,
+            priority: ExecutionPriority = ExecutionPriority.INTERACTIVE,
+    ):
+        self.handler = handler
+        self.start = start
+        self.graph_id = graph_id
+        self.execution_type = execution_type
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def execution_id(self) -> str:
+        return self.handler.source_id
+
+
+class _FairQueue:
+    """按 Graph 加权公平出队的队列"""
+
+    def __init__(self, weight_of: Callable[[str], float]):
+        self._weight_of = weight_of
+        self._jobs: Dict[str, Deque[ScheduledJob]] = {}
+        self._vtime: Dict[str, float] = {}
+        self._clock = 0.0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, job: ScheduledJob) -> None:
+        key = job.graph_id or ""
+        jobs = self._jobs.get(key)
+        if jobs is None:
+            jobs = self._jobs[key] = deque()
+            # 新加入（或重新变为活跃）的 Graph 从当前虚拟时间开始，不会因为之前空闲而抢占
+            self._vtime[key] = self._clock
+        jobs.append(job)
+        self._size += 1
+
+    def pop(self) -> ScheduledJob:
+        key = min(self._jobs, key=self._vtime.__getitem__)
+        jobs = self._jobs[key]
+        job = jobs.popleft()
+        self._size -= 1
+        self._clock = self._vtime[key]
+        self._vtime[key] += 1 / max(self._weight_of(key), 1e-6)
+        if not jobs:
+            del self._jobs[key]
+            del self._vtime[key]
+        return job
+
+    def oldest_enqueued_at(self) -> Optional[float]:
+        return min((jobs[0].enqueued_at for jobs in self._jobs.values()), default=None)
+
+    def remove(self, execution_id: str) -> Optional[ScheduledJob]:
+        for key, jobs in self._jobs.items():
+            for job in jobs:
+                if job.execution_id == execution_id:
+                    jobs.remove(job)
+                    self._size -= 1
+                    if not jobs:
+                        del self._jobs[key]
+                        del self._vtime[key]
+                    return job
+        return None
+
+    def drain(self) -> List[ScheduledJob]:
+        jobs = [job for queue in self._jobs.values() for job in queue]
+        self._jobs.clear()
+        self._vtime.clear()
+        self._size = 0
+        return jobs
+
+
+class ExecutionScheduler:
+    """执行调度器（单例模式）"""
+
+    def __init__(self, settings: Optional[SchedulerSettings] = None):
+        self.settings = settings or SchedulerSettings()
+        self._queues: Dict[ExecutionPriority, _FairQueue] = {
+            priority: _FairQueue(self._graph_weight) for priority in ExecutionPriority
+        }
+        self._not_empty = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+
+        metrics.register_gauge("scheduler_running", lambda: self._running)
+        for priority, queue in self._queues.items():
+            metrics.register_gauge("scheduler_queued", queue.__len__, priority=priority.value)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def _graph_weight(self, graph_id: str) -> float:
+        return self.settings.graph_weights.get(graph_id, self.settings.default_graph_weight)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"execution-worker-{index}")
+            for index in range(self.settings.workers)
+        ]
+        logger.info(f"Execution scheduler started with {self.settings.workers} workers")
+
+    async def stop(self) -> None:
+        """停止 worker，仍在排队的执行以错误结束"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        for queue in self._queues.values():
+            for job in queue.drain():
+                await self._fail(job, "Execution scheduler stopped before the execution started")
+
+    def ensure_capacity(self) -> None:
+        """
+        检查队列是否还能接收执行
+
+        Raises:
+            AdmissionRejected: 队列已满（429）
+        """
+        if self.queued >= self.settings.max_queue_size:
+            metrics.inc("scheduler_rejected")
+            raise AdmissionRejected(429, "Execution queue is full, please retry later", admission_controller.retry_after())
+
+    def submit(self, job: ScheduledJob) -> None:
+        """放入调度队列（不阻塞）"""
+        self._queues[job.priority].push(job)
+        self._not_empty.set()
+        metrics.inc("scheduler_submitted", priority=job.priority.value)
+        logger.debug(f"Execution {job.execution_id} queued ({job.priority.value}), queued={self.queued}")
+
+    def discard(self, execution_id: str) -> bool:
+        """从队列中移除尚未启动的执行（如被取消），返回是否在队列中"""
+        for queue in self._queues.values():
+            if queue.remove(execution_id) is not None:
+                return True
+        return False
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        interactive = self._queues[ExecutionPriority.INTERACTIVE]
+        batch = self._queues[ExecutionPriority.BATCH]
+        if batch:
+            oldest = batch.oldest_enqueued_at()
+            if not interactive or time.monotonic() - oldest >= self.settings.batch_starvation_seconds:
+                return batch.pop()
+        if interactive:
+            return interactive.pop()
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            metrics.observe(
+                "scheduler_queue_wait_seconds",
+                time.monotonic() - job.enqueued_at,
+                priority=job.priority.value,
+            )
+            self._running += 1
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution worker failed on {job.execution_id}: {type(e).__name__}: {e}")
+            finally:
+                self._running -= 1
+
+    async def _run(self, job: ScheduledJob) -> None:
+        try:
+            ticket = await admission_controller.acquire(job.graph_id, job.execution_type, scheduled=True)
+        except asyncio.CancelledError:
+            await self._fail(job, "Execution scheduler stopped before the execution started")
+            raise
+
+        # 等待准入期间被取消的执行不再启动
+        if job.handler.is_finished() or job.handler.cancel_reason is not None:
+            ticket.release()
+            return
+
+        try:
+            await job.start()
+        except Exception as e:
+            ticket.release()
+            await self._fail(job, f"{type(e).__name__}: {e}")
+            return
+
+        task = job.handler.stream_task
+        ticket.bind(task)
+        if task is not None:
+            # 执行结束前占用该 worker；worker 被取消（应用关闭）时不影响执行本身
+            await asyncio.wait([task])
+
+    @staticmethod
+    async def _fail(job: ScheduledJob, message: str) -> None:
+        logger.error(f"Execution {job.execution_id} failed to start: {message}")
+        try:
+            await job.handler.send_terminal_events("error", message, "error")
+        except Exception as e:
+            logger.error(f"Failed to send error events for {job.execution_id}: {type(e).__name__}: {e}")
+
+
+execution_scheduler = ExecutionScheduler(get_hatchify_settings().scheduler)
@@ -7,10 +7,14 @@ GraphExecutor 管理器
 - 清理完成的 executor
 """
 import asyncio
+import time
 from typing import Dict, Optional
 
 from loguru import logger
 
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.manager.scheduler_manager import execution_scheduler
 from hatchify.core.stream_handler.stream_handler import BaseStreamHandler
 
 
@@ -37,8 +41,10 @@ class StreamManager:
                 raise ValueError(f"Handler with task_id '{task_id}' already exists")
 
             cls._executors[task_id] = handler
-            logger.info(f"Created stream handler: {task_id}")
-            return handler
+        # 注册表写入不持有 _lock，避免阻塞其他执行的查询
+        await execution_registry.register(task_id)
+        logger.info(f"Created stream handler: {task_id}")
+        return handler
 
     @classmethod
     async def get(cls, task_id: str) -> Optional[BaseStreamHandler]:
@@ -58,12 +64,92 @@ class StreamManager:
     async def delete(cls, task_id: str) -> bool:
         """删除流式 handler"""
         async with cls._lock:
-            if task_id in cls._executors:
-                del cls._executors[task_id]
-                logger.info(f"Deleted stream handler: {task_id}")
-                return True
+            if task_id not in cls._executors:
+                return False
+            del cls._executors[task_id]
+        await execution_registry.unregister(task_id)
+        logger.info(f"Deleted stream handler: {task_id}")
+        return True
+
+    @classmethod
+    async def cancel(cls, task_id: str, reason: str = "Cancelled by user") -> bool:
+        """
+        取消执行并释放 handler
+
+        仍在调度队列中的执行直接移出队列，不再占用 worker；
+        在其他 worker 上运行的执行提交取消请求，由所在 worker 异步取消
+
+        Returns:
+            是否取消成功（或已提交取消请求），handler 不存在或执行已结束时返回 False
+        """
+        handler = await cls.get(task_id)
+        if handler is None:
+            return await execution_registry.request_cancel(task_id, reason)
+
+        execution_scheduler.discard(task_id)
+        if not await handler.cancel(reason):
             return False
 
+        await cls.delete(task_id)
+        metrics.inc("executions_cancelled")
+        return True
+
+    @classmethod
+    async def cancel_idle(cls, idle_seconds: float) -> int:
+        """
+        取消没有任何订阅者超过 idle_seconds 的执行
+
+        Returns:
+            取消的执行数量
+        """
+        async with cls._lock:
+            idle = [
+                task_id for task_id, handler in cls._executors.items()
+                if not handler.is_finished() and handler.broadcaster.idle_seconds() >= idle_seconds
+            ]
+
+        cancelled = 0
+        for task_id in idle:
+            if await cls.cancel(task_id, reason=f"No subscriber for {idle_seconds:g}s, execution cancelled"):
+                cancelled += 1
+        if cancelled:
+            metrics.inc("executions_idle_cancelled", cancelled)
+            logger.info(f"Cancelled {cancelled} executions without subscribers")
+        return cancelled
+
+    @classmethod
+    async def prune_finished(cls, grace_seconds: float) -> int:
+        """
+        删除执行结束超过 grace_seconds 的 handler
+
+        宽限期内客户端仍可通过 handler 重连；之后的重放由 EventStore 负责。
+
+        Returns:
+            删除的 handler 数量
+        """
+        now = time.monotonic()
+        async with cls._lock:
+            finished = [
+                task_id for task_id, handler in cls._executors.items()
+                if handler.is_finished() and now - handler.finished_at >= grace_seconds
+            ]
+            for task_id in finished:
+                del cls._executors[task_id]
+
+        # handler 结束时已移除登记，这里兜底（如事件落盘失败时保留的登记），不持有 _lock
+        for task_id in finished:
+            await execution_registry.unregister(task_id)
+        if finished:
+            metrics.inc("stream_handlers_reaped", len(finished))
+            logger.info(f"Reaped {len(finished)} finished stream handlers")
+        return len(finished)
+
+    @classmethod
+    async def max_subscriber_queue_depth(cls) -> int:
+        """所有 handler 的订阅者中最大的缓冲事件数"""
+        async with cls._lock:
+            return max((handler.broadcaster.max_queue_depth for handler in cls._executors.values()), default=0)
+
     @classmethod
     async def exists(cls, task_id: str) -> bool:
         """检查 handler 是否存在"""
@@ -0,0 +1,246 @@
+"""
+执行事件广播
+
+每个 stream handler 持有一个 StreamBroadcaster，同一执行可以同时被多个 SSE 客户端订阅：
+- 每个订阅者有独立的有界缓冲队列和游标（最后收到的事件 ID）
+- 没有订阅者时事件不进入任何队列，重放只从 EventStore 读取
+- 订阅者缓冲区满时按 overflow_policy 处理：
+  - catch_up: 标记为落后并从广播中摘除，从 EventStore 按游标补齐后重新加入（默认）
+  - block: 生产者发出事件前等待缓冲区有空位，超过 block_timeout 后按 catch_up 处理
+  - drop_deltas: 丢弃 delta / log / progress 等增量事件，其他事件按 catch_up 处理
+  - detach: 断开该订阅者，由客户端携带 Last-Event-ID 重连
+- 没有 EventStore 时无法补齐，catch_up 直接断开
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Callable, FrozenSet, Literal, Optional, Set
+
+from loguru import logger
+
+from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.core.manager.event_manager import EventStore
+
+OverflowPolicy = Literal["catch_up", "block", "drop_deltas", "detach"]
+
+# drop_deltas 策略下可以丢弃的增量事件类型
+DROPPABLE_EVENT_TYPES: FrozenSet[str] = frozenset({"delta", "log", "progress"})
+
+# 从 EventStore 补齐事件时每批读取的条数
+_CATCH_UP_BATCH = 256
+# 唤醒等待中的落后订阅者
+_LAGGED = object()
+# 通知订阅者已被断开
+_DETACHED = object()
+
+
+class Subscriber:
+    """单个订阅者的缓冲队列与游标"""
+
+    def __init__(self, max_buffer: int, last_event_id: Optional[str] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer + 1)
+        self.max_buffer = max_buffer
+        self.last_event_id = last_event_id
+        # 补齐模式：从 EventStore 读取事件，不在广播列表中
+        self.catching_up = True
+        # 缓冲区中的事件数（不含唤醒标记），用于队列深度 gauge
+        self.buffered = 0
+        self.dropped = 0
+        self.has_space = asyncio.Event()
+        self.has_space.set()
+
+    def is_full(self) -> bool:
+        return self.queue.qsize() >= self.max_buffer
+
+    def offer(self, event: StreamEvent) -> bool:
+        """非阻塞投递，缓冲区已满时返回 False"""
+        if self.is_full():
+            self.has_space.clear()
+            return False
+        self.queue.put_nowait(event)
+        self.buffered += 1
+        metrics.add_gauge("stream_subscriber_queue_depth", 1)
+        return True
+
+    async def take(self, timeout: float) -> object:
+        """取出下一个事件或标记，超时抛出 asyncio.TimeoutError"""
+        item = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        if item is not _LAGGED and item is not _DETACHED:
+            self.buffered -= 1
+            metrics.add_gauge("stream_subscriber_queue_depth", -1)
+        self.has_space.set()
+        return item
+
+    def clear(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        metrics.add_gauge("stream_subscriber_queue_depth", -self.buffered)
+        self.buffered = 0
+        self.has_space.set()
+
+    def mark_lagged(self) -> None:
+        """丢弃缓冲区并唤醒订阅者，使其进入补齐模式"""
+        self.catching_up = True
+        self.clear()
+        # 队列容量比 max_buffer 多 1，保证标记一定能放入
+        self.queue.put_nowait(_LAGGED)
+
+    def detach(self) -> None:
+        """丢弃缓冲区并通知订阅者结束"""
+        self.clear()
+        self.queue.put_nowait(_DETACHED)
+
+
+class StreamBroadcaster:
+    """单个执行的事件广播中心"""
+
+    def __init__(
+            self,
+            source_id: str,
+            max_buffer: int = 1024,
+            overflow_policy: OverflowPolicy = "catch_up",
+            block_timeout: float = 5.0,
+    ):
+        self.source_id = source_id
+        self.max_buffer = max_buffer
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._subscribers: Set[Subscriber] = set()
+        # 所有订阅者（含补齐中的）数量，以及没有订阅者的起始时间
+        self._active = 0
+        self._idle_since: Optional[float] = time.monotonic()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def idle_seconds(self) -> float:
+        """没有任何订阅者的持续时间（秒），有订阅者时为 0"""
+        if self._idle_since is None:
+            return 0.0
+        return time.monotonic() - self._idle_since
+
+    @property
+    def max_queue_depth(self) -> int:
+        """在线订阅者中最大的缓冲事件数"""
+        return max((subscriber.buffered for subscriber in self._subscribers), default=0)
+
+    async def wait_for_capacity(self) -> None:
+        """
+        block 策略下，等待所有在线订阅者的缓冲区有空位
+
+        需在写入 EventStore 之前调用；超过 block_timeout 仍未腾出空位的订阅者
+        在 publish 时按 catch_up 处理，不会无限阻塞执行
+        """
+        if self.overflow_policy != "block":
+            return
+        full = [subscriber for subscriber in self._subscribers if subscriber.is_full()]
+        if not full:
+            return
+
+        start = time.monotonic()
+        deadline = start + self.block_timeout
+        for subscriber in full:
+            while subscriber.is_full() and subscriber in self._subscribers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                subscriber.has_space.clear()
+                try:
+                    await asyncio.wait_for(subscriber.has_space.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+        metrics.observe("stream_producer_blocked_seconds", time.monotonic() - start)
+
+    def publish(self, event: StreamEvent) -> None:
+        """向所有在线订阅者投递事件（非阻塞）
+
+        调用方需保证事件已先写入 EventStore 且两者之间没有 await，
+        落后订阅者才能从 EventStore 无缝补齐。
+        """
+        for subscriber in list(self._subscribers):
+            if subscriber.offer(event):
+                continue
+
+            if self.overflow_policy == "drop_deltas" and event.type in DROPPABLE_EVENT_TYPES:
+                subscriber.dropped += 1
+                metrics.inc("stream_subscriber_dropped")
+                continue
+
+            self._subscribers.discard(subscriber)
+            if self.overflow_policy == "detach":
+                subscriber.detach()
+                metrics.inc("stream_subscriber_detached", reason="overflow")
+                logger.info(f"Subscriber buffer full on {self.source_id}, detaching")
+            else:
+                subscriber.mark_lagged()
+                metrics.inc("stream_subscriber_lagged")
+                logger.debug(f"Subscriber lagged behind on {self.source_id}, switching to catch-up")
+
+    async def subscribe(
+            self,
+            event_store: Optional[EventStore],
+            last_event_id: Optional[str] = None,
+            ping_interval: float = 15,
+            ping_factory: Optional[Callable[[], StreamEvent]] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        订阅执行事件，收到 done 事件后结束
+
+        Args:
+            event_store: 执行的事件存储，为空时只能接收订阅之后的事件，落后即断开
+            last_event_id: 从该事件之后开始，为空时从第一个事件开始
+            ping_interval: 无事件时发送心跳的间隔（秒）
+            ping_factory: 创建心跳事件，为空时不发送心跳
+        """
+        subscriber = Subscriber(self.max_buffer, last_event_id)
+        if event_store is None:
+            self._attach(subscriber)
+        self._active += 1
+        self._idle_since = None
+        metrics.add_gauge("stream_subscribers", 1)
+
+        try:
+            while True:
+                if subscriber.catching_up:
+                    if event_store is None:
+                        logger.warning(f"Subscriber lagged behind on {self.source_id} without EventStore, detaching")
+                        metrics.inc("stream_subscriber_detached", reason="no_store")
+                        return
+                    batch = await event_store.read_after(subscriber.last_event_id, _CATCH_UP_BATCH)
+                    if batch:
+                        for event in batch:
+                            subscriber.last_event_id = event.id
+                            yield event
+                            if event.type == "done":
+                                return
+                        continue
+                    # 已追上 EventStore，从此刻起的事件都会通过广播投递
+                    self._attach(subscriber)
+
+                try:
+                    event = await subscriber.take(ping_interval)
+                except asyncio.TimeoutError:
+                    if ping_factory and not subscriber.catching_up:
+                        yield ping_factory()
+                    continue
+
+                if event is _LAGGED:
+                    continue
+                if event is _DETACHED:
+                    return
+                subscriber.last_event_id = event.id
+                yield event
+                if event.type == "done":
+                    return
+        finally:
+            self._subscribers.discard(subscriber)
+            subscriber.clear()
+            self._active -= 1
+            if self._active == 0:
+                self._idle_since = time.monotonic()
+            metrics.add_gauge("stream_subscribers", -1)
+
+    def _attach(self, subscriber: Subscriber) -> None:
+        subscriber.catching_up = False
+        self._subscribers.add(subscriber)
@@ -1,13 +1,10 @@
 from datetime import datetime
-from typing import Optional
 
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from hatchify.business.db.session import AsyncSessionLocal
-from hatchify.business.models.execution import ExecutionTable
 from hatchify.common.domain.enums.execution_status import ExecutionStatus
 from hatchify.common.domain.event.base_event import StreamEvent, StartEvent, DoneEvent, ErrorEvent
+from hatchify.core.manager.execution_recorder_manager import execution_status_recorder
 from hatchify.core.stream_handler.event_listener.event_listener import EventListener
 
 
@@ -23,6 +20,8 @@ class ExecutionTrackerListener(EventListener):
     - DoneEvent(cancel) -> status = CANCELLED, completed_at = now
     - DoneEvent(error) -> status = FAILED, completed_at = now
     - ErrorEvent -> 记录 error 字段
+
+    状态变更交给 ExecutionStatusRecorder 合并后批量写库
     """
 
     @property
@@ -52,13 +51,11 @@ class ExecutionTrackerListener(EventListener):
 
     async def _handle_start(self, execution_id: str, event_data: StartEvent):
         """处理 StartEvent: 更新为 RUNNING"""
-        async with AsyncSessionLocal() as session:
-            await self._update_execution(
-                session,
-                execution_id,
-                status=ExecutionStatus.RUNNING,
-                started_at=datetime.now()
-            )
+        await execution_status_recorder.record(
+            execution_id,
+            status=ExecutionStatus.RUNNING,
+            started_at=datetime.now()
+        )
 
     async def _handle_done(self, execution_id: str, event_data: DoneEvent):
         """处理 DoneEvent: 根据 reason 更新为终态"""
@@ -69,47 +66,15 @@ class ExecutionTrackerListener(EventListener):
         }
         status = status_map.get(event_data.reason, ExecutionStatus.FAILED)
 
-        async with AsyncSessionLocal() as session:
-            await self._update_execution(
-                session,
-                execution_id,
-                status=status,
-                completed_at=datetime.now()
-            )
+        await execution_status_recorder.record(
+            execution_id,
+            status=status,
+            completed_at=datetime.now()
+        )
 
     async def _handle_error(self, execution_id: str, event_data: ErrorEvent):
         """处理 ErrorEvent: 记录错误信息"""
-        async with AsyncSessionLocal() as session:
-            await self._update_execution(
-                session,
-                execution_id,
-                error=event_data.reason
-            )
-
-    @staticmethod
-    async def _update_execution(
-            session: AsyncSession,
-            execution_id: str,
-            status: Optional[ExecutionStatus] = None,
-            error: Optional[str] = None,
-            started_at: Optional[datetime] = None,
-            completed_at: Optional[datetime] = None,
-    ):
-        """更新执行记录"""
-        result = await session.get(ExecutionTable, execution_id)
-        if not result:
-            logger.warning(f"Execution {execution_id} not found in database")
-            return
-
-        # 只更新提供的字段
-        if status is not None:
-            result.status = status
-        if error is not None:
-            result.error = error
-        if started_at is not None:
-            result.started_at = started_at
-        if completed_at is not None:
-            result.completed_at = completed_at
-
-        await session.commit()
-        logger.debug(f"Execution {execution_id} updated: status={status}")
+        await execution_status_recorder.record(
+            execution_id,
+            error=event_data.reason
+        )
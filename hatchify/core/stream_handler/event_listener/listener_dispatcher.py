@@ -0,0 +1,203 @@
+"""
+监听器异步分发
+
+emit_event 只把事件放入 handler 自己的有界分发队列，由单个后台 worker 按顺序调用
+各监听器，监听器中的数据库写入等慢操作不会阻塞事件推送给客户端：
+- 每个 handler 一个队列和一个 worker，同一执行的事件按发出顺序依次交给每个监听器
+- 队列满时按 overflow_policy 处理：
+  - block: 等待队列有空位（背压传递给执行流）
+  - drop_newest: 丢弃当前事件
+  - drop_oldest: 丢弃队列中最早的可丢弃事件
+- start / done / error / cancel / result 等状态事件永远不会被丢弃，队列满时等待
+- 执行结束后 drain() 等待队列清空，应用关闭时 drain_all() 处理所有未完成的分发
+  - 超时时只丢弃可丢弃的事件，状态事件（包括被中断的那一个）由新的 worker 在后台继续分发
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Deque, FrozenSet, List, Literal, Optional, Tuple
+
+from loguru import logger
+
+from hatchify.common.domain.event.base_event import StreamEvent
+from hatchify.common.extensions.ext_metrics import metrics
+from hatchify.core.stream_handler.event_listener.event_listener import EventListener
+
+OverflowPolicy = Literal["block", "drop_newest", "drop_oldest"]
+
+# 监听器依赖的状态事件，任何策略下都不丢弃
+PROTECTED_EVENT_TYPES: FrozenSet[str] = frozenset({"start", "done", "error", "cancel", "result"})
+
+
+class ListenerDispatcher:
+    """单个 stream handler 的监听器分发队列"""
+
+    _active: "weakref.WeakSet[ListenerDispatcher]" = weakref.WeakSet()
+
+    def __init__(
+            self,
+            source_id: str,
+            listeners: List[EventListener],
+            queue_size: int = 1024,
+            overflow_policy: OverflowPolicy = "block",
+    ):
+        self.source_id = source_id
+        self.listeners = listeners
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        # (入队时间, 事件)
+        self._queue: Deque[Tuple[float, StreamEvent]] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._worker: Optional[asyncio.Task] = None
+        # 正在分发的事件及当前监听器下标，drain 超时中断时从该监听器继续
+        self._delivering: Optional[Tuple[StreamEvent, int]] = None
+        self._resume: Optional[Tuple[StreamEvent, int]] = None
+        # drain 之后 worker 分发完剩余事件即退出
+        self._closing = False
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    async def dispatch(self, event: StreamEvent) -> None:
+        """
+        将事件放入分发队列
+
+        队列未满时不会挂起；队列已满时按溢出策略丢弃事件或等待空位
+        """
+        if not self.listeners:
+            return
+
+        while len(self._queue) >= self.queue_size:
+            if event.type not in PROTECTED_EVENT_TYPES and self.overflow_policy == "drop_newest":
+                self._drop(event)
+                return
+            if self.overflow_policy == "drop_oldest" and self._drop_oldest():
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        self._queue.append((time.monotonic(), event))
+        self._not_empty.set()
+        self._idle.clear()
+        metrics.add_gauge("stream_listener_pending", 1)
+        self._ensure_worker()
+
+    def _drop_oldest(self) -> bool:
+        """丢弃队列中最早的非状态事件，队列中全是状态事件时返回 False"""
+        for index, (_, queued) in enumerate(self._queue):
+            if queued.type not in PROTECTED_EVENT_TYPES:
+                del self._queue[index]
+                metrics.add_gauge("stream_listener_pending", -1)
+                self._drop(queued)
+                return True
+        return False
+
+    def _drop(self, event: StreamEvent) -> None:
+        self.dropped += 1
+        metrics.inc("stream_listener_dropped", policy=self.overflow_policy)
+        logger.debug(f"Listener queue full for {self.source_id}, dropped {event.type} event ({self.overflow_policy})")
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name=f"listener-dispatch-{self.source_id}")
+            ListenerDispatcher._active.add(self)
+
+    async def _run(self) -> None:
+        if self._resume is not None:
+            (event, index), self._resume = self._resume, None
+            await self._deliver(event, index)
+        while True:
+            if not self._queue:
+                self._idle.set()
+                if self._closing:
+                    ListenerDispatcher._active.discard(self)
+                    return
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            enqueued_at, event = self._queue.popleft()
+            self._not_full.set()
+            metrics.add_gauge("stream_listener_pending", -1)
+            metrics.observe("stream_listener_lag_seconds", time.monotonic() - enqueued_at)
+            await self._deliver(event)
+
+    async def _deliver(self, event: StreamEvent, start_index: int = 0) -> None:
+        for index in range(start_index, len(self.listeners)):
+            listener = self.listeners[index]
+            self._delivering = (event, index)
+            start = time.perf_counter()
+            try:
+                await listener.on_event(self.source_id, event)
+            except Exception as e:
+                # 监听器失败不应影响主流程和其他监听器
+                metrics.inc("stream_listener_errors", listener=listener.name)
+                logger.error(f"Listener {listener.name} failed for {self.source_id}: {type(e).__name__}: {e}")
+            finally:
+                metrics.observe("stream_listener_seconds", time.perf_counter() - start, listener=listener.name)
+        self._delivering = None
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已入队事件全部分发完成，然后停止 worker
+
+        Returns:
+            是否在 timeout 内完成；超时时丢弃剩余的可丢弃事件，状态事件在后台继续分发
+        """
+        if self._worker is None:
+            return True
+        self._closing = True
+        drained = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            drained = False
+
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+        if not drained:
+            self._keep_protected(timeout)
+            if self._queue or self._resume is not None:
+                self._ensure_worker()
+                return False
+
+        self._idle.set()
+        ListenerDispatcher._active.discard(self)
+        return drained
+
+    def _keep_protected(self, timeout: Optional[float]) -> None:
+        """drain 超时后丢弃可丢弃的事件，保留状态事件与被中断的状态事件"""
+        interrupted, self._delivering = self._delivering, None
+        if interrupted is not None and interrupted[0].type in PROTECTED_EVENT_TYPES:
+            self._resume = interrupted
+
+        protected = deque(item for item in self._queue if item[1].type in PROTECTED_EVENT_TYPES)
+        discarded = len(self._queue) - len(protected)
+        self._queue = protected
+        self._not_full.set()
+        if discarded:
+            self.dropped += discarded
+            metrics.add_gauge("stream_listener_pending", -discarded)
+            metrics.inc("stream_listener_dropped", discarded, policy="drain_timeout")
+        logger.warning(f"Listener dispatch for {self.source_id} not drained in {timeout}s, discarded {discarded} "
+                       f"events, {len(protected) + (self._resume is not None)} status events left in background")
+
+    @classmethod
+    async def drain_all(cls, timeout: Optional[float] = None) -> None:
+        """应用关闭前处理所有 handler 中未完成的监听器分发"""
+        dispatchers = list(cls._active)
+        if dispatchers:
+            await asyncio.gather(*(dispatcher.drain(timeout) for dispatcher in dispatchers))
@@ -1,6 +1,6 @@
 import json
 import mimetypes
-from typing import Dict, Any, List, get_args, Optional, Union
+from typing import Dict, Any, List, get_args, Optional, Union, AsyncIterator
 
 from strands.agent import AgentResult
 from strands.multiagent.base import NodeResult, MultiAgentResult
@@ -12,9 +12,12 @@ from hatchify.common.domain.entity.graph_execute_data import GraphExecuteData
 from hatchify.common.domain.entity.graph_spec import GraphSpec
 from hatchify.common.domain.event.base_event import StreamEvent
 from hatchify.common.domain.event.execute_event import NodeStartEvent, NodeStopEvent, NodeHandoffEvent, ResultEvent
+from hatchify.common.extensions.ext_metrics import metrics
 from hatchify.common.extensions.ext_storage import storage_client
 from hatchify.core.graph.graph_wrapper import GraphWrapper
+from hatchify.core.manager.node_latency_manager import node_latency_history
 from hatchify.core.stream_handler.event_listener.event_listener import EventListener
+from hatchify.core.utils.schema_utils import compute_spec_hash
 
 from hatchify.core.stream_handler.stream_handler import BaseStreamHandler
 
@@ -38,6 +41,8 @@ class GraphExecutor(BaseStreamHandler):
         )
         self.graph = graph
         self.graph_spec = graph_spec
+        # source_id 是执行 ID，节点耗时历史按 spec 内容哈希归档
+        self.spec_hash = compute_spec_hash(graph_spec)
 
     @staticmethod
     async def build_messages(
@@ -112,6 +117,10 @@ class GraphExecutor(BaseStreamHandler):
                 )
             case "multiagent_node_stop":
                 node_result: NodeResult = event.get("node_result")
+                # 节点耗时历史，供 Graph 静态分析预测执行耗时
+                node_seconds = node_result.execution_time / 1000
+                node_latency_history.record(self.spec_hash, event.get("node_id"), node_seconds)
+                metrics.observe("graph_node_seconds", node_seconds)
                 result = node_result.result
                 if isinstance(result, AgentResult):
                     await self.emit_event(
@@ -158,6 +167,22 @@ class GraphExecutor(BaseStreamHandler):
             case _:
                 raise TypeError(f"Unsupported event type: {event_type}")
 
+    async def start_streaming(
+            self,
+            async_generator: AsyncIterator[Any],
+    ):
+        try:
+            await super().start_streaming(async_generator)
+        finally:
+            # 执行结束（完成/失败/取消）后归还池化资源
+            self.graph.release()
+
+    async def discard_stream(self, async_generator: AsyncIterator[Any]) -> None:
+        try:
+            await super().discard_stream(async_generator)
+        finally:
+            self.graph.release()
+
     async def submit_task(
             self,
             task: GraphExecuteData,
@@ -174,7 +199,10 @@ class GraphExecutor(BaseStreamHandler):
             invocation_state: Dict[str, Any] | None = None,
             **kwargs: Any
     ):
-        messages = await self.build_messages(task)
+        try:
+            messages = await self.build_messages(task)
 
-        result = await self.graph.invoke_async(messages, invocation_state, **kwargs)
-        return result
+            result = await self.graph.invoke_async(messages, invocation_state, **kwargs)
+            return result
+        finally:
+            self.graph.release()
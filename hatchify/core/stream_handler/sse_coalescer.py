@@ -0,0 +1,110 @@
+"""
+SSE 帧合并写出
+
+worker() 每个事件产出一个 SSE 帧，delta token 这类高频小事件会导致每个 token
+一次 ASGI send 和一次 TCP 写。SSECoalescer 把短时间内到达的多个帧合并成一个块写出：
+- 块大小达到 max_bytes 时立即写出
+- 第一个帧到达后最多等待 interval 再写出，interval 在 [min_interval, max_interval] 间自适应：
+  连续合并到多个帧时逐步增大，只有单个帧时逐步缩小，低频流的延迟接近直写
+- done / error / cancel / result / ping 等事件不参与等待，连同已缓冲的帧立即写出
+"""
+import asyncio
+import time
+from typing import AsyncIterator, FrozenSet, List, Optional
+
+from hatchify.common.extensions.ext_metrics import metrics
+
+# 不等待合并、立即写出的事件类型
+IMMEDIATE_EVENT_TYPES: FrozenSet[bytes] = frozenset({b"done", b"error", b"cancel", b"result", b"ping"})
+
+_END = object()
+
+
+def frame_event_type(frame: bytes) -> bytes:
+    """从 SSE 帧（id / event / data）中取出事件类型"""
+    lines = frame.split(b"\n", 2)
+    if len(lines) > 1 and lines[1].startswith(b"event: "):
+        return lines[1][7:]
+    return b""
+
+
+class SSECoalescer:
+
+    def __init__(
+            self,
+            max_bytes: int = 16 * 1024,
+            min_interval: float = 0.01,
+            max_interval: float = 0.05,
+            queue_size: int = 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.queue_size = queue_size
+
+    async def coalesce(self, frames: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """将帧迭代器转换为合并后的块迭代器"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def pump():
+            try:
+                async for frame in frames:
+                    await queue.put(frame)
+            finally:
+                await queue.put(_END)
+
+        # 帧的读取放在独立任务中，等待超时不会打断上游生成器
+        pump_task = asyncio.create_task(pump())
+        interval = self.min_interval
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+
+                batch: List[bytes] = [item]
+                size = len(item)
+                finished = False
+                deadline: Optional[float] = None
+                if frame_event_type(item) not in IMMEDIATE_EVENT_TYPES:
+                    deadline = time.monotonic() + interval
+
+                while deadline is not None and size < self.max_bytes:
+                    timeout = deadline - time.monotonic()
+                    if queue.empty():
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        item = queue.get_nowait()
+                    if item is _END:
+                        finished = True
+                        break
+                    batch.append(item)
+                    size += len(item)
+                    if frame_event_type(item) in IMMEDIATE_EVENT_TYPES:
+                        break
+
+                # 自适应等待窗口：合并到多个帧说明事件密集，放宽窗口；否则收紧以降低延迟
+                if len(batch) > 1:
+                    interval = min(self.max_interval, interval * 1.5)
+                else:
+                    interval = max(self.min_interval, interval / 2)
+
+                metrics.observe("sse_coalesced_frames", len(batch))
+                yield batch[0] if len(batch) == 1 else b"".join(batch)
+                if finished:
+                    break
+
+            # 上游异常（如 worker 中重新抛出的异常）传递给调用方
+            await pump_task
+        finally:
+            if not pump_task.done():
+                pump_task.cancel()
+                try:
+                    await pump_task
+                except (asyncio.CancelledError, Exception):
+                    pass
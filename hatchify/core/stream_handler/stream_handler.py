@@ -7,8 +7,12 @@ from loguru import logger
 
 from hatchify.common.domain.event.base_event import StreamEvent, PingEvent, DoneEvent, ErrorEvent, StartEvent, \
     CancelEvent
+from hatchify.common.settings.settings import get_hatchify_settings
 from hatchify.core.manager.event_manager import EventStore
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.stream_handler.broadcaster import StreamBroadcaster
 from hatchify.core.stream_handler.event_listener.event_listener import EventListener
+from hatchify.core.stream_handler.event_listener.listener_dispatcher import ListenerDispatcher
 
 
 class BaseStreamHandler(metaclass=abc.ABCMeta):
@@ -21,49 +25,42 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
             listeners: Optional[List[EventListener]] = None,
     ):
         self.source_id: str = source_id
-        self.ping_task: Optional[asyncio.Task] = None
+        stream_settings = get_hatchify_settings().stream
         self.ping_interval = ping_interval
-        self.ping_running = False
         self.enable_reconnect = enable_reconnect
         self.stream_task: Optional[asyncio.Task] = None
-        self.stream_queue: asyncio.Queue[StreamEvent] = asyncio.Queue()
+        # 多个 SSE 客户端通过广播中心各自订阅，互不抢占事件
+        self.broadcaster = StreamBroadcaster(
+            source_id,
+            max_buffer=stream_settings.subscriber_buffer_size,
+            overflow_policy=stream_settings.subscriber_overflow_policy,
+            block_timeout=stream_settings.subscriber_block_timeout,
+        )
         self.event_ttl = event_ttl
         self.event_store: Optional[EventStore] = None
         self.stored_exception: Optional[Exception] = None
+        # 执行结束（已发送 done）的时间，ResourceReaper 据此在宽限期后回收 handler
+        self.finished_at: Optional[float] = None
+        # 主动取消（cancel 接口 / 无订阅者自动取消）的原因
+        self.cancel_reason: Optional[str] = None
 
         self.listeners: List[EventListener] = listeners or []
+        # 监听器在独立 worker 中按顺序执行，emit_event 只负责入队
+        self.listener_dispatcher = ListenerDispatcher(
+            source_id,
+            self.listeners,
+            queue_size=stream_settings.listener_queue_size,
+            overflow_policy=stream_settings.listener_overflow_policy,
+        )
+        self.listener_drain_timeout = stream_settings.listener_drain_timeout
 
-    async def ping_loop(self):
-        try:
-            while self.ping_running:
-                await asyncio.sleep(self.ping_interval)
-                if self.ping_running:
-                    await self.stream_queue.put(
-                        StreamEvent(
-                            type="ping",
-                            data=PingEvent(
-                                timestamp=int(time.time())
-                            )
-                        )
-                    )
-        except asyncio.CancelledError:
-            logger.debug(f"Ping task cancelled for graph: {self.source_id}")
-        except Exception as e:
-            logger.error(f"Ping task error: {type(e).__name__}: {e}")
-
-    async def start_ping(self):
-        if not self.ping_running:
-            self.ping_running = True
-            self.ping_task = asyncio.create_task(self.ping_loop())
-
-    async def stop_ping(self):
-        if not self.ping_running:
-            return
-
-        self.ping_running = False
-        if self.ping_task:
-            self.cancel_tasks(self.ping_task)
-            await self.await_task_safely(self.ping_task)
+    def make_ping_event(self) -> StreamEvent:
+        return StreamEvent(
+            type="ping",
+            data=PingEvent(
+                timestamp=int(time.time())
+            )
+        )
 
     @staticmethod
     def cancel_tasks(asyncio_task: asyncio.Task) -> None:
@@ -92,53 +89,65 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
     async def emit_event(self, event: StreamEvent):
         """
         统一的事件发送方法：
-        1. 发送到 stream_queue 供实时客户端消费
-        2. 写入 EventStore 供重连客户端读取（独立于客户端连接状态）
-        3. 触发所有注册的监听器
+        1. 写入 EventStore 供重连 / 落后的客户端读取（独立于客户端连接状态）
+        2. 广播给所有实时订阅的客户端
+        3. 放入监听器分发队列，由后台 worker 异步触发监听器
         """
-        await self.stream_queue.put(event)
+        # 发出时序列化一次，之后存储、广播、重放都复用同一份 SSE 帧
+        event.sse_frame()
+        # block 策略下等待订阅者缓冲区有空位（必须在写入 EventStore 之前）
+        await self.broadcaster.wait_for_capacity()
+        # 写入与广播之间不能有 await，订阅者才能在 EventStore 与广播之间无缝切换
         if self.enable_reconnect and self.event_store:
             self.event_store.append(event)
+        self.broadcaster.publish(event)
 
-        # 触发所有监听器
-        for listener in self.listeners:
-            try:
-                await listener.on_event(self.source_id, event)
-            except Exception as e:
-                # 监听器失败不应影响主流程
-                logger.error(f"Listener {listener.name} failed for {self.source_id}: {type(e).__name__}: {e}")
+        await self.listener_dispatcher.dispatch(event)
 
-    @staticmethod
-    def format_sse(event: StreamEvent) -> str:
-        return "\n".join([
-            f"id: {event.id}",
-            f"event: {event.type}",
-            f"data: {event.data.model_dump_json(exclude_none=True)}",
-            "",
-            ""
-        ])
-
-    async def stream_events(self):
-        is_complete: bool = False
-        try:
-            while True:
-                if is_complete and self.stream_queue.empty():
-                    break
+    async def finish(self) -> None:
+        """标记执行结束，并等待监听器处理完剩余事件"""
+        self.finished_at = time.monotonic()
+        await self.listener_dispatcher.drain(self.listener_drain_timeout)
+        # 事件（含 done）落盘后移除执行登记，其他 worker 随即从事件日志重放，不再转发取消请求；
+        # 落盘失败时保留登记，避免其他 worker 按已中断处理，由 ResourceReaper 回收 handler 时移除
+        if self.event_store is None or await self.event_store.flush():
+            await execution_registry.unregister(self.source_id)
 
-                try:
-                    event = await self.stream_queue.get()
-                except asyncio.CancelledError:
-                    break
+    async def cancel(self, reason: str = "Cancelled by user") -> bool:
+        """
+        主动取消执行
 
-                yield event
-                self.stream_queue.task_done()
+        取消 stream_task，CancelledError 沿 await 链传入进行中的 LLM / 工具调用，
+        start_streaming 随后发出 cancel 与 done(reason="cancel") 事件。
+        尚未启动（如仍在调度队列中）的执行直接发出取消终止事件。
 
-                if isinstance(event.data, DoneEvent):
-                    is_complete = True
+        Returns:
+            是否取消成功，执行已结束时返回 False
+        """
+        if self.is_finished() or self.cancel_reason is not None:
+            return False
+        self.cancel_reason = reason
+
+        task = self.stream_task
+        if task is None:
+            await self.send_terminal_events("cancel", reason, "cancel")
+            return True
+        if task.done():
+            return False
+
+        logger.info(f"Cancelling execution {self.source_id}: {reason}")
+        task.cancel()
+        await self.await_task_safely(task)
+        return True
+
+    def is_finished(self) -> bool:
+        """执行是否已结束（已发送 done 事件）"""
+        return self.finished_at is not None
 
-        finally:
-            if self.stored_exception:
-                raise self.stored_exception
+    @staticmethod
+    def format_sse(event: StreamEvent) -> bytes:
+        """返回事件的 SSE 帧（序列化结果缓存在事件上）"""
+        return event.sse_frame()
 
     async def worker(self, last_event_id: Optional[str] = None):
         try:
@@ -147,61 +156,55 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                 logger.info(f"Task {self.source_id} already completed, returning historical events with done")
 
                 # 根据是否有 last_event_id 决定返回哪些历史事件
-                if last_event_id:
+                if last_event_id and await self.event_store.has_after(last_event_id):
                     # 重连场景：只返回客户端缺失的事件
-                    historical_events = self.event_store.get_after(last_event_id)
-                    if not historical_events:
-                        # 客户端已经有所有事件，返回完整历史用于UI重建
-                        historical_events = self.event_store.get_all()
+                    historical_events = self.event_store.iter_after(last_event_id)
                 else:
-                    # 新连接：返回所有历史事件
-                    historical_events = self.event_store.get_all()
+                    # 新连接，或客户端已经有所有事件：返回完整历史用于UI重建
+                    historical_events = self.event_store.iter_all()
 
                 # 返回历史事件（最后一个事件必定是 done）
-                for event in historical_events:
+                async for event in historical_events:
                     yield self.format_sse(event)
 
                 # 任务已完成，直接退出，不启动 ping
                 return
 
-            # 第二优先级：重连模式（任务未完成，但客户端断线重连）
+            # 第二优先级：订阅实时事件
+            # - 新连接：从第一个事件开始补齐历史，再切换到实时广播
+            # - 重连：从 last_event_id 之后补齐；没有新事件时返回完整历史让客户端重建UI状态
+            cursor = None
             if last_event_id and self.event_store:
                 logger.info(f"Reconnect to running task with last_event_id: {last_event_id}")
-
-                historical_events = self.event_store.get_after(last_event_id)
-
-                # 如果没有新事件，返回完整历史让客户端重建UI状态
-                if not historical_events:
+                if await self.event_store.has_after(last_event_id):
+                    cursor = last_event_id
+                else:
                     logger.info(f"No new events after {last_event_id}, returning full history for UI reconstruction")
-                    historical_events = self.event_store.get_all()
-
-                # 先推送历史事件
-                for event in historical_events:
-                    yield self.format_sse(event)
 
-                logger.info(f"Historical events sent, switching to real-time queue")
-
-            # 任务未完成，启动实时流式推送
-            await self.start_ping()
-            async for event in self.stream_events():
+            async for event in self.broadcaster.subscribe(
+                    self.event_store if self.enable_reconnect else None,
+                    last_event_id=cursor,
+                    ping_interval=self.ping_interval,
+                    ping_factory=self.make_ping_event,
+            ):
                 yield self.format_sse(event)
 
+            if self.stored_exception:
+                raise self.stored_exception
+
         except asyncio.CancelledError as e:
             # 客户端断开连接（如刷新页面）是正常的，不应该取消后台任务
+            # 不取消 stream_task，刷新页面后可以重新连接到仍在执行的任务
             logger.info(f"SSE connection closed (client disconnected): {self.source_id}")
             raise e
         except Exception as e:
             logger.exception(f"{type(e).__name__}: {e}")
-        finally:
-            await self.stop_ping()
-            # 注意：不再取消 stream_task，让后台任务继续执行
-            # 这样刷新页面后可以重新连接到仍在执行的任务
 
     async def send_terminal_events(
             self,
-            terminal_type: Literal["error"],
+            terminal_type: Literal["error", "cancel"],
             message: str,
-            reason: Literal["error"]
+            reason: Literal["error", "cancel"]
     ):
         await self.emit_event(
             StreamEvent(
@@ -219,12 +222,16 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                     data=ErrorEvent(reason=message),
                 )
             )
+        elif terminal_type == "cancel":
+            await self.emit_event(
+                StreamEvent(
+                    type="cancel",
+                    data=CancelEvent(reason=message),
+                )
+            )
         else:
             raise TypeError(f"Unknown terminal type: {terminal_type}")
 
-        # 在发送 DoneEvent 之前停止 ping
-        await self.stop_ping()
-
         await self.emit_event(
             StreamEvent(
                 type="done",
@@ -234,6 +241,7 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                 ),
             )
         )
+        await self.finish()
 
     async def start_streaming(
             self,
@@ -254,7 +262,7 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                 await self.handle_stream_event(event)
         except asyncio.CancelledError as e:
             # 客户端断开连接是正常行为，使用 info 级别
-            msg = f"Stream cancelled (client disconnected or task stopped)"
+            msg = self.cancel_reason or f"Stream cancelled (client disconnected or task stopped)"
             logger.info(f"{msg} - source: {self.source_id}")
             await self.emit_event(
                 StreamEvent(
@@ -265,7 +273,9 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                 )
             )
             done_reason = "cancel"
-            self.stored_exception = e
+            # 主动取消时订阅者收到 done 后正常结束，不再向 SSE 连接抛出 CancelledError
+            if self.cancel_reason is None:
+                self.stored_exception = e
         except Exception as e:
             msg = f"{type(e).__name__}: {e}"
             logger.error(msg)
@@ -280,8 +290,6 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
             done_reason = "error"
             self.stored_exception = e
         finally:
-            await self.stop_ping()
-
             await self.emit_event(
                 StreamEvent(
                     type="done",
@@ -291,16 +299,26 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
                     ),
                 )
             )
+            await self.finish()
+
+    async def ensure_event_store(self) -> None:
+        """提前创建 EventStore，确保 emit_event() 与排队期间的订阅可用"""
+        if self.enable_reconnect and self.event_store is None:
+            self.event_store = await EventStore.get_or_create(
+                self.source_id,
+                ttl_seconds=self.event_ttl
+            )
+            logger.debug(f"EventStore created for {self.source_id}")
 
     async def run_streamed(self, async_generator: AsyncIterator[Any], ):
         try:
-            # 提前创建 EventStore，确保 emit_event() 时可用
-            if self.enable_reconnect:
-                self.event_store = await EventStore.get_or_create(
-                    self.source_id,
-                    ttl_seconds=self.event_ttl
-                )
-                logger.debug(f"EventStore created for {self.source_id}")
+            await self.ensure_event_store()
+
+            if self.cancel_reason is not None or self.is_finished():
+                # 启动前（如 build_messages 期间）已被取消，cancel() 已发出终止事件，不再执行
+                logger.info(f"Execution {self.source_id} cancelled before start, skip streaming")
+                await self.discard_stream(async_generator)
+                return
 
             self.stream_task = asyncio.create_task(self.start_streaming(async_generator))
         except Exception as e:
@@ -310,6 +328,12 @@ class BaseStreamHandler(metaclass=abc.ABCMeta):
             except Exception as inner_e:
                 logger.error(f"Failed to send error events: {inner_e}")
 
+    async def discard_stream(self, async_generator: AsyncIterator[Any]) -> None:
+        """关闭未启动的事件流"""
+        aclose = getattr(async_generator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
     @abc.abstractmethod
     async def handle_stream_event(self, event: Any):
         ...
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Optional, Set
 
 from loguru import logger
 from pydantic import BaseModel
@@ -6,8 +6,26 @@ from strands.tools.decorator import DecoratedFunctionTool
 
 from hatchify.common.domain.entity.agent_node_spec import AgentNode
 from hatchify.common.domain.entity.function_node_spec import FunctionNode
+from hatchify.common.domain.entity.graph_analysis import GraphAnalysis
 from hatchify.common.domain.entity.graph_spec import GraphSpec
+from hatchify.common.domain.enums.agent_category import AgentCategory
 from hatchify.core.factory.tool_factory import ToolRouter
+from hatchify.utils.canonical_hash import canonical_hash
+
+
+def compute_spec_hash(graph_spec: GraphSpec) -> str:
+    """计算 GraphSpec 的内容哈希
+
+    基于规范化 JSON（忽略 None 字段、键排序），内容相同的 spec 得到相同的哈希，
+    用作编译缓存等场景的键。
+
+    Args:
+        graph_spec: Graph 规范对象
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    return canonical_hash(graph_spec.model_dump(mode="json", exclude_none=True))
 
 
 def find_terminal_nodes(graph_spec: GraphSpec) -> List[str]:
@@ -38,6 +56,245 @@ def find_terminal_nodes(graph_spec: GraphSpec) -> List[str]:
     return list(terminal_nodes)
 
 
+# 无条件串行的 Agent 链达到该长度时给出并行化提示
+SERIAL_CHAIN_THRESHOLD = 3
+
+
+def _strongly_connected_components(nodes: List[str], successors: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan 强连通分量（迭代实现，避免大图递归过深）
+
+    Returns:
+        强连通分量列表，按逆拓扑序排列
+    """
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        index_of[root] = lowlink[root] = len(index_of)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors[root]))]
+
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = len(index_of)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def analyze_graph_spec(
+        graph_spec: GraphSpec,
+        node_latencies: Optional[Dict[str, float]] = None,
+) -> GraphAnalysis:
+    """静态分析 GraphSpec 的结构与并行度
+
+    分析内容：
+    1. 强连通分量找出环（Router 回路），缩点后得到 DAG
+    2. 在 DAG 上计算拓扑层级、最大出度/入度
+    3. 以节点耗时为权重计算关键路径与理论并行度（total_work / 关键路径长度）
+    4. 找出无条件串行的 Agent 链，提示可能被串行化的可并行工作
+
+    Args:
+        graph_spec: Graph 规范对象
+        node_latencies: 可选的节点历史耗时（秒），缺失的节点使用已知耗时的平均值；
+            不提供时每个节点按 1 计，且不给出 predicted_latency
+
+    Returns:
+        GraphAnalysis 分析结果
+    """
+    warnings: List[str] = []
+    nodes = list(dict.fromkeys(graph_spec.nodes))
+    order = {name: index for index, name in enumerate(nodes)}
+
+    successors: Dict[str, List[str]] = {name: [] for name in nodes}
+    predecessors: Dict[str, List[str]] = {name: [] for name in nodes}
+    agent_map = {agent.name: agent for agent in graph_spec.agents}
+
+    # 条件边：显式 rules/JSONLogic，或源节点为 Router/Orchestrator
+    conditional_edges: Set[tuple] = set()
+    for edge in graph_spec.edges:
+        if edge.from_node not in order or edge.to_node not in order:
+            warnings.append(f"边 {edge.from_node} -> {edge.to_node} 引用了不存在的节点，已忽略")
+            continue
+        if edge.to_node not in successors[edge.from_node]:
+            successors[edge.from_node].append(edge.to_node)
+            predecessors[edge.to_node].append(edge.from_node)
+        source_agent = agent_map.get(edge.from_node)
+        if (
+                edge.json_logic or edge.rules
+                or (source_agent and source_agent.category != AgentCategory.GENERAL)
+        ):
+            conditional_edges.add((edge.from_node, edge.to_node))
+
+    # Step 1: 强连通分量与环
+    components = [
+        sorted(component, key=order.__getitem__)
+        for component in reversed(_strongly_connected_components(nodes, successors))
+    ]
+    component_of = {name: index for index, component in enumerate(components) for name in component}
+    cycles = [
+        component for component in components
+        if len(component) > 1 or component[0] in successors[component[0]]
+    ]
+    cyclic_nodes = {name for component in cycles for name in component}
+
+    # Step 2: 缩点 DAG 上的拓扑层级（components 已按拓扑序排列）
+    component_level = [0] * len(components)
+    for index, component in enumerate(components):
+        for name in component:
+            for successor in successors[name]:
+                target = component_of[successor]
+                if target != index:
+                    component_level[target] = max(component_level[target], component_level[index] + 1)
+
+    levels: List[List[str]] = [[] for _ in range(max(component_level, default=-1) + 1)]
+    # 环内节点依次执行，同一层级的环只占一个并行宽度
+    level_widths = [0] * len(levels)
+    for index, component in enumerate(components):
+        levels[component_level[index]].extend(component)
+        level_widths[component_level[index]] += 1
+    for level in levels:
+        level.sort(key=order.__getitem__)
+
+    # Step 3: 出度 / 入度
+    max_fan_out = max((len(successors[name]) for name in nodes), default=0)
+    max_fan_in = max((len(predecessors[name]) for name in nodes), default=0)
+
+    # Step 4: 加权关键路径（每个环按执行一轮计）
+    if node_latencies:
+        known = {name: float(node_latencies[name]) for name in nodes if name in node_latencies}
+        default_weight = sum(known.values()) / len(known) if known else 1.0
+        weights = {name: known.get(name, default_weight) for name in nodes}
+    else:
+        weights = {name: 1.0 for name in nodes}
+
+    component_weight = [sum(weights[name] for name in component) for component in components]
+    distance = list(component_weight)
+    previous: List[Optional[int]] = [None] * len(components)
+    for index, component in enumerate(components):
+        for name in component:
+            for successor in successors[name]:
+                target = component_of[successor]
+                if target != index and distance[index] + component_weight[target] > distance[target]:
+                    distance[target] = distance[index] + component_weight[target]
+                    previous[target] = index
+
+    critical_path: List[str] = []
+    critical_path_length = 0.0
+    if components:
+        cursor: Optional[int] = max(range(len(components)), key=distance.__getitem__)
+        critical_path_length = distance[cursor]
+        path_components = []
+        while cursor is not None:
+            path_components.append(components[cursor])
+            cursor = previous[cursor]
+        critical_path = [name for component in reversed(path_components) for name in component]
+
+    total_work = sum(weights.values())
+    theoretical_parallelism = total_work / critical_path_length if critical_path_length > 0 else 1.0
+
+    # Step 5: 入口可达性
+    unreachable_nodes: List[str] = []
+    if graph_spec.entry_point in order:
+        reached = {graph_spec.entry_point}
+        frontier = [graph_spec.entry_point]
+        while frontier:
+            for successor in successors[frontier.pop()]:
+                if successor not in reached:
+                    reached.add(successor)
+                    frontier.append(successor)
+        unreachable_nodes = [name for name in nodes if name not in reached]
+        if unreachable_nodes:
+            warnings.append(f"以下节点从入口节点不可达: {unreachable_nodes}")
+    else:
+        warnings.append(f"入口节点 '{graph_spec.entry_point}' 不在 nodes 中")
+
+    # Step 6: 无条件串行的普通 Agent 链
+    def is_chain_member(name: str) -> bool:
+        agent = agent_map.get(name)
+        return agent is not None and agent.category == AgentCategory.GENERAL and name not in cyclic_nodes
+
+    next_in_chain: Dict[str, str] = {}
+    for name in nodes:
+        if len(successors[name]) != 1 or not is_chain_member(name):
+            continue
+        successor = successors[name][0]
+        if (
+                len(predecessors[successor]) == 1
+                and is_chain_member(successor)
+                and (name, successor) not in conditional_edges
+        ):
+            next_in_chain[name] = successor
+
+    chain_heads = [name for name in nodes if name in next_in_chain and name not in next_in_chain.values()]
+    serial_chains: List[List[str]] = []
+    for head in chain_heads:
+        chain = [head]
+        while chain[-1] in next_in_chain:
+            chain.append(next_in_chain[chain[-1]])
+        if len(chain) >= SERIAL_CHAIN_THRESHOLD:
+            serial_chains.append(chain)
+            warnings.append(
+                f"{len(chain)} 个 Agent 无条件串行执行: {' -> '.join(chain)}；"
+                f"若后续节点不依赖前序节点的输出，可改为从同一上游扇出并行执行"
+            )
+
+    analysis = GraphAnalysis(
+        node_count=len(nodes),
+        edge_count=len(graph_spec.edges),
+        levels=levels,
+        max_fan_out=max_fan_out,
+        max_fan_out_nodes=[name for name in nodes if max_fan_out and len(successors[name]) == max_fan_out],
+        max_fan_in=max_fan_in,
+        max_fan_in_nodes=[name for name in nodes if max_fan_in and len(predecessors[name]) == max_fan_in],
+        max_width=max(level_widths, default=0),
+        cycles=cycles,
+        critical_path=critical_path,
+        critical_path_length=round(critical_path_length, 4),
+        total_work=round(total_work, 4),
+        theoretical_parallelism=round(theoretical_parallelism, 4),
+        predicted_latency=round(critical_path_length, 4) if node_latencies else None,
+        node_latencies={name: round(weight, 4) for name, weight in weights.items()} if node_latencies else {},
+        unreachable_nodes=unreachable_nodes,
+        serial_chains=serial_chains,
+        warnings=warnings,
+    )
+
+    logger.debug(
+        f"Graph '{graph_spec.name}' 分析完成: {len(levels)} 层, {len(cycles)} 个环, "
+        f"关键路径 {len(critical_path)} 个节点, 理论并行度 {analysis.theoretical_parallelism}"
+    )
+
+    return analysis
+
+
 def generate_output_schema(
         graph_spec: GraphSpec,
         function_router: ToolRouter[DecoratedFunctionTool]
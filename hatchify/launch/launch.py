@@ -19,6 +19,7 @@ from hatchify.business.api.v1.execution_router import executions_router
 from hatchify.business.api.v1.graph_router import graphs_router
 from hatchify.business.api.v1.graph_version_router import graph_versions_router
 from hatchify.business.api.v1.message_router import messages_router
+from hatchify.business.api.v1.metrics_router import metrics_router
 from hatchify.business.api.v1.models_router import model_router
 from hatchify.business.api.v1.opendal_router import opendal_router
 from hatchify.business.api.v1.session_router import sessions_router
@@ -31,14 +32,25 @@ from hatchify.common.domain.enums.storage_type import StorageType
 from hatchify.common.domain.result.result import Result
 from hatchify.common.extensions.ext_storage import init_storage
 from hatchify.common.settings.settings import get_hatchify_settings
+from hatchify.core.manager.admission_manager import AdmissionRejected
+from hatchify.core.manager.event_log import close_event_log
+from hatchify.core.manager.event_manager import EventStore
+from hatchify.core.manager.execution_recorder_manager import execution_status_recorder
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.manager.llm_client_manager import close_llm_client_pool, llm_client_pool
+from hatchify.core.manager.reaper_manager import resource_reaper
+from hatchify.core.manager.scheduler_manager import execution_scheduler
+from hatchify.core.manager.stream_manager import StreamManager
 from hatchify.core.manager.tool_manager import async_load_mcp_server, async_load_strands_tools, \
     async_load_pre_defined_tools
+from hatchify.core.stream_handler.event_listener.listener_dispatcher import ListenerDispatcher
 
 hatchify_settings = get_hatchify_settings()
 
 
 async def initialize_extensions():
     litellm.modify_params = True
+    llm_client_pool.bind_loop(asyncio.get_running_loop())
 
     await init_db()
     await asyncio.gather(
@@ -47,10 +59,21 @@ async def initialize_extensions():
         async_load_pre_defined_tools(),
         init_storage(),
     )
+    await execution_status_recorder.start()
+    await execution_registry.start(on_cancel=StreamManager.cancel)
+    await execution_scheduler.start()
+    await resource_reaper.start()
 
 
 async def close_extensions():
-    ...
+    await resource_reaper.stop()
+    await execution_scheduler.stop()
+    await close_llm_client_pool()
+    await ListenerDispatcher.drain_all(hatchify_settings.stream.listener_drain_timeout)
+    await execution_status_recorder.stop()
+    await EventStore.flush_all()
+    await execution_registry.stop()
+    close_event_log()
 
 
 @asynccontextmanager
@@ -81,6 +104,12 @@ app.add_middleware(
 app.add_middleware(PreviewMiddleware)
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    error = Result.error(code=exc.status_code, message=exc.detail)
+    return JSONResponse(status_code=exc.status_code, content=jsonable_encoder(error), headers=exc.headers)
+
+
 @app.exception_handler(Exception)
 async def exception_handler(request: Request, exc: Exception):
     error = Result.error(code=500, message=f"{type(exc).__name__}: {exc}")
@@ -107,6 +136,7 @@ app.include_router(web_builder_router, prefix="/api", tags=["web_builder"])
 app.include_router(tool_router, prefix="/api", tags=["tools"])
 app.include_router(model_router, prefix="/api", tags=["models"])
 app.include_router(executions_router, prefix="/api", tags=["executions"])
+app.include_router(metrics_router, prefix="/api", tags=["metrics"])
 
 # 挂载 OpenDAL 文件访问路由（用于提供存储文件的 HTTP 访问）
 if hatchify_settings.storage.platform == StorageType.LOCAL:
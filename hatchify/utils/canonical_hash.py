@@ -0,0 +1,19 @@
+import hashlib
+import json
+from typing import Any
+
+
+def canonical_json(obj: Any) -> str:
+    """将对象序列化为规范化 JSON（键排序、无多余空白），保证相同内容得到相同字符串"""
+    return json.dumps(
+        obj,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def canonical_hash(obj: Any) -> str:
+    """计算对象规范化 JSON 的 sha256 摘要，用作内容寻址缓存的键"""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
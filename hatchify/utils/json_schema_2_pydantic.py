@@ -1,9 +1,13 @@
+import threading
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Type, Union
 
 from pydantic import BaseModel
 from pydantic import Field
 from pydantic import create_model
 
+from hatchify.utils.canonical_hash import canonical_hash
+
 
 def jsonschema_to_pydantic(
         schema: dict, definitions: dict = None
@@ -84,3 +88,61 @@ def jsonschema_to_pydantic(
     if description:
         model.__doc__ = description
     return model
+
+
+class PydanticModelCache:
+    """jsonschema_to_pydantic 的进程级 LRU 缓存
+
+    以 schema（含 title）的规范化哈希为键，相同 schema 始终返回同一个模型类，
+    避免重复执行 create_model。线程安全。
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._models: "OrderedDict[str, Type[BaseModel]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, schema: dict) -> Type[BaseModel]:
+        key = canonical_hash(schema)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+
+        model = jsonschema_to_pydantic(schema)
+
+        with self._lock:
+            # 并发未命中时保留先写入的模型，保证同一 schema 只对应一个类
+            model = self._models.setdefault(key, model)
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+        return model
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._models),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+pydantic_model_cache = PydanticModelCache()
+
+
+def cached_jsonschema_to_pydantic(schema: dict) -> Type[BaseModel]:
+    """带缓存的 jsonschema_to_pydantic，相同 schema（含 title）返回同一个模型类"""
+    return pydantic_model_cache.get_or_create(schema)
@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+from hatchify.common.settings.settings import AdmissionSettings
+from hatchify.core.manager.admission_manager import AdmissionController, AdmissionRejected
+
+
+def make_controller(**overrides) -> AdmissionController:
+    settings = {
+        "max_concurrent": 1,
+        "max_concurrent_per_graph": 0,
+        "max_concurrent_per_type": {},
+        "max_queue_size": 2,
+        "queue_timeout_seconds": 1.0,
+        "retry_after_seconds": 7,
+        "max_retry_after_seconds": 60,
+        **overrides,
+    }
+    return AdmissionController(AdmissionSettings(**settings))
+
+
+async def wait_queued(controller: AdmissionController, count: int) -> None:
+    for _ in range(100):
+        if controller.waiting == count:
+            return
+        await asyncio.sleep(0)
+    assert controller.waiting == count
+
+
+def test_waiters_are_admitted_in_order_when_slots_free_up():
+    async def main():
+        controller = make_controller()
+        first = await controller.acquire("g", "webhook")
+        second = asyncio.create_task(controller.acquire("g", "webhook"))
+        third = asyncio.create_task(controller.acquire("g", "webhook"))
+        await wait_queued(controller, 2)
+
+        first.release()
+        ticket = await asyncio.wait_for(second, timeout=1)
+        assert not third.done()
+        assert controller.running == 1
+
+        ticket.release()
+        (await asyncio.wait_for(third, timeout=1)).release()
+        assert controller.running == 0
+        assert controller.waiting == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_429_and_retry_after():
+    async def main():
+        controller = make_controller()
+        ticket = await controller.acquire("g", "webhook")
+        waiters = [asyncio.create_task(controller.acquire("g", "webhook")) for _ in range(2)]
+        await wait_queued(controller, 2)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("g", "webhook")
+        assert rejected.value.status_code == 429
+        # 没有历史执行耗时，使用配置的默认值
+        assert rejected.value.headers == {"Retry-After": "7"}
+
+        for waiter in waiters:
+            waiter.cancel()
+        ticket.release()
+
+    asyncio.run(main())
+
+
+def test_queue_timeout_is_rejected_with_503_and_leaves_queue():
+    async def main():
+        controller = make_controller(queue_timeout_seconds=0.05)
+        ticket = await controller.acquire("g", "webhook")
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("g", "webhook")
+        assert rejected.value.status_code == 503
+        assert rejected.value.headers["Retry-After"] == "7"
+        assert controller.waiting == 0
+
+        ticket.release()
+        assert controller.running == 0
+
+    asyncio.run(main())
+
+
+def test_retry_after_is_estimated_from_execution_duration():
+    async def main():
+        controller = make_controller(max_concurrent=2, max_retry_after_seconds=5)
+        controller._avg_duration = 4.0
+        assert controller.retry_after() == 2
+
+        tickets = [await controller.acquire("g", "webhook") for _ in range(2)]
+        waiters = [asyncio.create_task(controller.acquire("g", "webhook")) for _ in range(2)]
+        await wait_queued(controller, 2)
+        # 4s * (2 个排队 + 1) / 2 个并发 = 6s，受上限约束
+        assert controller.retry_after() == 5
+
+        for waiter in waiters:
+            waiter.cancel()
+        for ticket in tickets:
+            ticket.release()
+
+    asyncio.run(main())
+
+
+def test_per_graph_limit_does_not_block_other_graphs():
+    async def main():
+        controller = make_controller(max_concurrent=3, max_concurrent_per_graph=1)
+        busy = await controller.acquire("busy", "webhook")
+        blocked = asyncio.create_task(controller.acquire("busy", "webhook"))
+        await wait_queued(controller, 1)
+
+        # 队首只受单个 Graph 上限阻塞，其他 Graph 的请求照常放行
+        other = await asyncio.wait_for(controller.acquire("other", "webhook"), timeout=1)
+        assert not blocked.done()
+
+        busy.release()
+        (await asyncio.wait_for(blocked, timeout=1)).release()
+        other.release()
+
+    asyncio.run(main())
+
+
+def test_per_type_limit():
+    async def main():
+        controller = make_controller(max_concurrent=4, max_concurrent_per_type={"deploy": 1})
+        deploy = await controller.acquire("a", "deploy")
+        webhook = await controller.acquire("b", "webhook")
+        queued = asyncio.create_task(controller.acquire("c", "deploy"))
+        await wait_queued(controller, 1)
+
+        deploy.release()
+        (await asyncio.wait_for(queued, timeout=1)).release()
+        webhook.release()
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def main():
+        controller = make_controller()
+        ticket = await controller.acquire("g", "webhook")
+        waiter = asyncio.create_task(controller.acquire("g", "webhook"))
+        await wait_queued(controller, 1)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        ticket.release()
+        assert controller.running == 0
+        assert controller.waiting == 0
+
+    asyncio.run(main())
+
+
+def test_scheduled_requests_bypass_queue_limits():
+    async def main():
+        controller = make_controller(max_queue_size=0, queue_timeout_seconds=0.01)
+        ticket = await controller.acquire("g", "webhook")
+        scheduled = asyncio.create_task(controller.acquire("g", "webhook", scheduled=True))
+        await wait_queued(controller, 1)
+        await asyncio.sleep(0.05)
+        assert not scheduled.done()
+
+        ticket.release()
+        (await asyncio.wait_for(scheduled, timeout=1)).release()
+
+    asyncio.run(main())
+
+
+def test_ticket_is_released_when_bound_task_finishes():
+    async def main():
+        controller = make_controller()
+        ticket = await controller.acquire("g", "webhook")
+        task = asyncio.create_task(asyncio.sleep(0.01))
+        ticket.bind(task)
+        await task
+        await asyncio.sleep(0)
+
+        assert controller.running == 0
+        ticket.release()
+        assert controller.running == 0
+
+    asyncio.run(main())
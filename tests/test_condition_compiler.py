@@ -0,0 +1,131 @@
+"""预编译的边条件与原解释器（benchmarks/bench_condition_compiler.py 中保留的基准实现）结果一致"""
+from typing import Any, Callable
+
+import pytest
+
+from benchmarks.bench_condition_compiler import legacy_apply_json_logic, legacy_rules
+from hatchify.common.domain.entity.graph_spec import ConditionRule
+from hatchify.core.graph.condition_compiler import RULE_OPERATORS, compile_json_logic, compile_rules
+
+DATASETS = [
+    {},
+    {"score": 85, "level": "gold", "tag": "approved_42", "flag": False, "items": [1, 2, 3],
+     "review": {"score": 85, "tags": ["a", "b"], "nested": {"ok": True}}},
+    {"score": 50, "level": "bronze", "tag": "rejected", "flag": True, "items": [],
+     "review": {"score": None, "tags": [], "nested": "not a dict"}},
+    {"score": None, "level": None, "tag": 42, "flag": None, "items": None, "review": None},
+]
+
+COMPARISON_OPS = ["==", "eq", "!=", "neq", ">", "gt", ">=", "gte", "<", "lt", "<=", "lte"]
+
+JSON_LOGIC_CASES = [
+    {"var": "score"},
+    {"var": ["score"]},
+    {"var": ["missing", "fallback"]},
+    {"var": "review.nested.ok"},
+    {"var": ["review.nested.ok", "fallback"]},
+    {"var": None},
+    {"var": 0},
+    *({op: [{"var": "score"}, 80]} for op in COMPARISON_OPS),
+    *({op: [{"var": "level"}, "gold"]} for op in COMPARISON_OPS),
+    {"!": {"var": "flag"}},
+    {"not": [{"var": "flag"}]},
+    {"and": [{"var": "flag"}, {">=": [{"var": "score"}, 60]}]},
+    {"and": []},
+    {"or": [{"var": "flag"}, {"==": [{"var": "level"}, "gold"]}]},
+    {"or": []},
+    {"in": [{"var": "level"}, ["gold", "silver"]]},
+    {"in": ["a", {"var": "review.tags"}]},
+    {"in": [{"var": "score"}, {"var": "tag"}]},
+    {"if": [{"var": "flag"}, "yes", {"var": "level"}, "leveled"]},
+    {"if": [{"var": "flag"}, "yes"]},
+    {"regex": ["^approved_\\d+$", {"var": "tag"}]},
+    {"regex": [{"var": "level"}, {"var": "tag"}]},
+    {"regex": [42, {"var": "tag"}]},
+    "constant",
+    {"a": 1, "b": 2},
+    {"==": [[{"var": "score"}, 1], [85, 1]]},
+]
+
+
+def outcome(fn: Callable[[], Any]) -> Any:
+    """返回值或异常类型，两种实现抛出相同类型的异常也视为一致"""
+    try:
+        return fn()
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("expr", JSON_LOGIC_CASES, ids=repr)
+@pytest.mark.parametrize("data", DATASETS, ids=range(len(DATASETS)))
+def test_json_logic_matches_legacy(expr, data):
+    compiled = compile_json_logic(expr)
+    assert outcome(lambda: compiled(data)) == outcome(lambda: legacy_apply_json_logic(expr, data))
+
+
+@pytest.mark.parametrize(
+    "args, data, expected",
+    [
+        ([{"var": "flag"}, "a", "b"], {"flag": True}, "a"),
+        ([{"var": "flag"}, "a", "b"], {"flag": False}, "b"),
+        ([{"var": "x"}, "a", {"var": "y"}, "b", "c"], {"x": False, "y": True}, "b"),
+        ([{"var": "x"}, "a", {"var": "y"}, "b", "c"], {"x": False, "y": False}, "c"),
+        (["only"], {}, "only"),
+        ([{"var": "flag"}, "a"], {"flag": False}, None),
+    ],
+)
+def test_if_follows_json_logic(args, data, expected):
+    # 原解释器在参数为奇数个时不判断最后一个条件（{"if": [c, a, b]} 总是返回 b），这里按 JSONLogic 语义
+    assert compile_json_logic({"if": args})(data) == expected
+
+
+@pytest.mark.parametrize("expr", [{"unknown": [1, 2]}, {"==": [1]}, {"regex": ["(", "x"]}], ids=repr)
+def test_json_logic_invalid_expression_fails_at_compile_time(expr):
+    with pytest.raises(ValueError):
+        compile_json_logic(expr)
+
+
+RULE_VALUES = {
+    "between": [[60, 90], [90, 60], [1], "x"],
+    "regex": [r"^approved_\d+$", "gold|silver", 42],
+    "regex_not": [r"^approved_\d+$", 42],
+}
+DEFAULT_RULE_VALUES = [80, "gold", ["gold", "silver"], "o", None]
+RULE_FIELDS = ["score", "level", "tag", "flag", "items", "missing"]
+
+
+def rule_cases():
+    for op in [*RULE_OPERATORS, "regex", "regex_not"]:
+        for value in RULE_VALUES.get(op, DEFAULT_RULE_VALUES):
+            for field in RULE_FIELDS:
+                yield ConditionRule(field=field, op=op, value=value)
+
+
+@pytest.mark.parametrize("rule", list(rule_cases()), ids=lambda r: f"{r.field}-{r.op}-{r.value!r}")
+def test_rule_matches_legacy(rule):
+    compiled = compile_rules([rule])
+    legacy = legacy_rules([rule], "and")
+    for data in DATASETS:
+        assert compiled(data) == legacy(data), data
+
+
+@pytest.mark.parametrize("logic", ["and", "or"])
+def test_rule_logic_matches_legacy(logic):
+    rules = [
+        ConditionRule(field="score", op="gte", value=80),
+        ConditionRule(field="level", op="in", value=["gold", "silver"]),
+        ConditionRule(field="tag", op="startswith", value="rejected"),
+    ]
+    compiled = compile_rules(rules, logic)
+    legacy = legacy_rules(rules, logic)
+    for data in DATASETS:
+        assert compiled(data) == legacy(data), data
+
+
+def test_empty_rules_always_pass():
+    assert compile_rules([])({}) is True
+
+
+def test_unsupported_rule_operator_fails_at_compile_time():
+    with pytest.raises(ValueError):
+        compile_rules([ConditionRule(field="score", op="unknown", value=1)])
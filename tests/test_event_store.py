@@ -0,0 +1,195 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import hatchify.core.manager.event_manager as event_manager
+from hatchify.business.utils import sse_helper
+from hatchify.business.utils.sse_helper import replay_stored_events
+from hatchify.common.domain.event.base_event import StreamEvent, PingEvent
+from hatchify.common.settings.settings import EventStoreSettings
+from hatchify.core.manager.event_log import SQLiteEventLog
+from hatchify.core.manager.event_manager import EventStore
+
+
+@pytest.fixture(autouse=True)
+def no_global_event_log(monkeypatch):
+    monkeypatch.setattr(event_manager, "get_event_log", lambda: None)
+
+
+def make_store(event_log=None, **overrides) -> EventStore:
+    settings = EventStoreSettings(**{"max_events": 3, "max_bytes": 0, "pinned_head_events": 2, **overrides})
+    return EventStore("exec", settings=settings, event_log=event_log)
+
+
+def make_event(index: int = 0) -> StreamEvent:
+    return StreamEvent(type="ping", data=PingEvent(timestamp=index))
+
+
+def append_events(store: EventStore, count: int) -> list[StreamEvent]:
+    events = [make_event(i) for i in range(count)]
+    for event in events:
+        store.append(event)
+    return events
+
+
+def ids(events) -> list[str]:
+    return [event.id for event in events]
+
+
+def read(events) -> list[str]:
+    """消费异步游标迭代器，返回事件 ID"""
+    async def collect():
+        return [event.id async for event in events]
+
+    return asyncio.run(collect())
+
+
+def test_pinned_head_survives_ring_eviction():
+    store = make_store()
+    events = append_events(store, 10)
+
+    assert read(store.iter_all()) == ids(events[:2] + events[-3:])
+    assert store.count() == 5
+    assert store.dropped == 5
+    assert asyncio.run(store.get_first_event_id()) == events[0].id
+    assert asyncio.run(store.get_last_event_id()) == events[-1].id
+
+
+def test_iter_after_skips_evicted_gap_between_head_and_tail():
+    store = make_store()
+    events = append_events(store, 10)
+
+    # 头部事件之后的区间已淘汰且没有事件日志，直接接上缓冲区中最旧的事件
+    assert read(store.iter_after(events[1].id)) == ids(events[-3:])
+    assert read(store.iter_after(events[7].id)) == ids(events[8:])
+    assert not asyncio.run(store.has_after(events[-1].id))
+
+
+def test_evicted_or_unknown_event_id_replays_from_start():
+    store = make_store()
+    events = append_events(store, 10)
+
+    assert read(store.iter_after(events[4].id)) == read(store.iter_all())
+    assert read(store.iter_after("unknown")) == read(store.iter_all())
+
+
+def test_iteration_range_is_fixed_when_started():
+    async def main():
+        store = make_store()
+        events = append_events(store, 4)
+        cursor = store.iter_after(events[0].id)
+        assert (await anext(cursor)).id == events[1].id
+
+        # 迭代过程中继续追加并淘汰事件，游标按序号重新定位，不包含之后追加的事件
+        append_events(store, 2)
+        assert [event.id async for event in cursor] == ids(events[3:])
+
+    asyncio.run(main())
+
+
+def test_byte_limit_keeps_newest_event():
+    store = make_store(max_events=0, pinned_head_events=0)
+    events = append_events(store, 5)
+    store.settings.max_bytes = len(events[0].sse_frame()) * 2
+
+    more = append_events(store, 1)
+    assert read(store.iter_all()) == ids(events[-1:] + more)
+    assert store.memory_bytes() <= store.settings.max_bytes
+
+
+def test_seq_index_survives_buffer_compaction():
+    store = make_store()
+    events = append_events(store, 3000)
+
+    assert len(store._tail) < 3000
+    assert read(store.iter_all()) == ids(events[:2] + events[-3:])
+    assert read(store.iter_after(events[-2].id)) == ids(events[-1:])
+
+
+def test_evicted_events_are_read_back_from_event_log(tmp_path):
+    event_log = SQLiteEventLog(str(tmp_path / "events.db"))
+    store = make_store(event_log, flush_batch_size=1000)
+    events = append_events(store, 10)
+
+    # 未落盘的事件不淘汰
+    assert store.dropped == 0
+    assert asyncio.run(store.flush())
+    assert store.count() == 5
+
+    assert read(store.iter_all()) == ids(events)
+    assert read(store.iter_after(events[3].id)) == ids(events[4:])
+    assert ids(asyncio.run(store.read_after(events[1].id, 3))) == ids(events[2:5])
+    event_log.close()
+
+
+def test_read_after_includes_events_appended_while_reading_log(tmp_path):
+    event_log = SQLiteEventLog(str(tmp_path / "events.db"))
+    store = make_store(event_log, flush_batch_size=1000)
+    events = append_events(store, 10)
+    assert asyncio.run(store.spill())
+
+    reading = threading.Event()
+    resume = threading.Event()
+
+    def read_lost_range(*args, **kwargs):
+        # 被读取的事件已从日志丢失，读取期间事件循环上追加了新事件
+        reading.set()
+        assert resume.wait(5)
+        return []
+
+    event_log.read_range = read_lost_range
+
+    async def main():
+        task = asyncio.create_task(store.read_after(events[4].id, 10))
+        assert await asyncio.to_thread(reading.wait, 5)
+        appended = append_events(store, 1)
+        resume.set()
+        # 空结果意味着调用方会转为订阅实时事件，读取期间追加的事件不能遗漏
+        assert ids(await task) == ids(appended)
+
+    asyncio.run(main())
+    event_log.close()
+
+
+def test_rehydrated_running_execution_is_read_only(tmp_path, monkeypatch):
+    event_log = SQLiteEventLog(str(tmp_path / "events.db"))
+    monkeypatch.setattr(event_manager, "get_event_log", lambda: event_log)
+    writer = make_store(event_log)
+    events = append_events(writer, 3)
+    assert asyncio.run(writer.flush())
+
+    async def main():
+        store = await EventStore.get("exec")
+        assert not store.is_completed()
+        with pytest.raises(RuntimeError):
+            store.append(make_event())
+        # 执行可能仍在其他 worker 上写入，不缓存元数据
+        assert "exec" not in EventStore._stores
+
+        frames = [frame async for frame in replay_stored_events(store)]
+        assert [frame.split(b"\n")[1] for frame in frames] == [b"event: ping"] * 3 + [b"event: error", b"event: done"]
+
+    monkeypatch.setattr(EventStore, "_stores", {})
+    monkeypatch.setattr(EventStore, "_lock", asyncio.Lock())
+    asyncio.run(main())
+
+    # 中断事件只出现在重放结果中，不写入共享的事件日志
+    assert event_log.load_meta("exec").next_seq == 3
+    assert [seq for seq, _ in event_log.read_range("exec", 0, 100)] == [0, 1, 2]
+    assert ids(event for _, event in event_log.read_range("exec", 0, 100)) == ids(events)
+    event_log.close()
+
+
+def test_replay_is_refused_when_owner_cannot_be_checked(monkeypatch):
+    async def owner(execution_id: str):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(sse_helper.execution_registry, "owner", owner)
+
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(sse_helper.create_sse_response("missing"))
+    assert refused.value.status_code == 503
+    assert "Retry-After" in refused.value.headers
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import Counter
+from typing import List, Optional
+
+import pytest
+
+from hatchify.common.domain.enums.execution_priority import ExecutionPriority
+from hatchify.common.settings.settings import SchedulerSettings
+from hatchify.core.manager.admission_manager import AdmissionRejected
+from hatchify.core.manager.scheduler_manager import ExecutionScheduler, ScheduledJob
+
+
+class FakeHandler:
+    def __init__(self, source_id: str):
+        self.source_id = source_id
+        self.cancel_reason: Optional[str] = None
+        self.stream_task: Optional[asyncio.Task] = None
+        self.terminal: Optional[str] = None
+
+    def is_finished(self) -> bool:
+        return self.terminal is not None
+
+    async def send_terminal_events(self, terminal_type: str, message: str, reason: str) -> None:
+        self.terminal = message
+
+
+def make_job(
+        execution_id: str,
+        graph_id: str = "g",
+        priority: ExecutionPriority = ExecutionPriority.INTERACTIVE,
+        started: Optional[List[str]] = None,
+) -> ScheduledJob:
+    handler = FakeHandler(execution_id)
+
+    async def start():
+        if started is not None:
+            started.append(execution_id)
+
+    return ScheduledJob(handler, start, graph_id, priority=priority)
+
+
+def make_scheduler(**overrides) -> ExecutionScheduler:
+    return ExecutionScheduler(SchedulerSettings(**{"workers": 1, "max_queue_size": 10, **overrides}))
+
+
+def pop_all(scheduler: ExecutionScheduler) -> List[str]:
+    order = []
+    while (job := scheduler._next_job()) is not None:
+        order.append(job.execution_id)
+    return order
+
+
+def test_burst_from_one_graph_does_not_starve_others():
+    scheduler = make_scheduler()
+    for index in range(5):
+        scheduler.submit(make_job(f"a{index}", graph_id="a"))
+    scheduler.submit(make_job("b0", graph_id="b"))
+
+    assert pop_all(scheduler) == ["a0", "b0", "a1", "a2", "a3", "a4"]
+
+
+def test_graph_weights_share_slots_proportionally():
+    scheduler = make_scheduler(graph_weights={"heavy": 2.0})
+    for index in range(6):
+        scheduler.submit(make_job(f"heavy{index}", graph_id="heavy"))
+        scheduler.submit(make_job(f"light{index}", graph_id="light"))
+
+    first_six = pop_all(scheduler)[:6]
+    assert Counter(job_id.rstrip("0123456789") for job_id in first_six) == {"heavy": 4, "light": 2}
+
+
+def test_graph_returning_from_idle_does_not_jump_the_queue():
+    scheduler = make_scheduler()
+    scheduler.submit(make_job("a0", graph_id="a"))
+    assert pop_all(scheduler) == ["a0"]
+
+    for index in range(1, 4):
+        scheduler.submit(make_job(f"a{index}", graph_id="a"))
+    scheduler._next_job()
+    scheduler.submit(make_job("b0", graph_id="b"))
+    scheduler.submit(make_job("b1", graph_id="b"))
+
+    # b 从当前虚拟时间开始，与 a 交替出队，而不是连续抢占
+    assert pop_all(scheduler) == ["b0", "a2", "b1", "a3"]
+
+
+def test_interactive_before_batch():
+    scheduler = make_scheduler(batch_starvation_seconds=60)
+    scheduler.submit(make_job("batch", priority=ExecutionPriority.BATCH))
+    scheduler.submit(make_job("interactive"))
+
+    assert pop_all(scheduler) == ["interactive", "batch"]
+
+
+def test_starved_batch_is_promoted_over_interactive():
+    scheduler = make_scheduler(batch_starvation_seconds=30)
+    starved = make_job("batch", priority=ExecutionPriority.BATCH)
+    starved.enqueued_at = time.monotonic() - 31
+    scheduler.submit(starved)
+    scheduler.submit(make_job("interactive"))
+
+    assert pop_all(scheduler) == ["batch", "interactive"]
+
+
+def test_full_queue_is_rejected_with_429():
+    scheduler = make_scheduler(max_queue_size=2)
+    scheduler.submit(make_job("a"))
+    scheduler.ensure_capacity()
+    scheduler.submit(make_job("b"))
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        scheduler.ensure_capacity()
+    assert rejected.value.status_code == 429
+    assert "Retry-After" in rejected.value.headers
+
+
+def test_discarded_job_is_never_started():
+    async def main():
+        scheduler = make_scheduler()
+        started = []
+        scheduler.submit(make_job("kept", started=started))
+        scheduler.submit(make_job("cancelled", started=started))
+        assert scheduler.discard("cancelled")
+        assert not scheduler.discard("cancelled")
+
+        await scheduler.start()
+        for _ in range(100):
+            if started:
+                break
+            await asyncio.sleep(0)
+        await scheduler.stop()
+        assert started == ["kept"]
+
+    asyncio.run(main())
+
+
+def test_worker_waits_for_execution_before_taking_next_job():
+    async def main():
+        scheduler = make_scheduler()
+        release = asyncio.Event()
+        started = []
+
+        def make_running_job(execution_id: str) -> ScheduledJob:
+            job = make_job(execution_id)
+
+            async def start():
+                started.append(execution_id)
+                job.handler.stream_task = asyncio.create_task(release.wait())
+
+            job.start = start
+            return job
+
+        scheduler.submit(make_running_job("first"))
+        scheduler.submit(make_running_job("second"))
+        await scheduler.start()
+        await asyncio.sleep(0.02)
+        assert started == ["first"]
+        assert scheduler.running == 1
+        assert scheduler.queued == 1
+
+        release.set()
+        await asyncio.sleep(0.02)
+        assert started == ["first", "second"]
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_stop_fails_queued_jobs():
+    async def main():
+        scheduler = make_scheduler()
+        job = make_job("queued")
+        scheduler.submit(job)
+        await scheduler.stop()
+
+        assert job.handler.terminal is not None
+        assert scheduler.queued == 0
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from hatchify.common.domain.entity.graph_spec import GraphSpec
+from hatchify.core.manager.graph_template_manager import GraphTemplateManager
+
+
+def make_spec(name: str) -> GraphSpec:
+    return GraphSpec(name=name, nodes=["a"], edges=[], entry_point="a")
+
+
+class FakeBuilder:
+    """compile_template 在 release 之前一直阻塞（在线程中执行）"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def compile_template(self, graph_spec: GraphSpec, spec_hash: str):
+        self.calls += 1
+        assert self.release.wait(5)
+        return SimpleNamespace(spec_hash=spec_hash, name=graph_spec.name)
+
+
+@pytest.fixture(autouse=True)
+def clean_manager():
+    GraphTemplateManager._templates.clear()
+    GraphTemplateManager._compiling.clear()
+    GraphTemplateManager._lock = asyncio.Lock()
+    yield
+    GraphTemplateManager._templates.clear()
+
+
+def test_concurrent_requests_share_one_compile():
+    async def main():
+        builder = FakeBuilder()
+        spec = make_spec("g")
+        waiters = [asyncio.create_task(GraphTemplateManager.get_or_compile("g", spec, builder)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        builder.release.set()
+        templates = await asyncio.gather(*waiters)
+        assert builder.calls == 1
+        assert all(template is templates[0] for template in templates)
+        assert await GraphTemplateManager.get_or_compile("g", spec, builder) is templates[0]
+
+    asyncio.run(main())
+
+
+def test_slow_compile_does_not_block_other_graphs():
+    async def main():
+        slow = FakeBuilder()
+        fast = FakeBuilder()
+        fast.release.set()
+        slow_task = asyncio.create_task(GraphTemplateManager.get_or_compile("slow", make_spec("slow"), slow))
+        await asyncio.sleep(0.05)
+
+        template = await asyncio.wait_for(
+            GraphTemplateManager.get_or_compile("fast", make_spec("fast"), fast), timeout=1
+        )
+        assert template.name == "fast"
+        assert not slow_task.done()
+
+        slow.release.set()
+        assert (await slow_task).name == "slow"
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_cancel_compile():
+    async def main():
+        builder = FakeBuilder()
+        spec = make_spec("g")
+        first = asyncio.create_task(GraphTemplateManager.get_or_compile("g", spec, builder))
+        second = asyncio.create_task(GraphTemplateManager.get_or_compile("g", spec, builder))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        builder.release.set()
+        assert (await second).name == "g"
+        assert builder.calls == 1
+
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
+
+import hatchify.core.manager.idempotency_manager as idempotency_module
+from hatchify.business.db.base import Base
+from hatchify.business.models.idempotency_record import IdempotencyRecordTable
+from hatchify.business.models.result_cache import ResultCacheTable  # noqa: F401 注册表结构
+from hatchify.common.domain.enums.idempotency_status import IdempotencyStatus
+from hatchify.common.settings.settings import IdempotencySettings
+from hatchify.core.manager.idempotency_manager import IdempotencyManager, IdempotencyConflict, ResultCache
+from hatchify.utils.canonical_hash import canonical_hash
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idempotency.db'}")
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    monkeypatch.setattr(
+        idempotency_module, "AsyncSessionLocal",
+        async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    yield
+    asyncio.run(engine.dispose())
+
+
+class CountingRun:
+    """记录执行次数的 run 回调，release 被设置前一直处于执行中"""
+
+    def __init__(self, result: Optional[dict] = None, error: Optional[Exception] = None):
+        self.calls = 0
+        self.result = result or {"out": 1}
+        self.error = error
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run_once(manager: IdempotencyManager, run, key: str = "key", request_hash: str = "hash"):
+    return manager.run_once("invoke", "g", key, request_hash, run)
+
+
+def test_completed_key_returns_recorded_result():
+    async def main():
+        manager = IdempotencyManager()
+        run = CountingRun()
+        assert await run_once(manager, run) == {"out": 1}
+        assert await run_once(manager, run) == {"out": 1}
+        assert run.calls == 1
+
+    asyncio.run(main())
+
+
+def test_same_key_with_different_request_is_rejected_with_422():
+    async def main():
+        manager = IdempotencyManager()
+        await run_once(manager, CountingRun())
+
+        with pytest.raises(IdempotencyConflict) as conflict:
+            await run_once(manager, CountingRun(), request_hash="other")
+        assert conflict.value.status_code == 422
+
+    asyncio.run(main())
+
+
+def test_key_in_progress_in_another_process_is_rejected_with_409():
+    async def main():
+        async with idempotency_module.AsyncSessionLocal() as session:
+            session.add(IdempotencyRecordTable(
+                id=canonical_hash(["invoke", "g", "key"]),
+                endpoint="invoke",
+                graph_id="g",
+                idempotency_key="key",
+                request_hash="hash",
+                status=IdempotencyStatus.IN_PROGRESS,
+                expires_at=time.time() + 60,
+            ))
+            await session.commit()
+
+        run = CountingRun()
+        with pytest.raises(IdempotencyConflict) as conflict:
+            await run_once(IdempotencyManager(), run)
+        assert conflict.value.status_code == 409
+        assert run.calls == 0
+
+    asyncio.run(main())
+
+
+def test_concurrent_duplicate_shares_first_result():
+    async def main():
+        manager = IdempotencyManager()
+        run = CountingRun()
+        run.release.clear()
+        first = asyncio.create_task(run_once(manager, run))
+        await run.started.wait()
+        duplicate = asyncio.create_task(run_once(manager, run))
+        await asyncio.sleep(0.01)
+
+        run.release.set()
+        assert await first == await duplicate == {"out": 1}
+        assert run.calls == 1
+
+    asyncio.run(main())
+
+
+def test_waiter_reruns_when_first_request_is_cancelled():
+    async def main():
+        manager = IdempotencyManager()
+        run = CountingRun()
+        run.release.clear()
+        first = asyncio.create_task(run_once(manager, run))
+        await run.started.wait()
+        duplicate = asyncio.create_task(run_once(manager, run))
+        await asyncio.sleep(0.01)
+
+        # 首个请求的客户端断开，等待者不应收到 CancelledError，而是重新执行
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        run.release.set()
+        assert await asyncio.wait_for(duplicate, timeout=1) == {"out": 1}
+        assert run.calls == 2
+
+    asyncio.run(main())
+
+
+def test_failed_run_can_be_retried():
+    async def main():
+        manager = IdempotencyManager()
+        with pytest.raises(RuntimeError):
+            await run_once(manager, CountingRun(error=RuntimeError("boom")))
+
+        assert await run_once(manager, CountingRun()) == {"out": 1}
+
+    asyncio.run(main())
+
+
+def test_result_cache_is_scoped_to_graph():
+    async def main():
+        cache = ResultCache(IdempotencySettings(result_cache_enabled=True))
+        await cache.put("a", "hash", {"graph": "a"})
+
+        # 不同 Graph 的 spec 与输入相同时，请求哈希相同，但结果互不共享
+        assert await cache.get("a", "hash") == {"graph": "a"}
+        assert await cache.get("b", "hash") is None
+        await cache.put("b", "hash", {"graph": "b"})
+        assert await cache.get("a", "hash") == {"graph": "a"}
+        assert await cache.get("b", "hash") == {"graph": "b"}
+
+    asyncio.run(main())
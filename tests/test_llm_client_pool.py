@@ -0,0 +1,88 @@
+import asyncio
+import gc
+import threading
+
+import pytest
+
+from hatchify.common.settings.settings import LLMClientPoolSettings
+from hatchify.core.manager.llm_client_manager import LLMClientPool
+
+
+class FakeModel:
+    def __init__(self, client_args):
+        self.client_args = client_args
+
+
+def factory(client_args):
+    return FakeModel(client_args)
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_gemini_base_url_goes_to_http_options(enabled):
+    pool = LLMClientPool(LLMClientPoolSettings(enabled=enabled))
+    model = pool.get_or_create(
+        "gemini", {"api_key": "k", "base_url": "https://gemini.example"}, {"model_id": "m"}, factory
+    )
+
+    assert "base_url" not in model.client_args
+    assert model.client_args["http_options"]["base_url"] == "https://gemini.example"
+    assert ("httpx_async_client" in model.client_args["http_options"]) is enabled
+    asyncio.run(pool.close())
+
+
+def test_models_are_shared_per_endpoint_and_params():
+    pool = LLMClientPool(LLMClientPoolSettings())
+    a = pool.get_or_create("openai", {"api_key": "k"}, {"model_id": "m"}, factory)
+    b = pool.get_or_create("openai", {"api_key": "k"}, {"model_id": "m"}, factory)
+    c = pool.get_or_create("openai", {"api_key": "k"}, {"model_id": "other"}, factory)
+
+    assert a is b
+    assert c is not a
+    assert c.client_args["http_client"] is a.client_args["http_client"]
+    asyncio.run(pool.close())
+
+
+def test_models_created_on_another_loop_are_not_pooled():
+    pool = LLMClientPool(LLMClientPoolSettings())
+
+    async def create():
+        return pool.get_or_create("openai", {"api_key": "k"}, {"model_id": "m"}, factory)
+
+    async def main():
+        pool.bind_loop(asyncio.get_running_loop())
+        pooled = await create()
+
+        # 线程中没有运行中的事件循环（如 asyncio.to_thread 编译模板）：照常复用
+        assert await asyncio.to_thread(pool.get_or_create, "openai", {"api_key": "k"}, {"model_id": "m"}, factory) is pooled
+
+        other = {}
+        thread = threading.Thread(target=lambda: other.update(model=asyncio.run(create())))
+        thread.start()
+        thread.join()
+        assert other["model"] is not pooled
+        assert "http_client" not in other["model"].client_args
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_lru_eviction_closes_client_once_unreferenced():
+    async def main():
+        pool = LLMClientPool(LLMClientPoolSettings(max_models=2))
+        first = pool.get_or_create("openai", {"api_key": "k1"}, {"model_id": "m"}, factory)
+        pool.get_or_create("openai", {"api_key": "k2"}, {"model_id": "m"}, factory)
+        pool.get_or_create("openai", {"api_key": "k3"}, {"model_id": "m"}, factory)
+        assert pool.stats() == {"models": 2, "http_clients": 3}
+
+        # 被淘汰的 Model 仍被引用（如 Agent 正在使用）时不关闭
+        assert await pool.close_unused() == 0
+
+        client = first.client_args["http_client"]
+        del first
+        gc.collect()
+        assert await pool.close_unused() == 1
+        assert client.is_closed
+        assert pool.stats() == {"models": 2, "http_clients": 2}
+        await pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import pytest
+
+from hatchify.common.settings.settings import NodeLatencySettings
+from hatchify.core.manager.node_latency_manager import NodeLatencyHistory
+
+
+def test_averages_per_spec_and_node():
+    history = NodeLatencyHistory()
+    history.record("spec_a", "n1", 1.0)
+    history.record("spec_a", "n1", 3.0)
+    history.record("spec_a", "n2", 0.5)
+    history.record("spec_b", "n1", 10.0)
+
+    assert history.averages("spec_a") == {"n1": pytest.approx(2.0), "n2": pytest.approx(0.5)}
+    assert history.averages("spec_b") == {"n1": pytest.approx(10.0)}
+    assert history.averages("missing") == {}
+
+
+def test_least_recently_recorded_spec_is_evicted():
+    history = NodeLatencyHistory(NodeLatencySettings(max_specs=2))
+    history.record("spec_a", "n", 1.0)
+    history.record("spec_b", "n", 1.0)
+    history.record("spec_a", "n", 1.0)
+    history.record("spec_c", "n", 1.0)
+
+    assert history.averages("spec_b") == {}
+    assert history.averages("spec_a") == {"n": pytest.approx(1.0)}
+    assert history.averages("spec_c") == {"n": pytest.approx(1.0)}
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+import hatchify.core.manager.event_manager as event_manager
+from hatchify.common.domain.event.base_event import StreamEvent, PingEvent, DoneEvent
+from hatchify.common.settings.settings import EventStoreSettings, ReaperSettings
+from hatchify.core.manager.event_manager import EventStore
+from hatchify.core.manager.execution_registry import execution_registry
+from hatchify.core.manager.reaper_manager import ResourceReaper
+from hatchify.core.manager.stream_manager import StreamManager
+
+
+class FakeHandler:
+    def __init__(self, finished_at: Optional[float] = None, idle_seconds: float = 0.0):
+        self.finished_at = finished_at
+        self.broadcaster = SimpleNamespace(idle_seconds=lambda: idle_seconds, max_queue_depth=0)
+        self.cancel_reason: Optional[str] = None
+
+    def is_finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def cancel(self, reason: str) -> bool:
+        if self.is_finished():
+            return False
+        self.cancel_reason = reason
+        self.finished_at = time.monotonic()
+        return True
+
+
+@pytest.fixture(autouse=True)
+def clean_managers(monkeypatch):
+    monkeypatch.setattr(event_manager, "get_event_log", lambda: None)
+    monkeypatch.setattr(StreamManager, "_executors", {})
+    monkeypatch.setattr(StreamManager, "_lock", asyncio.Lock())
+    monkeypatch.setattr(EventStore, "_stores", {})
+    monkeypatch.setattr(EventStore, "_lock", asyncio.Lock())
+
+
+def make_store(source_id: str, events: int = 3, completed: bool = True) -> EventStore:
+    store = EventStore(source_id, settings=EventStoreSettings(log_file=None))
+    for i in range(events):
+        store.append(StreamEvent(type="ping", data=PingEvent(timestamp=i)))
+    if completed:
+        store.append(StreamEvent(type="done", data=DoneEvent(task_id=source_id, reason="completed")))
+    EventStore._stores[source_id] = store
+    return store
+
+
+def test_prune_finished_keeps_handlers_within_grace_period(monkeypatch):
+    unregistered = []
+
+    async def unregister(execution_id: str) -> None:
+        unregistered.append(execution_id)
+
+    monkeypatch.setattr(execution_registry, "unregister", unregister)
+    now = time.monotonic()
+    StreamManager._executors.update({
+        "running": FakeHandler(),
+        "recent": FakeHandler(finished_at=now),
+        "old": FakeHandler(finished_at=now - 600),
+    })
+
+    assert asyncio.run(StreamManager.prune_finished(300)) == 1
+    assert set(StreamManager._executors) == {"running", "recent"}
+    assert unregistered == ["old"]
+
+
+def test_cancel_idle_only_cancels_running_executions_without_subscribers():
+    idle = FakeHandler(idle_seconds=120)
+    busy = FakeHandler(idle_seconds=0)
+    finished = FakeHandler(finished_at=time.monotonic(), idle_seconds=120)
+    StreamManager._executors.update({"idle": idle, "busy": busy, "finished": finished})
+
+    assert asyncio.run(ResourceReaper(idle_cancel_seconds=60)._cancel_idle()) == 1
+    assert idle.cancel_reason is not None
+    assert busy.cancel_reason is None
+    assert set(StreamManager._executors) == {"busy", "finished"}
+
+
+def test_idle_cancel_is_disabled_by_default():
+    StreamManager._executors["idle"] = FakeHandler(idle_seconds=3600)
+
+    assert asyncio.run(ResourceReaper()._cancel_idle()) == 0
+    assert "idle" in StreamManager._executors
+
+
+def test_cleanup_expired_removes_stores_past_ttl():
+    expired = make_store("expired")
+    expired.created_at = datetime.now() - timedelta(seconds=expired.ttl_seconds + 1)
+    make_store("fresh")
+
+    assert asyncio.run(EventStore.cleanup_expired()) == 1
+    assert set(EventStore._stores) == {"fresh"}
+    assert expired._closed
+
+
+def test_memory_budget_releases_least_recently_used_completed_stores():
+    oldest = make_store("oldest")
+    running = make_store("running", completed=False)
+    newest = make_store("newest")
+    oldest.last_access, running.last_access, newest.last_access = 1, 0, 2
+
+    # 运行中且没有事件日志的存储无法释放，只移除最久未访问的已完成存储
+    budget = running.memory_bytes() + newest.memory_bytes()
+    assert asyncio.run(EventStore.enforce_memory_budget(budget)) == 1
+    assert set(EventStore._stores) == {"running", "newest"}
+    assert asyncio.run(EventStore.enforce_memory_budget(0)) == 0
+
+
+def test_reaper_runs_sweep_until_stopped(monkeypatch):
+    async def main():
+        reaper = ResourceReaper(ReaperSettings(interval_seconds=0.01))
+        sweeps = []
+
+        async def sweep():
+            sweeps.append(time.monotonic())
+            if len(sweeps) == 1:
+                raise RuntimeError("transient failure")
+            return {}
+
+        monkeypatch.setattr(reaper, "sweep", sweep)
+        await reaper.start()
+        await asyncio.sleep(0.1)
+        await reaper.stop()
+        count = len(sweeps)
+        await asyncio.sleep(0.05)
+
+        # 单轮失败不终止回收任务，stop 之后不再执行
+        assert count >= 2
+        assert len(sweeps) == count
+
+    asyncio.run(main())
+
+
+def test_disabled_reaper_does_not_start():
+    async def main():
+        reaper = ResourceReaper(ReaperSettings(enabled=False))
+        await reaper.start()
+        assert reaper._task is None
+
+    asyncio.run(main())
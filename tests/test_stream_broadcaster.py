@@ -0,0 +1,195 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+import hatchify.core.manager.event_manager as event_manager
+from hatchify.common.domain.event.base_event import StreamEvent, PingEvent, DoneEvent
+from hatchify.common.settings.settings import EventStoreSettings
+from hatchify.core.manager.event_manager import EventStore
+from hatchify.core.stream_handler.broadcaster import StreamBroadcaster
+
+
+@pytest.fixture(autouse=True)
+def no_global_event_log(monkeypatch):
+    monkeypatch.setattr(event_manager, "get_event_log", lambda: None)
+
+
+def make_store() -> EventStore:
+    return EventStore("exec", settings=EventStoreSettings(log_file=None))
+
+
+def make_event(event_type: str = "ping", index: int = 0) -> StreamEvent:
+    if event_type == "done":
+        return StreamEvent(type="done", data=DoneEvent(task_id="exec", reason="completed"))
+    return StreamEvent(type=event_type, data=PingEvent(timestamp=index))
+
+
+class Producer:
+    """按 stream handler 的顺序发出事件：先写入 EventStore，再广播"""
+
+    def __init__(self, broadcaster: StreamBroadcaster, store: Optional[EventStore]):
+        self.broadcaster = broadcaster
+        self.store = store
+        self.events: List[StreamEvent] = []
+
+    async def emit(self, event_type: str = "ping") -> StreamEvent:
+        await self.broadcaster.wait_for_capacity()
+        event = make_event(event_type, len(self.events))
+        if self.store is not None:
+            self.store.append(event)
+        self.broadcaster.publish(event)
+        self.events.append(event)
+        return event
+
+
+async def start_subscriber(
+        broadcaster: StreamBroadcaster,
+        store: Optional[EventStore],
+        stall: Optional[asyncio.Event] = None,
+):
+    """启动订阅者并等待其加入广播，stall 被设置后订阅者停止消费"""
+    received: List[StreamEvent] = []
+
+    async def consume():
+        async for event in broadcaster.subscribe(store):
+            received.append(event)
+            if stall is not None and stall.is_set():
+                await asyncio.Event().wait()
+
+    task = asyncio.create_task(consume())
+    for _ in range(100):
+        if broadcaster.subscriber_count:
+            break
+        await asyncio.sleep(0)
+    assert broadcaster.subscriber_count == 1
+    return task, received
+
+
+def ids(events) -> List[str]:
+    return [event.id for event in events]
+
+
+def test_catch_up_replays_overflowed_events_from_store():
+    async def main():
+        store = make_store()
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="catch_up")
+        producer = Producer(broadcaster, store)
+        task, received = await start_subscriber(broadcaster, store)
+
+        # 订阅者没有机会消费，缓冲区溢出后转为从 EventStore 补齐
+        for _ in range(10):
+            await producer.emit()
+        assert broadcaster.subscriber_count == 0
+
+        await producer.emit("done")
+        await asyncio.wait_for(task, timeout=1)
+        assert ids(received) == ids(producer.events)
+
+    asyncio.run(main())
+
+
+def test_catch_up_rejoins_broadcast_after_catching_up():
+    async def main():
+        store = make_store()
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="catch_up")
+        producer = Producer(broadcaster, store)
+        task, received = await start_subscriber(broadcaster, store)
+
+        for _ in range(5):
+            await producer.emit()
+        while len(received) < 5:
+            await asyncio.sleep(0)
+        assert broadcaster.subscriber_count == 1
+
+        await producer.emit()
+        await producer.emit("done")
+        await asyncio.wait_for(task, timeout=1)
+        assert ids(received) == ids(producer.events)
+
+    asyncio.run(main())
+
+
+def test_detach_disconnects_overflowed_subscriber():
+    async def main():
+        store = make_store()
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="detach")
+        producer = Producer(broadcaster, store)
+        task, received = await start_subscriber(broadcaster, store)
+
+        for _ in range(5):
+            await producer.emit()
+        assert broadcaster.subscriber_count == 0
+
+        # 订阅结束但没有收到 done，客户端需携带 Last-Event-ID 重连
+        await asyncio.wait_for(task, timeout=1)
+        assert received == []
+
+        resumed_task, resumed = await start_subscriber(broadcaster, store)
+        await producer.emit("done")
+        await asyncio.wait_for(resumed_task, timeout=1)
+        assert ids(resumed) == ids(producer.events)
+
+    asyncio.run(main())
+
+
+def test_catch_up_without_store_detaches():
+    async def main():
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="catch_up")
+        producer = Producer(broadcaster, None)
+        task, received = await start_subscriber(broadcaster, None)
+
+        for _ in range(5):
+            await producer.emit()
+        # 落后时丢弃缓冲区，没有 EventStore 无法补齐，直接断开
+        await asyncio.wait_for(task, timeout=1)
+        assert received == []
+
+    asyncio.run(main())
+
+
+def test_drop_deltas_only_drops_incremental_events():
+    async def main():
+        store = make_store()
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="drop_deltas")
+        producer = Producer(broadcaster, store)
+        task, received = await start_subscriber(broadcaster, store)
+
+        for _ in range(5):
+            await producer.emit("delta")
+        assert broadcaster.subscriber_count == 1
+
+        while len(received) < 2:
+            await asyncio.sleep(0)
+        await producer.emit("done")
+        await asyncio.wait_for(task, timeout=1)
+        assert ids(received) == ids(producer.events[:2] + producer.events[-1:])
+
+    asyncio.run(main())
+
+
+def test_block_waits_for_subscriber_then_falls_back_to_catch_up():
+    async def main():
+        store = make_store()
+        broadcaster = StreamBroadcaster("exec", max_buffer=2, overflow_policy="block", block_timeout=0.05)
+        producer = Producer(broadcaster, store)
+        stall = asyncio.Event()
+        task, received = await start_subscriber(broadcaster, store, stall)
+        subscriber = next(iter(broadcaster._subscribers))
+
+        # 订阅者在消费：生产者等待空位，不丢事件也不落后
+        for _ in range(10):
+            await producer.emit()
+        assert broadcaster.subscriber_count == 1
+        assert not subscriber.catching_up
+
+        # 订阅者不再消费：等待 block_timeout 后按 catch_up 处理
+        stall.set()
+        for _ in range(5):
+            await producer.emit()
+        assert broadcaster.subscriber_count == 0
+        assert subscriber.catching_up
+        assert ids(received) == ids(producer.events[:len(received)])
+        task.cancel()
+
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+批量 Webhook 的 NDJSON 输入需要经过真实的 ASGI 服务器验证：
+响应开始后 Starlette 在后台监听客户端断开，会消费掉尚未读取的请求体消息，
+TestClient 不会复现这个问题。
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+import hatchify.business.api.v1.web_hook_router as web_hook_router
+from hatchify.business.api.v1.web_hook_router import iter_list_items, read_ndjson_items, run_batch
+from hatchify.common.domain.responses.web_hook import BatchInvokeItemResponse
+
+MAX_ITEMS = 100
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    async def run_item(index: int, item: Any) -> BatchInvokeItemResponse:
+        if isinstance(item, Exception):
+            return BatchInvokeItemResponse(index=index, code=400, message=str(item))
+        await asyncio.sleep(0.01)
+        return BatchInvokeItemResponse(index=index, code=200, message="Success", data=item)
+
+    @app.post("/invoke-batch")
+    async def invoke_batch(request: Request):
+        items = iter_list_items(await read_ndjson_items(request, MAX_ITEMS))
+        return StreamingResponse(run_batch(items, run_item, 4, MAX_ITEMS), media_type="application/x-ndjson")
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def base_url() -> Iterator[str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "uvicorn did not start"
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def post_ndjson(base_url: str, lines: Iterator[bytes]) -> list[dict]:
+    with httpx.Client(timeout=10) as client:
+        response = client.post(
+            f"{base_url}/invoke-batch",
+            content=lines,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_body_is_fully_read(base_url: str):
+    # 分块发送，且分块边界落在行中间
+    def lines() -> Iterator[bytes]:
+        for index in range(20):
+            line = json.dumps({"n": index}).encode() + b"\n"
+            yield line[:3]
+            yield line[3:]
+
+    results = post_ndjson(base_url, lines())
+
+    assert sorted(result["index"] for result in results) == list(range(20))
+    assert all(result["data"] == {"n": result["index"]} for result in results)
+
+
+def test_ndjson_invalid_line_and_max_items(base_url: str):
+    body = b"\n".join([b'{"n": 0}', b"not json", *(b"{}" for _ in range(MAX_ITEMS))])
+
+    results = post_ndjson(base_url, iter([body]))
+
+    by_index = {result["index"]: result for result in results}
+    assert by_index[0]["code"] == 200
+    assert by_index[1]["code"] == 400
+    assert [result["code"] for result in results].count(413) == 1
+    assert len(results) == MAX_ITEMS + 1
+
+
+def test_concurrent_items_use_separate_builders_without_session(monkeypatch):
+    graph_spec = SimpleNamespace(input_schema={"type": "object", "properties": {"n": {"type": "integer"}}})
+    builders = []
+
+    class FakeService:
+        async def get_graph_spec(self, session, graph_id):
+            return graph_spec
+
+    async def get_or_compile(graph_id, spec, builder):
+        return SimpleNamespace(spec_hash="spec")
+
+    async def invoke_graph(graph_id, spec, builder, template, execute_data):
+        builders.append(builder)
+        await asyncio.sleep(0.01)
+        return {"n": execute_data.jsons["n"]}
+
+    monkeypatch.setattr(web_hook_router.GraphTemplateManager, "get_or_compile", get_or_compile)
+    monkeypatch.setattr(web_hook_router, "invoke_graph", invoke_graph)
+
+    async def main():
+        body = json.dumps([{"n": index} for index in range(8)]).encode()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        request = Request({"type": "http", "method": "POST", "headers": []}, receive)
+        response = await web_hook_router.invoke_batch(
+            "g", request, concurrency=4, session=None, service=FakeService()
+        )
+        return [json.loads(line) async for line in response.body_iterator]
+
+    results = asyncio.run(main())
+
+    # 并发条目各自输出自己的结果，互不共享 builder 与会话
+    assert sorted(result["index"] for result in results) == list(range(8))
+    assert all(result["code"] == 200 and result["data"] == {"n": result["index"]} for result in results)
+    assert len({id(builder) for builder in builders}) == 8
+    assert all(builder.session_manager is None for builder in builders)